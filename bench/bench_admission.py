@@ -0,0 +1,184 @@
+"""
+Admission des paires : ancien chemin (LifoQueue + polling sleep(1) + busy-wait sur les slots)
+contre AdmissionScheduler (file bornée par fraîcheur, péremption, réveil à la libération d'un slot).
+Mesure l'âge des paires achetées, le délai slot libéré -> achat suivant, le temps de slot
+inoccupé pendant que des paires attendaient et les paires admises, sur 10 min simulées
+(horloge virtuelle de pybot.replay).
+
+Deux scénarios par défaut :
+- régulier : une paire toutes les ~1 s, espacement 5 s ; l'espacement borne tout, les deux
+  chemins achètent les mêmes paires au même rythme
+- rafales : paquets de 5 paires toutes les ~4 s, espacement 0.5 s (sous l'écart entre
+  rafales) ; les slots sont le goulot, l'admission décide du délai slot libre -> achat
+
+    python bench/bench_admission.py
+    python bench/bench_admission.py --arrival 0.2 --slots 4 --spacing 0
+    python bench/bench_admission.py --arrival 3 --burst 8 --spacing 0.2
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pybot import replay  # noqa: E402
+from pybot.admission import AdmissionScheduler  # noqa: E402
+from pybot.replay import ReplayLoop  # noqa: E402
+from pybot.stats import percentile  # noqa: E402
+
+SAMPLE_SECONDS = 0.05  # pas d'échantillonnage du temps de slot inoccupé
+SCENARIOS = (
+    ("régulier", {"arrival": 1.0, "burst": 1, "spacing": 5.0}),
+    ("rafales", {"arrival": 4.0, "burst": 5, "spacing": 0.5}),
+)
+
+
+class Stats:
+    def __init__(self):
+        self.ages = []
+        self.gaps = []
+        self.releases = deque()  # slots libérés pas encore repris
+        self.idle = 0.0          # slots libres x s, pendant que des paires attendaient
+
+    def on_release(self, now):
+        self.releases.append(now)
+
+    def on_buy(self, age, now):
+        self.ages.append(age)
+        if self.releases:
+            self.gaps.append(now - self.releases.popleft())
+
+
+async def sample_idle(stats, slots, busy, waiting):
+    """Mêmes règles pour les deux chemins : slots libres alors qu'une paire attend."""
+    while True:
+        await asyncio.sleep(SAMPLE_SECONDS)
+        if waiting() > 0:
+            stats.idle += max(0, slots - busy()) * SAMPLE_SECONDS
+
+
+async def arrivals(loop, offer, minutes, arrival, burst, seed=0):
+    """Une rafale de `burst` paires (quelques ms d'écart) toutes les ~`arrival` s."""
+    rng = random.Random(seed)
+    end = loop.time() + minutes * 60
+    i = 0
+    while loop.time() < end:
+        await asyncio.sleep(rng.expovariate(1 / arrival))
+        for _ in range(burst):
+            await asyncio.sleep(rng.uniform(0.0, 0.02))
+            i += 1
+            offer(f"Mint{i}", loop.time())
+
+
+async def cancel_all():
+    others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for t in others:
+        t.cancel()
+    await asyncio.gather(*others, return_exceptions=True)
+
+
+async def old_path(minutes, arrival, burst, slots, hold, spacing):
+    loop = asyncio.get_running_loop()
+    queue = asyncio.LifoQueue()
+    stats = Stats()
+    state = {"pending": 0, "polling": 0}
+    semaphore = asyncio.Semaphore(slots)
+    rng = random.Random(1)
+
+    async def trade(at):
+        state["polling"] += 1
+        while state["pending"] >= slots:
+            await asyncio.sleep(1)
+        state["polling"] -= 1
+        async with semaphore:
+            stats.on_buy(loop.time() - at, loop.time())
+            state["pending"] += 1
+            await asyncio.sleep(rng.uniform(*hold))
+            state["pending"] -= 1
+            stats.on_release(loop.time())
+
+    async def process():
+        last = -float("inf")
+        while True:
+            if loop.time() - last < spacing:
+                await asyncio.sleep(1)
+                continue
+            try:
+                mint, at = await asyncio.wait_for(queue.get(), timeout=5.0)
+            except asyncio.TimeoutError:
+                continue
+            asyncio.ensure_future(trade(at))
+            last = loop.time()
+
+    asyncio.ensure_future(process())
+    asyncio.ensure_future(sample_idle(stats, slots, lambda: state["pending"],
+                                      lambda: queue.qsize() + state["polling"]))
+    await arrivals(loop, lambda m, at: queue.put_nowait((m, at)), minutes, arrival, burst)
+    await cancel_all()
+    return stats, queue.qsize(), 0
+
+
+async def new_path(minutes, arrival, burst, slots, hold, spacing):
+    loop = asyncio.get_running_loop()
+    admission = AdmissionScheduler(slots, maxsize=256, stale_after=10.0, min_spacing=spacing)
+    stats = Stats()
+    rng = random.Random(1)
+
+    async def trade(ticket):
+        with admission.release_on_exit():
+            await asyncio.sleep(rng.uniform(*hold))
+        stats.on_release(loop.time())
+
+    async def process():
+        while True:
+            ticket = await admission.next()
+            stats.on_buy(ticket.waited, loop.time())
+            asyncio.ensure_future(trade(ticket))
+
+    asyncio.ensure_future(process())
+    asyncio.ensure_future(sample_idle(stats, slots, lambda: admission.busy, lambda: admission.depth))
+    await arrivals(loop, lambda m, at: admission.offer(m, 6), minutes, arrival, burst)
+    await cancel_all()
+    return stats, admission.depth, admission.dropped_stale
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--arrival", type=float, help="s moyennes entre deux rafales (défaut : scénarios intégrés)")
+    parser.add_argument("--burst", type=int, help="paires par rafale")
+    parser.add_argument("--slots", type=int, default=2)
+    parser.add_argument("--spacing", type=float, help="RATE_LIMIT / min_spacing (s)")
+    args = parser.parse_args()
+    hold = (3.0, 8.0)
+    # aucune I/O dans ce bench : le temps virtuel saute au prochain timer sans attente réelle
+    replay.IDLE_GRACE_SECONDS = 0
+
+    scenarios = SCENARIOS
+    if args.arrival is not None or args.burst is not None or args.spacing is not None:
+        custom = dict(SCENARIOS[0][1])
+        custom.update({k: v for k, v in (("arrival", args.arrival), ("burst", args.burst), ("spacing", args.spacing))
+                       if v is not None})
+        scenarios = (("personnalisé", custom),)
+
+    for label, sc in scenarios:
+        print(f"{label} : {args.minutes:g} min, {sc['burst']} paire(s) toutes les ~{sc['arrival']:g}s, "
+              f"{args.slots} slots, hold {hold[0]:g}-{hold[1]:g}s, espacement {sc['spacing']:g}s")
+        for name, fn in (("LifoQueue + polling", old_path), ("AdmissionScheduler", new_path)):
+            loop = ReplayLoop(0.0)
+            try:
+                stats, backlog, stale = loop.run_until_complete(
+                    fn(args.minutes, sc["arrival"], sc["burst"], args.slots, hold, sc["spacing"]))
+            finally:
+                loop.close()
+            ages, gaps = sorted(stats.ages), sorted(stats.gaps)
+            print(f"  {name:<20} : {len(ages):4d} achats | âge à l'achat p50 {percentile(ages, 50, True):6.2f}s, "
+                  f"max {percentile(ages, 100, True):7.1f}s | slot libre -> achat p50 "
+                  f"{percentile(gaps, 50, True) * 1e3:5.0f}ms p99 {percentile(gaps, 99, True) * 1e3:5.0f}ms | "
+                  f"slots inoccupés {stats.idle:6.1f} slot.s | file restante {backlog}, périmées {stale}")
+
+
+if __name__ == "__main__":
+    main()
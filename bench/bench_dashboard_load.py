@@ -0,0 +1,97 @@
+"""
+Coût d'un refresh du dashboard de simulation selon la taille de l'historique :
+avant (relecture + parse de tout stats.json, 3 DataFrames reconstruits, PnL cumulé recalculé)
+contre après (TradeHistory : lecture des seules lignes ajoutées au journal).
+
+    python bench/bench_dashboard_load.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pybot.history import TradeHistory  # noqa: E402
+
+RUN = "bench"
+OUTCOMES = (("successful_trades_log", "success"), ("nosuccessful_trades_log", "fail"), ("rugpull_trades_log", "rug"))
+
+
+def fake_trade(i):
+    pnl = random.uniform(-0.05, 0.05)
+    return {
+        "time": time.strftime("%H:%M:%S", time.localtime(1_700_000_000 + i)),
+        "mint": "https://dexscreener.com/solana/" + f"{i:044d}",
+        "pnl": pnl,
+        "buy_price": random.random() * 1e-6,
+        "sell_price": random.random() * 1e-6,
+        "amount_token": random.random() * 1e6,
+        "pnl_pct_equity_before": pnl * 100,
+        "equity_before": 1.0,
+        "equity_after": 1.0 + pnl,
+    }
+
+
+def legacy_refresh(stats_path):
+    with open(stats_path, "r", encoding="utf-8") as f:
+        stats = json.load(f)
+    frames = [pd.DataFrame(stats.get(key, [])) for key, _ in OUTCOMES]
+    df_all = pd.concat(frames, ignore_index=True)
+    df_all["pnl"] = pd.to_numeric(df_all["pnl"], errors="coerce").fillna(0.0)
+    df_all["cum_pnl"] = df_all["pnl"].cumsum()
+    df_all["time_dt"] = pd.to_datetime(df_all["time"], format="%H:%M:%S", errors="coerce")
+    return df_all.sort_values("time_dt")
+
+
+def bench(n, repeats=5):
+    tmp = tempfile.mkdtemp()
+    stats_path = os.path.join(tmp, "stats.json")
+    journal_path = os.path.join(tmp, "trades.jsonl")
+
+    trades = [fake_trade(i) for i in range(n)]
+    logs = {key: [] for key, _ in OUTCOMES}
+    with open(journal_path, "w", encoding="utf-8") as f:
+        for i, t in enumerate(trades):
+            key, outcome = OUTCOMES[i % 3]
+            logs[key].append(t)
+            f.write(json.dumps(dict(t, seq=i, ts=1_700_000_000 + i, run=RUN, event="close", outcome=outcome)) + "\n")
+    with open(stats_path, "w", encoding="utf-8") as f:
+        json.dump(logs, f, indent=2)
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        legacy_refresh(stats_path)
+    before = (time.perf_counter() - t0) / repeats
+
+    history = TradeHistory(journal_path)
+    t0 = time.perf_counter()
+    history.refresh(RUN)
+    first = time.perf_counter() - t0
+
+    total = 0.0
+    for i in range(repeats):
+        with open(journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(dict(fake_trade(n + i), seq=n + i, ts=0, run=RUN, event="close", outcome="fail")) + "\n")
+        t0 = time.perf_counter()
+        history.refresh(RUN)
+        total += time.perf_counter() - t0
+    after = total / repeats
+
+    t0 = time.perf_counter()
+    history.refresh(RUN)
+    idle = time.perf_counter() - t0
+
+    print(
+        f"{n:>7} trades | avant {before * 1000:8.1f} ms | après : 1er chargement {first * 1000:8.1f} ms, "
+        f"+1 trade {after * 1000:6.2f} ms, sans nouveau trade {idle * 1000:6.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    random.seed(1)
+    for n in (1_000, 10_000, 50_000):
+        bench(n)
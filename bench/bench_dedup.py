@@ -0,0 +1,93 @@
+"""
+Mémoire et coût de lookup de la déduplication des mints : set() Python contre SeenMints
+(Bloom à deux générations), à 1M et 10M mints.
+
+    python bench/bench_dedup.py            # 1M et 10M (10M prend ~1 min)
+    python bench/bench_dedup.py --sizes 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pybot.dedup import SeenMints  # noqa: E402
+
+CHUNK = 100_000
+
+
+def fake_mint(rng):
+    return rng.getrandbits(176).to_bytes(22, "little").hex()  # 44 caractères, comme un mint base58
+
+
+def chunks(n, seed):
+    rng = random.Random(seed)
+    for start in range(0, n, CHUNK):
+        yield [fake_mint(rng) for _ in range(min(CHUNK, n - start))]
+
+
+def bench_set(n, probes):
+    tracemalloc.start()  # chaînes + table du set
+    seen = set()
+    for chunk in chunks(n, n):
+        seen.update(chunk)
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    for p in probes:
+        p in seen
+    return mem, (time.perf_counter() - t0) / len(probes)
+
+
+def bench_bloom(n, probes, capacity):
+    path = os.path.join(tempfile.mkdtemp(), "seen.bin")
+    bloom = SeenMints(capacity=capacity, fp_rate=0.001, path=path)
+    total = 0.0
+    for chunk in chunks(n, n):
+        t0 = time.perf_counter()
+        for m in chunk:
+            bloom.add_if_new(m)
+        total += time.perf_counter() - t0
+    insert = total / n
+    t0 = time.perf_counter()
+    false_pos = sum(1 for p in probes if p in bloom)
+    lookup = (time.perf_counter() - t0) / len(probes)
+    t0 = time.perf_counter()
+    bloom.save()
+    save = time.perf_counter() - t0
+    return bloom.memory_bytes, insert, lookup, false_pos / len(probes), save
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--set-limit", type=int, default=2_000_000, help="taille max mesurée pour set()")
+    args = parser.parse_args()
+    rng = random.Random(1)
+    probes = [fake_mint(rng) for _ in range(100_000)]  # jamais insérés
+    per_mint = 0.0
+
+    for n in args.sizes:
+        if n <= args.set_limit:
+            mem, lookup = bench_set(n, probes)
+            per_mint = mem / n
+            print(f"set()      {n:>10,} mints : {mem / 2**20:8.1f} Mo | lookup {lookup * 1e6:5.2f} µs")
+        else:
+            print(f"set()      {n:>10,} mints : ~{n * per_mint / 2**20:7.0f} Mo (extrapolé) | non mesuré")
+
+        for capacity in (1_000_000, n):
+            mem, insert, lookup, fpr, save = bench_bloom(n, probes, capacity)
+            print(
+                f"SeenMints  {n:>10,} mints (capacité {capacity:>10,}) : {mem / 2**20:8.1f} Mo | "
+                f"add {insert * 1e6:5.2f} µs | lookup {lookup * 1e6:5.2f} µs | "
+                f"faux positifs {fpr * 100:.3f}% | save {save * 1000:.0f} ms"
+            )
+            if capacity == n:
+                break
+
+
+if __name__ == "__main__":
+    main()
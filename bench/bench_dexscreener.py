@@ -0,0 +1,145 @@
+"""
+Enrichissement DexScreener : ancien chemin (fetch_with_retry : une requête par mint et par
+tentative, une session par requête) contre DexScreenerEnricher (requêtes multi-adresses sur
+un tick commun, session partagée, cache TTL, mints non indexées remises en file).
+
+Stand-in local de l'API : une mint est indexée quelques secondes après sa création (certaines
+jamais). Rafales de nouvelles paires sur 10 min simulées (horloge virtuelle de pybot.replay).
+
+    python bench/bench_dexscreener.py
+    python bench/bench_dexscreener.py --burst 300 --minutes 30
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import random
+import sys
+
+from aiohttp import web
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+from pybot.replay import ReplayLoop  # noqa: E402
+from pybot.stats import percentile  # noqa: E402
+
+spec = importlib.util.spec_from_file_location(
+    "fetch_dexscreener", os.path.join(HERE, "..", "test", "other_func", "fetch_dexscreener.py"))
+fd = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(fd)
+fd.print_runtime = lambda msg: None
+
+
+class DexScreenerStandIn:
+    """token-pairs/v1 (une mint) et tokens/v1 (jusqu'à 30 mints) ; une mint n'existe qu'une fois indexée."""
+
+    def __init__(self):
+        self.indexed_at = {}     # mint -> loop.time() d'indexation (None = jamais)
+        self.calls = 0
+
+    def _pair(self, mint):
+        return {
+            "chainId": "solana", "dexId": "raydium", "pairAddress": "Pair" + mint[4:],
+            "baseToken": {"address": mint, "name": mint[:8], "symbol": mint[:4]},
+            "quoteToken": {"address": "So11111111111111111111111111111111111111112", "symbol": "SOL"},
+            "liquidity": {"usd": 12000.0}, "volume": {"m5": 800.0}, "txns": {"m5": {"buys": 12, "sells": 4}},
+        }
+
+    def _indexed(self, mint):
+        at = self.indexed_at.get(mint)
+        return at is not None and asyncio.get_event_loop().time() >= at
+
+    async def token_pairs(self, request):
+        self.calls += 1
+        mint = request.match_info["mint"]
+        return web.json_response([self._pair(mint)] if self._indexed(mint) else [])
+
+    async def tokens(self, request):
+        self.calls += 1
+        mints = request.match_info["mints"].split(",")[:30]
+        return web.json_response([self._pair(m) for m in mints if self._indexed(m)])
+
+    async def serve(self):
+        app = web.Application()
+        app.add_routes([
+            web.get("/token-pairs/v1/solana/{mint}", self.token_pairs),
+            web.get("/tokens/v1/solana/{mints}", self.tokens),
+        ])
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return runner, runner.addresses[0][1]
+
+
+async def run(mode, args):
+    loop = asyncio.get_running_loop()
+    standin = DexScreenerStandIn()
+    runner, port = await standin.serve()
+    base = f"http://127.0.0.1:{port}"
+    fd.DEXSCREENER_URL = base + "/token-pairs/v1/solana/"
+    enricher = fd.DexScreenerEnricher(url=base + "/tokens/v1/solana/")
+    rng = random.Random(0)
+    delays, found, tasks = [], [0], []
+
+    async def enrich(mint, born):
+        if mode == "ancien":
+            data = None
+            for _ in range(args.retries):  # ancien fetch_with_retry
+                data = await fd.fetch_dexscreener(mint)
+                if data:
+                    break
+                await asyncio.sleep(args.delay)
+        else:
+            data = await enricher.get(mint, timeout=args.retries * args.delay)
+        if data:
+            found[0] += 1
+            delays.append(loop.time() - born)
+
+    start = loop.time()
+    i = 0
+    while loop.time() - start < args.minutes * 60:
+        # rafale de `burst` paires étalées sur 5 s, puis une paire toutes les `quiet` s
+        in_burst = (loop.time() - start) % args.burst_every < 5
+        await asyncio.sleep(5 / args.burst if in_burst else args.quiet)
+        mint = f"Mint{i:040d}"
+        i += 1
+        never = rng.random() < args.never
+        standin.indexed_at[mint] = None if never else loop.time() + rng.uniform(2, 15)
+        tasks.append(asyncio.ensure_future(enrich(mint, loop.time())))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+    await enricher.close()
+    await runner.cleanup()
+    print(f"{mode:<8} {i} mints | {found[0]} enrichies | {standin.calls} appels "
+          f"({standin.calls / elapsed * 3600:.0f}/h) | mint -> fiche p50 {percentile(delays, 50):.1f}s "
+          f"p99 {percentile(delays, 99):.1f}s")
+    if mode != "ancien":
+        print(f"         {enricher.stats()}")
+    return standin.calls / elapsed * 3600
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--burst", type=int, default=150, help="paires par rafale (sur 5 s)")
+    parser.add_argument("--burst-every", type=float, default=60)
+    parser.add_argument("--quiet", type=float, default=2.0, help="s entre deux paires hors rafale")
+    parser.add_argument("--never", type=float, default=0.2, help="part des mints jamais indexées")
+    parser.add_argument("--retries", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=2.0)
+    args = parser.parse_args()
+    rates = {}
+    for mode in ("ancien", "groupé"):
+        loop = ReplayLoop(0.0)
+        asyncio.set_event_loop(loop)
+        try:
+            rates[mode] = loop.run_until_complete(run(mode, args))
+        finally:
+            loop.close()
+    print(f"appels DexScreener / h : {rates['ancien']:.0f} -> {rates['groupé']:.0f} "
+          f"(÷{rates['ancien'] / max(rates['groupé'], 1e-9):.0f})")
+
+
+if __name__ == "__main__":
+    main()
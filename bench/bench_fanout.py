@@ -0,0 +1,193 @@
+"""
+N variants du simulateur en parallèle : N copies indépendantes de test/test.py (chacune son
+WebSocket et ses appels Jupiter / DexScreener) contre pybot.fanout (un process d'ingestion,
+N process de stratégie). Stand-ins locaux du flux de paires et des API ; mesure les
+connexions et requêtes vers l'amont, et le transit ingestion -> variant.
+
+    python bench/bench_fanout.py
+    python bench/bench_fanout.py --variants 8 --rate 5 --seconds 60
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+from pybot.fanout import FanOut  # noqa: E402
+from pybot.replay import DEFAULT_SIM, load_sim  # noqa: E402
+from ws_standin import LaggedStandIn, PairSource  # noqa: E402
+
+QUIET = {"RECORD_FILE": None, "CONTROL_PORT": 0, "INGEST_REPORT_SECONDS": 0}
+
+
+def variant_grid(n: int) -> dict:
+    holds = [6, 12, 20, 30]
+    stops = [0.2, 0.1]
+    return {f"v{i}": {"TRADE_HOLD_SECONDS": holds[i % len(holds)], "EXIT_STOP_LOSS": stops[i // len(holds) % 2]}
+            for i in range(n)}
+
+
+class ApiStandIn:
+    """Quote Jupiter (prix bruité autour d'une valeur fixe) et DexScreener (rien d'indexé) ; compte les appels."""
+
+    def __init__(self):
+        self.calls = {"quote": 0, "dexscreener": 0}
+        self.peers = set()
+        self.rng = random.Random(0)
+
+    async def quote(self, request):
+        self.calls["quote"] += 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+        amount = int(request.query["amount"])
+        sol_in = request.query["inputMint"].startswith("So111")
+        out = int(amount * (1e6 if sol_in else 1e-6) * self.rng.uniform(0.9, 1.1))
+        swap = {"inAmount": str(amount), "outAmount": str(out), "feeAmount": "0", "label": "standin"}
+        return web.json_response({"inAmount": str(amount), "outAmount": str(out), "priceImpactPct": "0.01",
+                                  "routePlan": [{"swapInfo": swap}]})
+
+    async def dexscreener(self, request):
+        self.calls["dexscreener"] += 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+        return web.json_response([])
+
+    async def serve(self):
+        app = web.Application()
+        app.router.add_get("/swap/v1/quote", self.quote)
+        app.router.add_get("/tokens/v1/solana/{mints}", self.dexscreener)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return runner, f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+
+def point_at(sim, ws_url: str, api: str):
+    sim.pipeline.pair_feed.feeds = sim.pipeline.pair_feed.feeds[:1]
+    sim.pipeline.pair_feed.feeds[0].url = ws_url
+    sim.jupiter.JUPITER_QUOTE_URL = api + "/swap/v1/quote"
+    sim.dexscreener_api.dexscreener.url = api + "/tokens/v1/solana/"
+
+
+def run_copy(name, overrides, workdir, ws_url, api, seconds):
+    """Une copie indépendante de test/test.py (ancien mode : un process lancé à la main par réglage)."""
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    sys.stdout = open("console.log", "w", buffering=1, encoding="utf-8")
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    sim = load_sim(DEFAULT_SIM, dict(overrides, **QUIET))
+    point_at(sim, ws_url, api)
+
+    async def run():
+        task = asyncio.ensure_future(sim.run())
+        await asyncio.sleep(seconds)
+        for t in asyncio.all_tasks():
+            if t is not asyncio.current_task():
+                t.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    loop.run_until_complete(run())
+    loop.close()
+
+
+def transit(workdirs):
+    p50, p99, received = [], [], 0
+    for workdir in workdirs:
+        try:
+            with open(os.path.join(workdir, "stats.json"), encoding="utf-8") as f:
+                fanout = json.load(f)["feeds"]["fanout"]
+        except (OSError, ValueError, KeyError):
+            continue
+        p50.append(fanout["transit_p50"])
+        p99.append(fanout["transit_p99"])
+        received += fanout["received"]
+    return received, p50, p99
+
+
+async def run(mode, args, root):
+    source = PairSource(rate=args.rate, total=int(args.rate * args.seconds))
+    feed = LaggedStandIn(source)
+    ws_server = await feed.serve()
+    ws_url = f"ws://127.0.0.1:{next(iter(ws_server.sockets)).getsockname()[1]}/"
+    api = ApiStandIn()
+    runner, api_url = await api.serve()
+    variants = variant_grid(args.variants)
+    duration = args.seconds + max(v["TRADE_HOLD_SECONDS"] for v in variants.values()) + 5
+    workdirs = [os.path.join(root, mode, name) for name in variants]
+    fanout, processes = None, []
+    t0 = time.monotonic()
+    if mode == "copies":
+        ctx = multiprocessing.get_context("spawn")
+        for (name, overrides), workdir in zip(variants.items(), workdirs):
+            process = ctx.Process(target=run_copy, args=(name, overrides, workdir, ws_url, api_url,
+                                                          duration + args.warmup))
+            process.start()
+            processes.append(process)
+    else:
+        sim = load_sim(DEFAULT_SIM, QUIET)
+        point_at(sim, ws_url, api_url)
+        sim.pipeline.print_fn = lambda msg: None
+        fanout = FanOut({name: dict(overrides, **QUIET) for name, overrides in variants.items()},
+                        os.path.join(root, mode), sim.pipeline.pair_feed, sim.jupiter.get_cached_swap_price,
+                        lambda mint, timeout: sim.dexscreener_api.dexscreener.get(mint, timeout=timeout),
+                        print_fn=lambda msg: None)
+        fanout.start()
+        task = asyncio.ensure_future(fanout.run())
+    await asyncio.sleep(args.warmup)  # démarrage des process (spawn + chargement du simulateur)
+    source.start()
+    await asyncio.sleep(duration)
+    if fanout is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        fanout.stop()
+        await sim.jupiter.close_session()
+        await sim.dexscreener_api.dexscreener.close()
+    else:
+        for process in processes:
+            await asyncio.get_event_loop().run_in_executor(None, process.join)
+    ws_server.close()
+    await ws_server.wait_closed()
+    await runner.cleanup()
+
+    trades = 0
+    for workdir in workdirs:
+        try:
+            with open(os.path.join(workdir, "stats.json"), encoding="utf-8") as f:
+                trades += json.load(f)["trade_count"]
+        except (OSError, ValueError, KeyError):
+            pass
+    print(f"--- {mode} ({args.variants} variants, {time.monotonic() - t0:.0f}s) ---")
+    print(f"WebSocket : {feed.connections} connexions, {feed.sent} paires envoyées | "
+          f"API : {api.calls['quote']} quotes, {api.calls['dexscreener']} DexScreener, "
+          f"{len(api.peers)} connexions | {trades} trades simulés")
+    if fanout is not None:
+        received, p50, p99 = transit(workdirs)
+        print(f"transit ingestion -> variant : {received} remises | p50 {max(p50) * 1e3:.2f} ms "
+              f"p99 {max(p99) * 1e3:.2f} ms (pire variant)")
+    return feed.connections, api.calls["quote"], len(api.peers)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--variants", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2, help="paires/s")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    args = parser.parse_args()
+    root = tempfile.mkdtemp(prefix="pybot-fanout-")
+    results = {mode: asyncio.run(run(mode, args, root)) for mode in ("copies", "fanout")}
+    (ws_a, q_a, c_a), (ws_b, q_b, c_b) = results["copies"], results["fanout"]
+    print(f"connexions WebSocket {ws_a} -> {ws_b} | quotes Jupiter {q_a} -> {q_b} | connexions HTTP {c_a} -> {c_b}")
+
+
+if __name__ == "__main__":
+    main()
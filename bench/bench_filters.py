@@ -0,0 +1,128 @@
+"""
+Étage de filtrage avant admission : sources demandées l'une après l'autre (fiche DexScreener
+puis quote d'achat) contre FilterPipeline (sources en parallèle, premier rejet décisif,
+budget de latence), pour plusieurs budgets. Sources simulées sur l'horloge virtuelle de
+pybot.replay : latences log-normales ; la fiche DexScreener n'arrive qu'au tick suivant de
+l'enrichisseur groupé (`--tick`), et une partie des mints n'est pas encore indexée.
+
+Les verdicts "sans donnée" sont comptés à part ; acceptés par défaut (`--on-missing`),
+comme dans la config livrée.
+
+    python bench/bench_filters.py
+    python bench/bench_filters.py --pairs 5000 --budgets 0.5,1.5 --unindexed 0.6 --on-missing reject
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pybot.filters import BuySellRatio, FilterPipeline, MinLiquidity, MinSocials, MinVolume, QuoteDepth  # noqa: E402
+from pybot.replay import ReplayLoop  # noqa: E402
+from pybot.stats import percentile  # noqa: E402
+
+
+def make_filters():
+    return [MinLiquidity(5000), MinVolume(500), BuySellRatio(1.0), MinSocials(1), QuoteDepth(0.05)]
+
+
+class Sources:
+    """Fiche DexScreener et quote d'achat simulées ; mêmes tirages pour les deux modes (graine par mint)."""
+
+    def __init__(self, args):
+        self.args = args
+
+    async def _sleep(self, rng, median_ms):
+        await asyncio.sleep(rng.lognormvariate(math.log(median_ms / 1e3), 0.5))
+
+    async def dexscreener(self, mint, decimals):
+        """Comme DexScreenerEnricher.get() : la mint part au prochain tick commun."""
+        rng = random.Random(f"dex{mint}")
+        now = asyncio.get_event_loop().time()
+        await asyncio.sleep(math.ceil(now / self.args.tick) * self.args.tick - now)
+        await self._sleep(rng, self.args.dex_ms)
+        if rng.random() < self.args.unindexed:
+            return None
+        return {
+            "liquidity_usd": rng.lognormvariate(math.log(6000), 1.0),
+            "volume_m5": rng.lognormvariate(math.log(700), 1.0),
+            "txns_m5_buys": rng.randint(0, 30), "txns_m5_sells": rng.randint(1, 30),
+            "socials": {"twitter": "x"} if rng.random() < 0.6 else {}, "websites": [],
+        }
+
+    async def quote(self, mint, decimals):
+        rng = random.Random(f"quote{mint}")
+        await self._sleep(rng, self.args.quote_ms)
+        return {"out_amount": 1000, "price_impact": rng.lognormvariate(math.log(0.02), 1.0)}
+
+
+async def sequential(sources, mint, decimals):
+    """Ancien enchaînement : chaque source attendue puis vérifiée, dans l'ordre."""
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    filters = make_filters()
+    for name in ("dexscreener", "quote"):
+        data = await getattr(sources, name)(mint, decimals)
+        for f in filters:
+            if f.source == name and data and not f.check(data)[0]:
+                return False, loop.time() - start
+    return True, loop.time() - start
+
+
+async def run(mode, args, budget=None):
+    sources = Sources(args)
+    pipeline = FilterPipeline(make_filters(), {"dexscreener": sources.dexscreener}, budget=budget,
+                              on_missing=args.on_missing, max_inflight=args.pairs)
+    delays, passed, quotes = [], [0], []
+
+    async def one(i):
+        await asyncio.sleep(i / args.rate)
+        mint = f"Mint{i:040d}"
+        if mode == "séquentiel":
+            ok, elapsed = await sequential(sources, mint, 6)
+        else:
+            quote = asyncio.ensure_future(sources.quote(mint, 6))  # la quote préchargée à la détection
+            quotes.append(quote)
+            verdict = await pipeline.evaluate(mint, 6, quote=quote)
+            ok, elapsed = verdict.passed, verdict.elapsed
+        delays.append(elapsed)
+        passed[0] += ok
+
+    await asyncio.gather(*(one(i) for i in range(args.pairs)))
+    await asyncio.gather(*quotes)  # quotes encore en vol après un rejet DexScreener
+    print(f"{mode:<15} {passed[0]}/{args.pairs} acceptées | verdict p50 {percentile(delays, 50) * 1e3:6.1f} ms  "
+          f"p99 {percentile(delays, 99) * 1e3:6.1f} ms  max {max(delays) * 1e3:6.1f} ms")
+    if mode != "séquentiel":
+        print(f"                {pipeline.summary()}")
+    return delays
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=20, help="paires/s")
+    parser.add_argument("--budgets", default="0.5,1.5", help="budgets du pipeline (s), séparés par des virgules")
+    parser.add_argument("--on-missing", default="accept", choices=("accept", "reject"))
+    parser.add_argument("--tick", type=float, default=1.0, help="tick de l'enrichisseur DexScreener")
+    parser.add_argument("--dex-ms", type=float, default=250, help="médiane d'une réponse DexScreener")
+    parser.add_argument("--quote-ms", type=float, default=180, help="médiane d'une quote Jupiter")
+    parser.add_argument("--unindexed", type=float, default=0.4, help="part des mints pas encore indexées")
+    args = parser.parse_args()
+    runs = [("séquentiel", None)] + [(f"pipeline {b}s", float(b)) for b in args.budgets.split(",")]
+    results = {}
+    for mode, budget in runs:
+        loop = ReplayLoop(0.0)
+        asyncio.set_event_loop(loop)
+        try:
+            results[mode] = loop.run_until_complete(run(mode, args, budget))
+        finally:
+            loop.close()
+    for mode, budget in runs[1:]:
+        print(f"verdict p99 : {percentile(results['séquentiel'], 99) * 1e3:.0f} ms -> "
+              f"{percentile(results[mode], 99) * 1e3:.0f} ms (budget {budget * 1e3:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Débit d'ingestion de PairFeed contre le stand-in local, avec coupures de connexion
+régulières pour vérifier la reconnexion automatique. Compare avec l'ancienne boucle
+(sleep(0.1) après chaque message).
+
+    python bench/bench_ingest.py --rate 5000 --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+from pybot.ingest import PairFeed, parse_new_pair, ws_connect  # noqa: E402
+from ws_standin import PairStandIn  # noqa: E402
+
+
+async def legacy_listen(url, queue, seen):
+    # copie de l'ancien listen_pools : un sleep(0.1) par message, pas de reconnexion
+    async with ws_connect(url, {"X-API-KEY": "x"}, ping_interval=None, close_timeout=10) as ws:
+        await ws.send("{}")
+        while True:
+            data = json.loads(await ws.recv())
+            parsed = parse_new_pair(data)
+            if parsed and parsed[0] not in seen:
+                seen.add(parsed[0])
+                await queue.put(parsed)
+            await asyncio.sleep(0.1)
+
+
+async def run_case(name, make_task, standin, seconds):
+    queue = asyncio.Queue()
+    seen = set()
+    async with standin.serve() as server:
+        port = list(server.sockets)[0].getsockname()[1]
+        url = f"ws://127.0.0.1:{port}/"
+        task = asyncio.ensure_future(make_task(url, queue, seen))
+        t0 = time.perf_counter()
+        await asyncio.sleep(seconds)
+        task.cancel()
+        elapsed = time.perf_counter() - t0
+    got = queue.qsize()
+    print(f"{name:<9} {got:7d} paires en {elapsed:.1f}s -> {got / elapsed:8.0f} paires/s "
+          f"(envoyées {standin.sent}, connexions {standin.connections})")
+    return got / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=5000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--drop-every", type=int, default=5000)
+    args = parser.parse_args()
+
+    await run_case("ancien", legacy_listen, PairStandIn(rate=args.rate), args.seconds)
+
+    feed = None
+
+    def make_feed(url, queue, seen):
+        nonlocal feed
+        feed = PairFeed(url, "x", backoff_min=0.05, backoff_max=0.5, print_fn=lambda m: None)
+
+        def on_pair(mint, decimals, received_at):
+            if mint not in seen:
+                seen.add(mint)
+                queue.put_nowait((mint, decimals))
+
+        return feed.run(on_pair)
+
+    rate = await run_case("PairFeed", make_feed, PairStandIn(rate=args.rate, drop_every=args.drop_every), args.seconds)
+    print(f"          métriques : {feed.stats.summary()}")
+    assert feed.stats.reconnects >= 1, "aucune reconnexion observée"
+    assert rate >= 0.8 * args.rate, "débit d'ingestion inférieur à 80% du débit envoyé"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
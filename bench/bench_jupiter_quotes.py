@@ -0,0 +1,73 @@
+"""
+Latence des quotes Jupiter : session neuve par quote (DNS + TCP + TLS à chaque fois)
+contre session partagée keep-alive de jupiter.py.
+
+    python bench/bench_jupiter_quotes.py --runs 50
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+from pybot.stats import percentile  # noqa: E402
+
+spec = importlib.util.spec_from_file_location("jupiter", os.path.join(HERE, "..", "test", "jupiter.py"))
+jupiter = importlib.util.module_from_spec(spec)
+sys.modules["jupiter"] = jupiter
+spec.loader.exec_module(jupiter)
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+
+def report(name, samples):
+    print(
+        f"{name:<7} n={len(samples):<4} "
+        f"p50={percentile(samples, 50) * 1000:7.1f} ms  "
+        f"p99={percentile(samples, 99) * 1000:7.1f} ms"
+    )
+
+
+async def cold_quote(amount):
+    session = jupiter.new_session()
+    try:
+        return await jupiter.get_jupiter_swap_price(SOL_MINT, USDC_MINT, amount, session=session)
+    finally:
+        await session.close()
+
+
+async def pooled_quote(amount):
+    return await jupiter.get_jupiter_swap_price(SOL_MINT, USDC_MINT, amount)
+
+
+async def measure(fn, runs, pause):
+    samples = []
+    for i in range(runs):
+        t0 = time.perf_counter()
+        if await fn(10_000_000 + i):
+            samples.append(time.perf_counter() - t0)
+        await asyncio.sleep(pause)  # reste sous la limite de débit de lite-api
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--pause", type=float, default=0.2)
+    args = parser.parse_args()
+
+    cold = await measure(cold_quote, args.runs, args.pause)
+    await pooled_quote(10_000_000)  # préchauffe le pool
+    pooled = await measure(pooled_quote, args.runs, args.pause)
+    await jupiter.close_session()
+
+    report("cold", cold)
+    report("pooled", pooled)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
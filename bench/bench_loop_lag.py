@@ -0,0 +1,114 @@
+"""
+Retard de l'event loop pendant des swaps, à travers le vrai client SwapWorker (main/swap_client.py)
+et un worker stand-in qui parle le même protocole (bench/swap_worker_stub.py : démarrage
+simulé de STARTUP s, swaps de SWAP_SECONDS s).
+
+- swap() bloquant : résultat attendu sur l'event loop (chemin d'avant swap_async)
+- swap_async : résultat attendu sans bloquer
+- worker mort, relancé dans submit() (ancien comportement : start() sur l'event loop)
+- worker mort, relancé en arrière-plan : la requête échoue tout de suite, les suivantes passent
+
+MAX_CONCURRENT_TRADES trades à la fois, pendant qu'un lecteur WS fictif consomme un
+message toutes les 5 ms.
+
+    python bench/bench_loop_lag.py
+    python bench/bench_loop_lag.py --startup 10 --swap-seconds 0.5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "main"))
+from pybot.loop_lag import LoopLagMonitor  # noqa: E402
+from swap_client import SwapWorker  # noqa: E402
+
+MAX_CONCURRENT_TRADES = 2
+SOL_MINT = "So11111111111111111111111111111111111111112"
+STUB = os.path.join(HERE, "swap_worker_stub.py")
+
+
+def kill(worker: SwapWorker):
+    worker._proc.kill()
+    worker._proc.wait()
+
+
+async def blocking_trade(worker, args, failures):
+    worker.swap(SOL_MINT, "Mint", 150_000_000, dry_run=True, timeout=args.swap_seconds + 30)
+
+
+async def async_trade(worker, args, failures):
+    await worker.swap_async(SOL_MINT, "Mint", 150_000_000, dry_run=True, timeout=args.swap_seconds + 30)
+
+
+async def inline_restart_trade(worker, args, failures):
+    if not worker.alive():
+        worker.start()  # ancien submit() : relance synchrone, ts-node recompile sur l'event loop
+    await async_trade(worker, args, failures)
+
+
+async def retrying_trade(worker, args, failures):
+    while True:
+        try:
+            return await async_trade(worker, args, failures)
+        except RuntimeError:
+            failures[0] += 1  # worker en redémarrage : trade abandonné, on réessaie plus tard
+            await asyncio.sleep(0.25)
+
+
+async def ws_reader(stop: asyncio.Event, counter: list):
+    while not stop.is_set():
+        await asyncio.sleep(0.005)
+        counter[0] += 1
+
+
+async def scenario(worker, trade, args, crash: bool):
+    monitor = LoopLagMonitor(interval=0.01)
+    stop = asyncio.Event()
+    counter, failures = [0], [0]
+    lag_task = asyncio.ensure_future(monitor.run())
+    reader_task = asyncio.ensure_future(ws_reader(stop, counter))
+    await asyncio.sleep(0.1)
+    if crash:
+        kill(worker)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(trade(worker, args, failures) for _ in range(MAX_CONCURRENT_TRADES)))
+    elapsed = time.perf_counter() - t0
+
+    stop.set()
+    await reader_task
+    lag_task.cancel()
+    await asyncio.gather(lag_task, return_exceptions=True)
+    return elapsed, counter[0], failures[0], monitor
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--startup", type=float, default=3.0, help="démarrage du worker (compilation ts-node)")
+    parser.add_argument("--swap-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+    cmd = [sys.executable, STUB, "--startup", str(args.startup), "--swap-seconds", str(args.swap_seconds)]
+    worker = SwapWorker(STUB, cmd=cmd)
+    await asyncio.get_running_loop().run_in_executor(None, worker.start)
+    try:
+        for name, trade, crash in (
+            ("swap() bloquant", blocking_trade, False),
+            ("swap_async", async_trade, False),
+            ("mort, relance inline", inline_restart_trade, True),
+            ("mort, relance en fond", retrying_trade, True),
+        ):
+            elapsed, msgs, failures, monitor = await scenario(worker, trade, args, crash)
+            print(
+                f"{name:<22} {MAX_CONCURRENT_TRADES} trades en {elapsed:5.2f}s | "
+                f"messages WS lus : {msgs:4d} | échecs rapides : {failures:2d} | lag {monitor.summary()}"
+            )
+    finally:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
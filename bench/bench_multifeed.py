@@ -0,0 +1,81 @@
+"""
+Détection des paires avec un seul flux contre MultiFeed (plusieurs flux fusionnés, première
+arrivée gagnante), sur des stand-ins locaux qui diffusent les mêmes paires avec des retards
+différents et des décrochages périodiques. Mesure naissance de la paire -> transmission au
+bot, et le taux de victoire / retard de chaque flux.
+
+    python bench/bench_multifeed.py
+    python bench/bench_multifeed.py --rate 50 --seconds 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+from pybot.ingest import MultiFeed, PairFeed  # noqa: E402
+from pybot.stats import percentile  # noqa: E402
+from ws_standin import LaggedStandIn, PairSource  # noqa: E402
+
+# (nom, retard fixe, jitter moyen, décrochage toutes les N s, pendant N s, décalage)
+PROFILES = [
+    ("eu", 0.020, 0.030, 6.0, 1.5, 0.0),
+    ("us", 0.045, 0.010, 6.0, 1.0, 3.0),
+    ("asia", 0.090, 0.040, 0.0, 0.0, 0.0),
+]
+
+
+async def run_case(name, profiles, rate, seconds):
+    source = PairSource(rate=rate, total=int(rate * seconds))
+    standins = [LaggedStandIn(source, *profile[1:], seed=i) for i, profile in enumerate(profiles)]
+    servers = [await standin.serve() for standin in standins]
+    feeds = [
+        PairFeed(f"ws://127.0.0.1:{list(server.sockets)[0].getsockname()[1]}/", "x", name=profile[0],
+                 backoff_min=0.05, backoff_max=0.5, print_fn=lambda m: None)
+        for profile, server in zip(profiles, servers)
+    ]
+    multi = MultiFeed(feeds, print_fn=lambda m: None)
+    delays = []
+
+    def on_pair(mint, decimals, received_at):
+        delays.append(received_at - source.born_at(PairSource.index(mint)))
+
+    task = asyncio.ensure_future(multi.run(on_pair))
+    while not all(feed.connected for feed in feeds):
+        await asyncio.sleep(0.01)
+    source.start()
+    await asyncio.sleep(seconds + max(p[1] + p[4] for p in profiles) + 0.5)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    for server in servers:
+        server.close()
+        await server.wait_closed()
+
+    print(f"--- {name} ---")
+    print(f"détection  n={len(delays):<5} p50={percentile(delays, 50) * 1e3:7.1f} ms  "
+          f"p99={percentile(delays, 99) * 1e3:7.1f} ms  max={max(delays) * 1e3:7.1f} ms")
+    if len(feeds) > 1:
+        for feed_name, s in multi.stats().items():
+            print(f"  {feed_name:<5} premières {s['win_rate']:5.0%}  retard p50 {s['lag_p50'] * 1e3:6.1f} ms  "
+                  f"p99 {s['lag_p99'] * 1e3:7.1f} ms  ({s['arrivals']} arrivées)")
+    return delays
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=20, help="paires/s")
+    parser.add_argument("--seconds", type=float, default=15)
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+    single = await run_case(f"un flux ({PROFILES[0][0]})", PROFILES[:1], args.rate, args.seconds)
+    multi = await run_case(f"{len(PROFILES)} flux", PROFILES, args.rate, args.seconds)
+    print(f"p99 : {percentile(single, 99) * 1e3:.0f} ms -> {percentile(multi, 99) * 1e3:.0f} ms "
+          f"({time.perf_counter() - t0:.0f}s)")
+    assert len(multi) >= len(single), "paires perdues par la fusion"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
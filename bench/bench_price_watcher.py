@@ -0,0 +1,140 @@
+"""
+Coût du suivi de prix des positions ouvertes : une boucle sleep/quote par position contre
+un seul PriceWatcher, pour 10 / 100 / 1000 positions (quote simulée de 50 ms).
+
+10 % des positions sont proches d'un seuil de sortie (margin 2 %), les autres loin (50 %).
+Le watcher tourne sans priorité (margin non renseignée : tour de rôle par âge) puis avec.
+"refresh" = écart entre deux quotes reçues par une même position (p50 / p99), par groupe :
+c'est l'âge du prix sur lequel une sortie peut se déclencher.
+
+    python bench/bench_price_watcher.py
+    python bench/bench_price_watcher.py --positions 10,100,1000,5000 --seconds 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pybot.loop_lag import LoopLagMonitor  # noqa: E402
+from pybot.price_watcher import PriceWatcher  # noqa: E402
+from pybot.stats import percentile  # noqa: E402
+
+QUOTE_LATENCY = 0.05
+TICK = 1.0
+NEAR_SHARE = 0.1      # part des positions proches d'un seuil
+NEAR_MARGIN = 0.02
+FAR_MARGIN = 0.5
+
+
+def is_near(i: int) -> bool:
+    return i % int(1 / NEAR_SHARE) == 0
+
+
+class FakeQuotes:
+    def __init__(self):
+        self.calls = 0
+        self.inflight = 0
+        self.peak = 0
+
+    async def fetch(self, mint, amount):
+        self.calls += 1
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        try:
+            await asyncio.sleep(QUOTE_LATENCY)
+        finally:
+            self.inflight -= 1
+        return {"in_amount": amount, "out_amount": amount // 2, "fee_amount": 0, "price_per_token": 0.5, "amm": "x"}
+
+
+async def per_position(n, seconds, refresh):
+    quotes = FakeQuotes()
+
+    async def hold(i):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + seconds
+        last = None
+        while loop.time() < deadline:
+            await quotes.fetch(f"Mint{i}", 10 ** 9)
+            now = loop.time()
+            if last is not None:
+                refresh["near" if is_near(i) else "far"].append(now - last)
+            last = now
+            await asyncio.sleep(TICK)
+
+    return quotes, [hold(i) for i in range(n)]
+
+
+async def watcher(n, seconds, refresh, concurrency, margins):
+    quotes = FakeQuotes()
+    w = PriceWatcher(quotes.fetch, tick=TICK, max_concurrency=concurrency, batch_size=max(1, n // 10))
+
+    async def hold(i):
+        position = w.subscribe(f"Mint{i}", 10 ** 9)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + seconds
+        last = None
+        try:
+            while loop.time() < deadline:
+                update = await position.next(timeout=deadline - loop.time())
+                if update is None:
+                    continue
+                if margins:
+                    position.margin = NEAR_MARGIN if is_near(i) else FAR_MARGIN  # posé par wait_exit en vrai
+                if last is not None:
+                    refresh["near" if is_near(i) else "far"].append(update.at - last)
+                last = update.at
+        finally:
+            position.close()
+
+    runner = asyncio.ensure_future(w.run())
+
+    async def holds():
+        await asyncio.gather(*(hold(i) for i in range(n)))
+        runner.cancel()
+
+    return quotes, [holds()]
+
+
+async def measure(make, n, seconds, **kw):
+    refresh = {"near": [], "far": []}
+    quotes, coros = await make(n, seconds, refresh, **kw)
+    lag = LoopLagMonitor(interval=0.01)
+    lag_task = asyncio.ensure_future(lag.run())
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    await asyncio.gather(*coros)
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - t0
+    lag_task.cancel()
+    return {
+        "calls_per_s": quotes.calls / wall,
+        "peak": quotes.peak,
+        "cpu_ms_per_s": cpu / wall * 1e3,
+        "lag_p99_ms": lag.percentile(99) * 1e3,
+        "refresh": {group: (percentile(ages, 50), percentile(ages, 99)) for group, ages in refresh.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--positions", default="10,100,1000")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'positions':>9} | {'mode':<17} | {'quotes/s':>8} | {'pic en vol':>10} | {'CPU ms/s':>8} | "
+          f"{'lag p99':>8} | {'refresh proches p50/p99':>23} | {'refresh loin p50/p99':>20}")
+    for n in [int(x) for x in args.positions.split(",")]:
+        for name, make, kw in (("1 boucle/pos.", per_position, {}),
+                               ("watcher (âge)", watcher, {"concurrency": args.concurrency, "margins": False}),
+                               ("watcher (seuils)", watcher, {"concurrency": args.concurrency, "margins": True})):
+            r = asyncio.run(measure(make, n, args.seconds, **kw))
+            near, far = r["refresh"]["near"], r["refresh"]["far"]
+            print(f"{n:>9} | {name:<17} | {r['calls_per_s']:>8.0f} | {r['peak']:>10} | "
+                  f"{r['cpu_ms_per_s']:>8.1f} | {r['lag_p99_ms']:>6.1f}ms | "
+                  f"{near[0]:>10.2f}s / {near[1]:>5.2f}s  | {far[0]:>8.2f}s / {far[1]:>5.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Délai décision de sortie -> transaction de vente envoyée (signature) : ancien chemin (quote +
+build + sign + send au moment de la décision) contre vente préparée (SellPreparer : tx
+reconstruite pendant les dernières secondes de la détention, seul l'envoi reste à faire ;
+sortie anticipée sur le prix = swap complet avec la quote qui l'a déclenchée).
+
+Par défaut, worker simulé (latences log-normales quote / build / send) sur l'horloge virtuelle
+de pybot.replay. Avec --worker, le vrai swap_worker.ts en --dryRun (signature sans envoi) :
+
+    python bench/bench_sell_path.py
+    python bench/bench_sell_path.py --early 0.5 --build-ms 400
+    cd main && python ../bench/bench_sell_path.py --worker --runs 10
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+from pybot.replay import ReplayLoop  # noqa: E402
+from pybot.sell_prep import SellPreparer  # noqa: E402
+from pybot.stats import percentile  # noqa: E402
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+
+def report(name, samples):
+    if not samples:
+        print(f"{name:<22} n=0")
+        return
+    print(
+        f"{name:<22} n={len(samples):<4} "
+        f"p50={percentile(samples, 50) * 1000:7.1f} ms  "
+        f"p99={percentile(samples, 99) * 1000:7.1f} ms  "
+        f"mean={statistics.mean(samples) * 1000:7.1f} ms"
+    )
+
+
+class SimWorker:
+    """swap_worker.ts simulé : chaque étape dure une latence log-normale autour de sa médiane."""
+
+    def __init__(self, quote_ms, build_ms, send_ms, seed=0):
+        self.rng = random.Random(seed)
+        self.medians = {"quote": quote_ms, "build": build_ms, "send": send_ms}
+        self.calls = {"quote": 0, "build": 0, "send": 0}
+
+    async def _step(self, name):
+        self.calls[name] += 1
+        await asyncio.sleep(self.rng.lognormvariate(math.log(self.medians[name] / 1e3), 0.35))
+
+    async def quote(self):
+        await self._step("quote")
+        return {"outAmount": "1"}
+
+    async def prepare(self, mint, amount, quote=None):
+        if quote is None:
+            quote = await self.quote()
+        await self._step("build")
+        return {"prepared": quote}
+
+    async def swap(self, quote=None):
+        await self.prepare(None, None, quote)
+        await self._step("send")
+
+    async def send_prepared(self, prepared):
+        await self._step("send")
+
+
+async def cancel_all():
+    others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for t in others:
+        t.cancel()
+    await asyncio.gather(*others, return_exceptions=True)
+
+
+async def run(mode, args):
+    loop = asyncio.get_running_loop()
+    worker = SimWorker(args.quote_ms, args.build_ms, args.send_ms, seed=1)
+    preparer = SellPreparer(worker.prepare, lead=args.lead, refresh=args.refresh, max_age=args.max_age)
+    rng = random.Random(0)  # mêmes sorties dans les deux modes
+    samples = {"max_hold": [], "price": []}
+
+    async def trade(i):
+        await asyncio.sleep(i * args.hold / 2)
+        deadline = loop.time() + args.hold
+        early = rng.random() < args.early
+        exit_at = rng.uniform(0.2, 1.0) * args.hold if early else args.hold
+        handle = preparer.arm(deadline, f"Mint{i}", 1) if mode == "prepared" else None
+        trigger = await worker.quote() if early else None  # la quote du price watcher qui déclenche la sortie
+        await asyncio.sleep(max(0.0, deadline - args.hold + exit_at - loop.time()))
+        decided = loop.time()
+        if mode == "prepared":
+            ready = preparer.take(handle)
+            if ready is not None:
+                await worker.send_prepared(ready)
+            else:
+                await worker.swap(quote=trigger)
+        else:
+            await worker.swap()
+        samples["price" if early else "max_hold"].append(loop.time() - decided)
+
+    await asyncio.gather(*(trade(i) for i in range(args.trades)))
+    await cancel_all()
+    return samples, worker.calls, preparer
+
+
+def simulated(args):
+    for mode in ("full", "prepared"):
+        loop = ReplayLoop(0.0)
+        asyncio.set_event_loop(loop)
+        try:
+            samples, calls, preparer = loop.run_until_complete(run(mode, args))
+        finally:
+            loop.close()
+        print(f"--- {mode} ---")
+        report("sortie max_hold", samples["max_hold"])
+        report("sortie sur le prix", samples["price"])
+        report("toutes", samples["max_hold"] + samples["price"])
+        print("appels par trade : " + ", ".join(f"{k} {v / args.trades:.1f}" for k, v in calls.items()))
+        if mode == "prepared":
+            print(f"ventes préparées : {preparer.summary()}")
+
+
+async def real_worker(args):
+    from swap_client import SwapWorker
+    worker = SwapWorker(os.path.join(args.ts_dir, "swap_worker.ts"))
+    worker.start()
+    full, prepared = [], []
+    try:
+        for _ in range(args.runs):
+            t_decide = time.perf_counter()
+            res = await worker.swap_async(SOL_MINT, args.mint, args.amount, dry_run=True)
+            if "signature" in res:
+                full.append(time.perf_counter() - t_decide)
+            ready = await worker.prepare_async(SOL_MINT, args.mint, args.amount, dry_run=True)
+            await asyncio.sleep(args.refresh / 2)  # âge moyen d'une tx préparée à la décision
+            t_decide = time.perf_counter()
+            res = await worker.send_prepared_async(ready["prepared"], max_age=args.max_age)
+            if "signature" in res:
+                prepared.append(time.perf_counter() - t_decide)
+    finally:
+        worker.stop()
+    report("swap complet", full)
+    report("vente préparée", prepared)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=500)
+    parser.add_argument("--hold", type=float, default=30)
+    parser.add_argument("--early", type=float, default=0.3, help="part des sorties anticipées (TP/SL/trailing)")
+    parser.add_argument("--lead", type=float, default=3.0)
+    parser.add_argument("--refresh", type=float, default=1.0)
+    parser.add_argument("--max-age", type=float, default=2.0)
+    parser.add_argument("--quote-ms", type=float, default=180)
+    parser.add_argument("--build-ms", type=float, default=250)
+    parser.add_argument("--send-ms", type=float, default=80)
+    parser.add_argument("--worker", action="store_true", help="vrai swap_worker.ts (dryRun) au lieu du simulé")
+    parser.add_argument("--ts-dir", default=".", help="dossier contenant swap_worker.ts")
+    parser.add_argument("--mint", default=USDC_MINT)
+    parser.add_argument("--amount", type=int, default=10_000_000, help="lamports")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    if args.worker:
+        asyncio.run(real_worker(args))
+    else:
+        simulated(args)
+
+
+if __name__ == "__main__":
+    main()
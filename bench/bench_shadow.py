@@ -0,0 +1,60 @@
+"""
+Coût de la simulation fantôme sur le chemin live : ShadowBook.buy() après la confirmation de
+l'achat et ShadowBook.sell() après celle de la vente, sur des résultats de swap synthétiques
+au format de swap.ts (quote de construction + montants exécutés). Aucune requête : seul le
+calcul local s'ajoute, à comparer à la latence d'un swap.
+
+    python bench/bench_shadow.py
+    python bench/bench_shadow.py --trades 200000 --swap-ms 400
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pybot.executor import ShadowBook, SimExecutor  # noqa: E402
+from pybot.stats import percentile  # noqa: E402
+
+
+def swap_result(rng, in_raw, quote_out, slippage):
+    """Résultat de swap.ts : quote de construction et montant exécuté (slippage réel tiré au hasard)."""
+    return {
+        "quoteInAmountRaw": str(in_raw),
+        "quoteOutAmountRaw": str(quote_out),
+        "inAmountRaw": str(in_raw),
+        "outAmountRaw": str(int(quote_out * (1 - rng.uniform(0, slippage)))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=100000)
+    parser.add_argument("--swap-ms", type=float, default=500, help="latence typique d'un swap live (référence)")
+    parser.add_argument("--slippage", type=float, default=0.03, help="slippage réel max (tiré uniformément)")
+    args = parser.parse_args()
+    rng = random.Random(0)
+    shadow = ShadowBook(SimExecutor(1e9, 0.0025, 0.02, 0.02))
+    per_trade = []
+    for i in range(args.trades):
+        amount_sol, decimals = 0.15, 6
+        buy = swap_result(rng, int(amount_sol * 1e9), rng.randint(10 ** 9, 10 ** 12), args.slippage)
+        tokens = int(buy["outAmountRaw"])
+        sell = swap_result(rng, tokens, int(amount_sol * 1e9 * rng.uniform(0.5, 1.5)), args.slippage)
+        live_pnl = int(sell["outAmountRaw"]) / 1e9 - amount_sol
+        started = time.perf_counter()
+        trade = shadow.buy(f"Mint{i}", decimals, amount_sol, buy)
+        shadow.sell(trade, sell, live_pnl)
+        per_trade.append(time.perf_counter() - started)
+    p50 = percentile(per_trade, 50)
+    p99 = percentile(per_trade, 99)
+    print(f"fantôme par trade : p50 {p50 * 1e6:.1f} µs  p99 {p99 * 1e6:.1f} µs  "
+          f"moyenne {statistics.mean(per_trade) * 1e6:.1f} µs")
+    print(f"part d'un trade live (2 swaps de {args.swap_ms:.0f} ms) : {p99 / (2 * args.swap_ms / 1e3):.6%} au p99")
+    print(f"bilan : {shadow.summary()}")
+
+
+if __name__ == "__main__":
+    main()
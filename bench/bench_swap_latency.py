@@ -0,0 +1,76 @@
+"""
+Benchmark latence détection -> signature : ancien chemin (`npx ts-node swap.ts` par swap)
+contre worker persistant (`swap_worker.ts`).
+
+Par défaut les swaps sont en --dryRun (quote + build + sign, sans envoi) : l'envoi et la
+confirmation on-chain coûtent la même chose dans les deux chemins.
+
+    cd main
+    python ../bench/bench_swap_latency.py --runs 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+from pybot.stats import percentile  # noqa: E402
+from swap_client import SwapWorker, run_swap_cli  # noqa: E402
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+
+def report(name, samples):
+    print(
+        f"{name:<8} n={len(samples):<3} "
+        f"p50={percentile(samples, 50) * 1000:8.1f} ms  "
+        f"p99={percentile(samples, 99) * 1000:8.1f} ms  "
+        f"mean={statistics.mean(samples) * 1000:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ts-dir", default=".", help="dossier contenant swap.ts / swap_worker.ts")
+    parser.add_argument("--mint", default=USDC_MINT)
+    parser.add_argument("--amount", type=int, default=10_000_000, help="lamports")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--live", action="store_true", help="envoyer réellement les transactions")
+    args = parser.parse_args()
+    dry_run = not args.live
+
+    swap_ts = os.path.join(args.ts_dir, "swap.ts")
+    worker_ts = os.path.join(args.ts_dir, "swap_worker.ts")
+
+    spawn = []
+    for i in range(args.runs):
+        t_detect = time.perf_counter()
+        res = run_swap_cli(swap_ts, SOL_MINT, args.mint, args.amount, f"bench_spawn_{i}.json", dry_run=dry_run)
+        if "signature" in res:
+            spawn.append(time.perf_counter() - t_detect)
+
+    worker = SwapWorker(worker_ts)
+    t0 = time.perf_counter()
+    worker.start()
+    print(f"worker start (une seule fois) : {(time.perf_counter() - t0) * 1000:.0f} ms")
+    pooled = []
+    try:
+        for _ in range(args.runs):
+            t_detect = time.perf_counter()
+            res = worker.swap(SOL_MINT, args.mint, args.amount, dry_run=dry_run)
+            if "signature" in res:
+                pooled.append(time.perf_counter() - t_detect)
+    finally:
+        worker.stop()
+
+    if spawn:
+        report("spawn", spawn)
+    if pooled:
+        report("worker", pooled)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Soak de l'état des trades : des semaines de clôtures enchaînées (~14 000 trades/jour à 2 slots
+et 12 s de hold) avec l'ancien état (trois listes de dicts qui grossissent, URL DexScreener et
+trace par trade) contre TradeState (compteurs + ring buffers de records à __slots__). Chaque
+mode tourne dans son propre process ; RSS (/proc/self/statm) et coût du rendu de l'en-tête de
+result.txt relevés à intervalles réguliers.
+
+    python bench/bench_trade_state.py
+    python bench/bench_trade_state.py --trades 1000000 --history 100
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pybot.state import TradeRecord, TradeState  # noqa: E402
+
+TRADES_PER_DAY = 14000
+STAGES = ("ws_recv", "dequeue", "buy_quote_sent", "buy_quote_recv", "hold_end", "sell_quote_sent",
+          "sell_quote_recv")
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, IndexError):
+        return float("nan")
+
+
+def make_trade(rng, i):
+    mint = "".join(rng.choice("123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz") for _ in range(44))
+    pnl = rng.gauss(-0.003, 0.02)
+    outcome = "rug" if rng.random() < 0.02 else ("success" if pnl > 0 else "fail")
+    t0 = i * 6.0
+    trace = {stage: t0 + k * rng.uniform(0.001, 2.0) for k, stage in enumerate(STAGES)}
+    return mint, outcome, pnl, rng.uniform(1e-5, 1e-4), rng.uniform(1e-5, 1e-4), rng.uniform(1e3, 1e4), trace
+
+
+class Lists:
+    """Ancien état : globales + un dict par trade dans la liste de son issue, jamais vidée."""
+
+    def __init__(self, history):
+        self.revenue, self.trades = 0.0, 0
+        self.logs = {"success": [], "fail": [], "rug": []}
+
+    def close(self, mint, outcome, pnl, buy_price, sell_price, amount_token, trace):
+        self.revenue += pnl
+        self.trades += 1
+        self.logs[outcome].append({
+            "time": time.strftime("%H:%M:%S"),
+            "mint": "https://dexscreener.com/solana/" + mint,
+            "pnl": pnl,
+            "buy_price": buy_price,
+            "sell_price": sell_price,
+            "amount_token": amount_token,
+            "exit": "max_hold",
+            "held": 12.0,
+            "trace": trace,
+        })
+
+    def header(self) -> str:
+        log = self.logs["success"] or self.logs["fail"]
+        sign = "+" if self.logs["success"] else "-"
+        return "".join(
+            f"[{t['time']}] {t['mint']} | {sign}{t['pnl']:.4f} SOL | Buy: {t['buy_price']:.8f} | "
+            f"Sell: {t['sell_price']:.8f}\n" for t in log
+        )
+
+
+class State:
+    """Nouvel état : TradeState (la trace et le reste du record partent au journal, sur disque)."""
+
+    def __init__(self, history):
+        self.state = TradeState(history)
+
+    def close(self, mint, outcome, pnl, buy_price, sell_price, amount_token, trace):
+        self.state.open()
+        self.state.close(TradeRecord(time.time(), mint, outcome, pnl, buy_price, sell_price, amount_token,
+                                     "max_hold", 12.0))
+        self.state.release()
+
+    def header(self) -> str:
+        outcome = "success" if self.state.recent["success"] else "fail"
+        return "".join(line + "\n" for line in self.state.detail(outcome))
+
+
+def soak(mode, args, out):
+    rng = random.Random(0)
+    book = {"listes": Lists, "TradeState": State}[mode](args.history)
+    step = max(1, args.trades // args.points)
+    rows = [(0, rss_mb(), 0.0)]
+    for i in range(1, args.trades + 1):
+        book.close(*make_trade(rng, i))
+        if i % step == 0:
+            started = time.perf_counter()
+            book.header()
+            rows.append((i, rss_mb(), time.perf_counter() - started))
+    out.put((mode, rows))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=300000, help="trades clôturés (~3 semaines à 14 000/jour)")
+    parser.add_argument("--history", type=int, default=100, help="TRADE_HISTORY_SIZE")
+    parser.add_argument("--points", type=int, default=6, help="relevés pendant le soak")
+    args = parser.parse_args()
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    results = {}
+    for mode in ("listes", "TradeState"):
+        process = ctx.Process(target=soak, args=(mode, args, out))
+        process.start()
+        name, rows = out.get()
+        process.join()
+        results[name] = rows
+        print(f"--- {name} ---")
+        for trades, rss, render in rows:
+            print(f"  {trades:>9} trades ({trades / TRADES_PER_DAY:5.1f} j) | RSS {rss:7.1f} Mo | "
+                  f"en-tête result.txt {render * 1e3:7.2f} ms")
+    for name, rows in results.items():
+        growth = rows[-1][1] - rows[1][1]
+        print(f"{name:<10} RSS +{growth:.1f} Mo entre {rows[1][0]} et {rows[-1][0]} trades | "
+              f"en-tête {rows[-1][2] * 1e3:.2f} ms en fin de soak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Stand-in de swap_worker.ts pour les benchs : même protocole JSON ligne à ligne sur
+stdin / stdout ("ready" après un démarrage simulé, réponses corrélées par id, cancel), sans
+Node ni RPC. Chaque swap répond après une latence fixe, plusieurs swaps en parallèle.
+
+    python bench/swap_worker_stub.py --startup 3 --swap-seconds 1
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+_write_lock = threading.Lock()
+
+
+def reply(msg: dict):
+    with _write_lock:
+        sys.stdout.write(json.dumps(msg) + "\n")
+        sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--startup", type=float, default=0.0, help="s avant 'ready' (compilation ts-node)")
+    parser.add_argument("--swap-seconds", type=float, default=1.0, help="durée d'un swap / d'une quote")
+    args = parser.parse_args()
+    time.sleep(args.startup)
+    reply({"event": "ready"})
+    cancelled = set()
+
+    def finish(msg):
+        if msg["id"] in cancelled:
+            reply({"id": msg["id"], "ok": False, "error": "cancelled"})
+            return
+        amount = int(msg.get("amount") or 0)
+        reply({"id": msg["id"], "ok": True, "result": {
+            "ok": True, "signature": f"stub{msg['id']}", "inAmount": amount / 1e9, "outAmount": amount / 1e3,
+            "quoteInAmountRaw": str(amount), "quoteOutAmountRaw": str(amount * 1000),
+        }})
+
+    for line in sys.stdin:
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            continue
+        op = msg.get("op")
+        if op == "ping":
+            reply({"id": msg["id"], "ok": True, "result": {"pong": time.time()}})
+        elif op == "cancel":
+            cancelled.add(msg.get("target"))
+            reply({"id": msg["id"], "ok": True, "result": {"cancelled": msg.get("target")}})
+        elif op in ("swap", "quote", "prepare", "send_prepared"):
+            threading.Timer(args.swap_seconds, finish, args=(msg,)).start()
+        else:
+            reply({"id": msg.get("id"), "ok": True, "result": {}})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Stand-in local du WebSocket SolanaStreaming : pousse des messages newPair au format
+`{"params": {"pair": {"baseToken": {"account": ..., "info": {"decimals": ...}}}}}`.
+
+    python bench/ws_standin.py --port 8765 --rate 5000
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+
+import websockets
+
+
+def pair_message(mint: str, decimals: int = 6) -> str:
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "method": "newPairNotification",
+        "params": {
+            "blockTime": time.time(),
+            "pair": {"baseToken": {"account": mint, "info": {"decimals": decimals}}},
+        },
+    })
+
+
+class PairStandIn:
+    """
+    Serveur de paires : `rate` messages/s par connexion, `delay` s de retard ajouté
+    avant chaque envoi (simule une région lente), coupure de la connexion tous les
+    `drop_every` messages (teste la reconnexion). Les mints suivent `mints` si fourni
+    (liste partagée entre plusieurs stand-ins), sinon un compteur.
+    """
+
+    def __init__(self, rate: float = 1000, delay: float = 0.0, drop_every: int = 0, mints=None, total: int = 0):
+        self.rate = rate
+        self.delay = delay
+        self.drop_every = drop_every
+        self.mints = mints
+        self.total = total
+        self.sent = 0
+        self.connections = 0
+        self._counter = itertools.count()
+
+    def _next_mint(self):
+        i = next(self._counter)
+        if self.mints is not None:
+            return self.mints[i] if i < len(self.mints) else None
+        if self.total and i >= self.total:
+            return None
+        return f"Mint{i:040d}"
+
+    async def handler(self, ws, path=None):
+        self.connections += 1
+        await ws.recv()  # newPairSubscribe
+        batch = max(1, int(self.rate / 1000))  # envoi par paquets toutes les ~1 ms
+        sent_here = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                for _ in range(batch):
+                    mint = self._next_mint()
+                    if mint is None:
+                        await asyncio.sleep(3600)
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    await ws.send(pair_message(mint))
+                    self.sent += 1
+                    sent_here += 1
+                    if self.drop_every and sent_here % self.drop_every == 0:
+                        await ws.close()
+                        return
+                # cadence : on attend si on est en avance sur `rate`
+                ahead = sent_here / self.rate - (time.perf_counter() - start)
+                await asyncio.sleep(max(0.0, ahead))
+        except websockets.ConnectionClosed:
+            return
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0):
+        return websockets.serve(self.handler, host, port)
+
+
+class PairSource:
+    """
+    Paires émises à cadence fixe (`rate`/s, `total` au plus), partagées par plusieurs
+    LaggedStandIn : la paire i « naît » à origin + i / rate, la même sur chaque flux.
+    """
+
+    def __init__(self, rate: float = 20, total: int = 1000):
+        self.rate = rate
+        self.total = total
+        self.origin = None
+        self.started = asyncio.Event()
+
+    def start(self):
+        self.origin = time.monotonic()
+        self.started.set()
+
+    def born_at(self, i: int) -> float:
+        return self.origin + i / self.rate
+
+    @staticmethod
+    def mint(i: int) -> str:
+        return f"Mint{i:040d}"
+
+    @staticmethod
+    def index(mint: str) -> int:
+        return int(mint[4:])
+
+
+class LaggedStandIn:
+    """
+    Flux d'une PairSource avec un retard d'acheminement : `lag` s fixes + un jitter
+    exponentiel de moyenne `jitter` s, et un décrochage de `stall_for` s toutes les
+    `stall_every` s (décalé de `stall_phase` s), après lequel les paires retenues partent
+    en rafale. Plusieurs instances = plusieurs régions / fournisseurs du même flux.
+    """
+
+    def __init__(self, source: PairSource, lag: float = 0.0, jitter: float = 0.0, stall_every: float = 0.0,
+                 stall_for: float = 0.0, stall_phase: float = 0.0, seed: int = 0):
+        self.source = source
+        self.lag = lag
+        self.jitter = jitter
+        self.stall_every = stall_every
+        self.stall_for = stall_for
+        self.stall_phase = stall_phase
+        self.rng = random.Random(seed)
+        self.sent = 0
+        self.connections = 0
+
+    def _due(self, i: int) -> float:
+        due = self.source.born_at(i) + self.lag
+        if self.jitter:
+            due += self.rng.expovariate(1 / self.jitter)
+        if self.stall_every and self.stall_for:
+            offset = (due - self.source.origin - self.stall_phase) % self.stall_every
+            if offset < self.stall_for:
+                due += self.stall_for - offset
+        return due
+
+    async def handler(self, ws, path=None):
+        self.connections += 1
+        await ws.recv()  # newPairSubscribe
+        await self.source.started.wait()
+        i = max(0, math.ceil((time.monotonic() - self.source.origin) * self.source.rate))
+        try:
+            while i < self.source.total:
+                await asyncio.sleep(max(0.0, self._due(i) - time.monotonic()))
+                await ws.send(pair_message(self.source.mint(i)))
+                self.sent += 1
+                i += 1
+            await ws.wait_closed()
+        except websockets.ConnectionClosed:
+            return
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0):
+        return websockets.serve(self.handler, host, port)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=1000)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--drop-every", type=int, default=0)
+    args = parser.parse_args()
+    standin = PairStandIn(rate=args.rate, delay=args.delay, drop_every=args.drop_every)
+    async with standin.serve(port=args.port):
+        print(f"stand-in ws://127.0.0.1:{args.port}/ ({args.rate:.0f} msgs/s)")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
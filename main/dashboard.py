@@ -2,8 +2,18 @@ import streamlit as st
 import json
 import os
 import pandas as pd
+import sys
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pybot.control import request_control
+from pybot.dashboard import render_latency
+from pybot.history import TradeHistory
+from swap_index import SwapIndex
+
+CONTROL_URL = "http://127.0.0.1:8765"  # API de contrôle du bot (CONTROL_HOST / CONTROL_PORT de main.py)
+JOURNAL_FILE = "trades.jsonl"          # journal des trades de main.py (traces de latence)
+
 st.set_page_config(page_title="🚀 Bot Dashboard", page_icon="🚀", layout="wide")
 st.title("🚀 Dashboard du Bot")
 
@@ -13,9 +23,12 @@ with st.sidebar:
     auto_refresh = st.checkbox("Auto-refresh", value=True)
     refresh_sec = st.slider("Intervalle (sec)", 1, 10, 2)
 
-    # Contrôle pause/reprise (via control.json)
+    # Contrôle du bot : API locale (réglages à chaud) ; control.json si le bot ne répond pas
     control_file = "control.json"
-    if os.path.exists(control_file):
+    live = request_control("/state", base_url=CONTROL_URL)
+    if live is not None:
+        control = live["control"]
+    elif os.path.exists(control_file):
         with open(control_file, "r") as f:
             control = json.load(f)
     else:
@@ -24,41 +37,52 @@ with st.sidebar:
     running = control.get("running", True)
     if running:
         if st.button("⏸️ Mettre en pause le bot"):
-            control["running"] = False
-            with open(control_file, "w") as f:
-                json.dump(control, f)
+            if request_control("/pause", base_url=CONTROL_URL) is None:
+                control["running"] = False
+                with open(control_file, "w") as f:
+                    json.dump(control, f)
             st.success("Bot mis en pause ✅")
     else:
         if st.button("▶️ Relancer le bot"):
-            control["running"] = True
-            with open(control_file, "w") as f:
-                json.dump(control, f)
+            if request_control("/resume", base_url=CONTROL_URL) is None:
+                control["running"] = True
+                with open(control_file, "w") as f:
+                    json.dump(control, f)
             st.success("Bot relancé ✅")
 
+    if live is None:
+        st.caption("API de contrôle injoignable : pause/reprise via control.json")
+    else:
+        with st.expander("🎛️ Réglages à chaud"):
+            size = st.number_input("Montant par trade (SOL)", min_value=0.001, value=float(control["trade_size_sol"]),
+                                   step=0.01, format="%.3f")
+            hold = st.number_input("Durée max de détention (s)", min_value=1.0, value=float(control["hold_seconds"]),
+                                   step=1.0)
+            slots = st.number_input("Trades simultanés", min_value=1, value=int(control["max_concurrent_trades"]),
+                                    step=1)
+            if st.button("Appliquer"):
+                applied = request_control("/config", {"trade_size_sol": size, "hold_seconds": hold,
+                                                      "max_concurrent_trades": int(slots)}, base_url=CONTROL_URL)
+                if applied is None:
+                    st.error("Réglages refusés ou bot injoignable")
+                else:
+                    st.success("Réglages appliqués ✅")
+
 # --------- Lecture swaps ----------
-def load_swaps(swap_dir="SWAP"):
-    swaps = {}
-    if not os.path.exists(swap_dir):
-        return swaps
-
-    for fname in os.listdir(swap_dir):
-        if not fname.endswith(".json"):
-            continue
-        fpath = os.path.join(swap_dir, fname)
-        try:
-            with open(fpath, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            # clef = mint
-            mint = data.get("inputMint") if "buy" in fname else data.get("outputMint")
-            if mint not in swaps:
-                swaps[mint] = {}
-            if "buy" in fname:
-                swaps[mint]["buy"] = data
-            elif "sell" in fname:
-                swaps[mint]["sell"] = data
-        except Exception as e:
-            st.error(f"Erreur lecture {fname}: {e}")
-    return swaps
+def load_swaps(swap_dir="swap"):
+    """
+    Trades {mint: {"buy": ..., "sell": ...}} depuis l'index persistant swap_manifest.jsonl :
+    seuls les fichiers apparus depuis le dernier refresh sont lus.
+    """
+    index = st.session_state.get("swap_index")
+    if index is None or index.swap_dir != swap_dir:
+        index = SwapIndex(swap_dir)
+        st.session_state["swap_index"] = index
+    try:
+        index.refresh()
+    except Exception as e:
+        st.error(f"Erreur lecture {swap_dir}: {e}")
+    return index.trades
 
 swaps = load_swaps()
 
@@ -149,6 +173,17 @@ if not df_all.empty:
     df_all["equity_usd"] = df_all["equity_sol"] * SOL_PRICE_USD
     st.line_chart(df_all.set_index("time")[["equity_sol", "equity_usd"]])
 
+# --------- Latence par étape ---------
+# traces enregistrées par main.py dans le journal (trades.jsonl), lues de façon incrémentale
+st.markdown("---")
+st.subheader("⏱️ Latence par étape")
+history = st.session_state.get("history")
+if history is None:
+    history = TradeHistory(JOURNAL_FILE)
+    st.session_state["history"] = history
+history.refresh()
+render_latency(history)
+
 # --------- Auto-refresh ----------
 if auto_refresh:
     time.sleep(refresh_sec)
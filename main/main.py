@@ -1,50 +1,131 @@
 import asyncio
+import importlib.util
 import json
-import websockets
 from datetime import datetime
 import time
-import traceback
 import winsound
-import subprocess
+import threading
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pybot.executor import ShadowBook, SimExecutor
+from pybot.exits import ExitRules, wait_exit
+from pybot.loop_lag import LoopLagMonitor
+from pybot.metrics import METRICS
+from pybot.pipeline import Pipeline
+from pybot.prefetch import QuotePrefetcher
+from pybot.price_watcher import PriceWatcher
+from pybot.sell_prep import SellPreparer
+from pybot.state import TradeRecord
+from pybot.trace import TradeTrace
+from swap_client import SwapWorker, run_swap_cli_async, persist_swap_result
 
 
 # ================== CONFIG ==================
 TRADE_HOLD_SECONDS = 30           # durée d'attente avant revente
 TRADE_SIZE_SOL = 0.15               # montant investi par trade (en SOL)
 MAX_CONCURRENT_TRADES = 2         # ✅ limite de trades simultanés
+ADMISSION_QUEUE_SIZE = 256        # paires en attente max (au-delà : la plus ancienne est abandonnée)
+ADMISSION_STALE_SECONDS = 10      # une paire en file depuis plus longtemps est abandonnée
+ADMISSION_MIN_SPACING = 5         # écart min entre deux achats (s), ex-RATE_LIMIT (0 = off)
+ADMISSION_PRIORITY = "age"        # "age" (plus récente d'abord) ou "score"
+BUY_PREFETCH_CONCURRENCY = 4      # quotes d'achat spéculatives simultanées, dès la détection (0 = off)
+BUY_PREFETCH_TTL_SECONDS = 1.5    # âge max d'une quote préchargée au début du trade
+FILTER_BUDGET_SECONDS = 0.5       # budget de l'étage de filtrage avant la file d'admission
+FILTER_ON_MISSING = "accept"      # donnée absente dans le budget (DexScreener indexe 2-15 s après création) : "accept" / "reject"
+FILTER_CONCURRENCY = 32           # évaluations simultanées max (au-delà : admise sans filtrage)
+FILTER_MIN_LIQUIDITY_USD = 5000   # liquidité DexScreener min (0 = off)
+FILTER_MIN_VOLUME_M5_USD = 500    # volume 5 min min (0 = off)
+FILTER_MIN_BUY_SELL_RATIO = 1.0   # achats / ventes sur 5 min min (0 = off)
+FILTER_MIN_SOCIALS = 1            # réseaux sociaux + sites min (0 = off)
+FILTER_MAX_PRICE_IMPACT = 0.05    # impact de prix max de la quote d'achat préchargée (0 = off)
+CONTROL_FILE = "control.json"     # pause/reprise + réglages à chaud, surveillé (inotify)
+CONTROL_HOST = "127.0.0.1"        # API de contrôle locale (GET /state, POST /pause, /resume, /config)
+CONTROL_PORT = 8765              # 0 = API désactivée
 API_KEY = "Your_SolanaStreaming_API_Key"  # mettre votre clé API SolanaStreaming ici
 SOLANA_STREAM_WS = "wss://api.solanastreaming.com/"  # remplace si nécessaire
+PAIR_FEEDS = [                    # flux de paires tenus en parallèle : (nom, url, clé API), première arrivée gagnante
+    ("solanastreaming", SOLANA_STREAM_WS, API_KEY),
+]
+FEED_DEDUP_WINDOW = 120           # s pendant lesquels un mint reçu est reconnu sur les autres flux
+WS_PING_INTERVAL = 20             # keepalive WebSocket (s)
+INGEST_REPORT_SECONDS = 60        # fréquence du log des métriques d'ingestion (0 = off)
+SEEN_MINTS_CAPACITY = 1_000_000   # mints mémorisés par génération (mémoire fixe, ~4 Mo)
+SEEN_MINTS_FP_RATE = 0.001        # probabilité d'ignorer à tort un nouveau mint
+SEEN_MINTS_MAX_AGE = 7 * 24 * 3600  # rotation au moins une fois par semaine
+SEEN_MINTS_FILE = "seen_mints.bin"  # persistance : un redémarrage ne rachète pas les mêmes tokens
+SWAP_TS_PATH = "C:/Users/soonb/Desktop/Pybot/jup-swap/swap.ts"              # CLI (fallback)
+SWAP_WORKER_TS_PATH = "C:/Users/soonb/Desktop/Pybot/jup-swap/swap_worker.ts"  # worker persistant
+USE_SWAP_WORKER = True            # False = ancien chemin `npx ts-node swap.ts` par swap
+SWAP_SLIPPAGE_BPS = 100           # 1 %
+SWAP_PRIORITY_LAMPORTS = 100000   # 0.0001 SOL
+SWAP_TIMEOUT_SECONDS = 60         # abandon d'un swap qui ne revient pas
+LOOP_LAG_REPORT_SECONDS = 60      # fréquence du log de latence de l'event loop (0 = off)
+PRICE_WATCH_TICK_SECONDS = 1.0    # fréquence des quotes de sortie des positions ouvertes (via le worker)
+PRICE_WATCH_CONCURRENCY = 8       # requêtes de prix simultanées max
+PRICE_WATCH_BATCH = 10            # positions par paquet (paquets étalés sur le tick)
+PRICE_WATCH_JITTER = 0.1          # ±10 % sur le tick
+EXIT_TAKE_PROFIT = 0.30           # vente dès +30 % (0 = off)
+EXIT_STOP_LOSS = 0.20             # vente dès -20 % (0 = off)
+EXIT_TRAILING_STOP = 0.20         # vente si -20 % sous le plus haut... (0 = off, cf. bench_exits --grid)
+EXIT_TRAILING_ARM = 0.10          # ...une fois +10 % atteint
+EXIT_LIQUIDITY_MISSES = 2         # quotes sans route consécutives = liquidité disparue
+SELL_PREPARE_LEAD_SECONDS = 3     # tx de vente préparée (quote + build + sign) 3 s avant l'échéance (0 = off)
+SELL_PREPARE_REFRESH_SECONDS = 1  # puis reconstruite toutes les secondes jusqu'à la sortie
+SELL_PREPARED_MAX_AGE = 2.0       # âge max d'une tx préparée à l'envoi, sinon swap complet
+SHADOW_SIM = True                 # simulation fantôme : chaque trade live aussi comptabilisé par le modèle du simulateur
+SHADOW_BALANCE_SOL = 1.38         # solde fictif de la simulation fantôme
+SHADOW_FEE_RATE = 0.0025          # hypothèses du simulateur (FEE_RATE, SLIPPAGE_RATE_BUY/SELL, TAX_RATE de test/test.py)
+SHADOW_SLIPPAGE_BUY = 0.02
+SHADOW_SLIPPAGE_SELL = 0.02
+SHADOW_TAX_RATE = 0.0
+JOURNAL_FILE = "trades.jsonl"     # journal append-only des trades (historique)
+STATS_FILE = "stats.json"         # snapshot des compteurs (sans historique)
+TRADE_HISTORY_SIZE = 100          # derniers trades gardés en mémoire par issue (le reste : JOURNAL_FILE)
+CONFIG = {name: value for name, value in globals().items() if name.isupper()}
+
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
 
 
 # ================== STATE ==================
-seen_tokens = set()
-trade_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TRADES)
-
-def is_running():
-    try:
-        with open("control.json", "r") as f:
-            data = json.load(f)
-            return data.get("running", True)
-    except Exception:
-        return True
-
-def save_stats():
-    global initial_balance, portfolio_balance, revenue_total, trade_count, successful_trades, nosuccessful_trades, rugged_count, pending_trades, successful_trades_log, nosuccessful_trades_log, rugpull_trades_log
-    stats = {
-        "initial_balance": initial_balance,
-        "portfolio_balance": portfolio_balance,
-        "revenue_total": revenue_total,
-        "trade_count": trade_count,
-        "successful_trades": successful_trades,
-        "nosuccessful_trades": nosuccessful_trades,
-        "rugged_count": rugged_count,
-        "pending_trades": pending_trades,
-        "successful_trades_log": successful_trades_log,
-        "nosuccessful_trades_log": nosuccessful_trades_log,
-        "rugpull_trades_log": rugpull_trades_log
-    }
-    with open("stats.json", "w") as f:
-        json.dump(stats, f, indent=2)
+swap_worker = SwapWorker(SWAP_WORKER_TS_PATH) if USE_SWAP_WORKER else None
+loop_lag = LoopLagMonitor()
+# une seule tâche surveille le prix de toutes les positions ouvertes (quotes via le worker, absent en mode CLI)
+price_watcher = PriceWatcher(lambda mint, amount: fetch_sell_quote(mint, amount), tick=PRICE_WATCH_TICK_SECONDS,
+                             max_concurrency=PRICE_WATCH_CONCURRENCY, batch_size=PRICE_WATCH_BATCH,
+                             jitter=PRICE_WATCH_JITTER) if swap_worker is not None else None
+# quote d'achat demandée dès la détection (via le worker), passée telle quelle au swap si encore fraîche
+quote_prefetcher = QuotePrefetcher(
+    lambda input_mint, output_mint, amount: swap_worker.quote_async(input_mint, output_mint, amount,
+                                                                     slippage_bps=SWAP_SLIPPAGE_BPS),
+    max_inflight=BUY_PREFETCH_CONCURRENCY, ttl=BUY_PREFETCH_TTL_SECONDS) if swap_worker is not None else None
+# vente préparée avant l'échéance de détention : à la sortie, il ne reste qu'à l'envoyer
+sell_preparer = SellPreparer(
+    lambda mint, amount: swap_worker.prepare_async(mint, SOL_MINT, amount, slippage_bps=SWAP_SLIPPAGE_BPS,
+                                                   priority_lamports=SWAP_PRIORITY_LAMPORTS),
+    lead=SELL_PREPARE_LEAD_SECONDS, refresh=SELL_PREPARE_REFRESH_SECONDS, max_age=SELL_PREPARED_MAX_AGE,
+    discard=lambda prepared: swap_worker.discard(prepared["prepared"])) if swap_worker is not None else None
+# DexScreener groupé (fiches des nouvelles paires pour le filtrage), partagé avec le simulateur
+spec = importlib.util.spec_from_file_location(
+    "fetch_dexscreener",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test", "other_func", "fetch_dexscreener.py"))
+dexscreener_api = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(dexscreener_api)
+# fills simulés sur les quotes des swaps live : aucune requête en plus, rien d'attendu sur le chemin live
+shadow = ShadowBook(SimExecutor(SHADOW_BALANCE_SOL, SHADOW_FEE_RATE, SHADOW_SLIPPAGE_BUY, SHADOW_SLIPPAGE_SELL,
+                                SHADOW_TAX_RATE)) if SHADOW_SIM else None
+
+# ================== MÉTRIQUES ==================
+# GET /metrics de l'API de contrôle ; métriques communes (file, filtrage, erreurs...) : pybot.pipeline
+quote_latency = METRICS.histogram("quote_seconds", "Quote de sortie via le worker")
+swap_latency = METRICS.histogram("swap_seconds", "Swap envoyé -> résultat du worker", ["side"])
+sell_latency = METRICS.histogram("sell_seconds", "Décision de sortie -> vente exécutée")
+rugs = METRICS.counter("rugs_total", "Sorties sur liquidité disparue (rug)")
+METRICS.gauge("revenue_sol", "PnL cumulé (SOL)").set_function(lambda: pipeline.state.revenue)
+METRICS.gauge("shadow_revenue_sol", "PnL cumulé de la simulation fantôme (SOL)").set_function(
+    lambda: shadow.executor.revenue if shadow is not None else 0.0)
 
 # ================== LOGGING ==================
 
@@ -53,37 +134,39 @@ def print_runtime(msg: str):
 
 # ================== TRADE SIMULATION ==================
 
-import subprocess
-import json
-
-def swap_token(input_mint: str, output_mint: str, amount_raw: int, out_file: str) -> dict:
+async def swap_token(input_mint: str, output_mint: str, amount_raw: int, out_file: str,
+                     timeout: float = SWAP_TIMEOUT_SECONDS, quote: dict = None) -> dict:
     """
-    Lance le swap TS:
-      npx ts-node swap.ts --inputMint ... --outputMint ... --amount ... --slippageBps 200 --priorityLamports 100000 --outFile out_file
-    Retourne le dict JSON lu depuis out_file.
+    Exécute un swap via le worker TS persistant (ou `npx ts-node swap.ts` si USE_SWAP_WORKER=False)
+    sans bloquer l'event loop. Lève asyncio.TimeoutError après `timeout` secondes ; un timeout
+    ou une annulation demande au worker d'abandonner le swap s'il n'est pas encore envoyé.
+    Le résultat revient par le canal du worker ; swap/<out_file> n'est écrit qu'ensuite,
+    en arrière-plan, pour l'historique du dashboard. `quote` (quote brute du worker, ex.
+    préchargée) évite au worker de re-quoter ; ignorée par le chemin CLI.
     """
-    cmd = [
-        "npx", "ts-node", "C:/Users/soonb/Desktop/Pybot/jup-swap/swap.ts",
-        "--inputMint", input_mint,
-        "--outputMint", output_mint,
-        "--amount", str(amount_raw),
-        "--slippageBps", "100",        # 2 %
-        "--priorityLamports", "100000",# 0.0001 SOL
-        "--out", out_file,
-    ]
-
-    print_runtime(f"[DEBUG] Running swap CLI command: {' '.join(cmd)}")
-
-    subprocess.run(cmd, text=True, shell=True)
+    print_runtime(f"[DEBUG] Swap {input_mint} -> {output_mint} amount={amount_raw} ({out_file})")
 
-    # Lire le fichier JSON de sortie
+    loop = asyncio.get_running_loop()
+    started = loop.time()
     try:
-        with open(out_file, "r", encoding="utf-8") as f:
-            raw_data = f.read()
-        print_runtime(f"[DEBUG] Raw JSON content from {out_file}:\n{raw_data}")
-        data = json.loads(raw_data)
-    except Exception as e:
-        raise RuntimeError(f"[ERROR] Failed to read/parse {out_file}: {e}")
+        if swap_worker is not None:
+            data = await swap_worker.swap_async(
+                input_mint, output_mint, amount_raw,
+                slippage_bps=SWAP_SLIPPAGE_BPS,
+                priority_lamports=SWAP_PRIORITY_LAMPORTS,
+                timeout=timeout,
+                quote=quote,
+            )
+            threading.Thread(target=persist_swap_result, args=(data, out_file), daemon=True).start()
+        else:
+            data = await run_swap_cli_async(
+                SWAP_TS_PATH, input_mint, output_mint, amount_raw, out_file,
+                slippage_bps=SWAP_SLIPPAGE_BPS,
+                priority_lamports=SWAP_PRIORITY_LAMPORTS,
+                timeout=timeout,
+            )
+    finally:
+        swap_latency.labels("buy" if input_mint == SOL_MINT else "sell").observe(loop.time() - started)
 
     if not data.get("ok") and "signature" not in data:
         raise RuntimeError(f"[ERROR] swap.ts did not produce a valid JSON: {data}")
@@ -92,141 +175,244 @@ def swap_token(input_mint: str, output_mint: str, amount_raw: int, out_file: str
     return data
 
 
+async def fetch_sell_quote(mint: str, amount_raw: int):
+    """Quote de sortie token -> SOL via le worker (même API Jupiter que swap.ts), au format de jupiter.py."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        raw = await swap_worker.quote_async(mint, SOL_MINT, amount_raw, slippage_bps=SWAP_SLIPPAGE_BPS)
+    finally:
+        quote_latency.observe(loop.time() - started)
+    if not raw or not raw.get("routePlan"):
+        return None
+    in_amount, out_amount = int(raw["inAmount"]), int(raw["outAmount"])
+    route = raw["routePlan"][0].get("swapInfo", {})
+    return {
+        "in_amount": in_amount,
+        "out_amount": out_amount,
+        "fee_amount": int(route.get("feeAmount") or 0),
+        "price_per_token": out_amount / in_amount if in_amount else 0,
+        "amm": route.get("label"),
+        "raw": raw,  # réponse brute : réutilisable telle quelle par le swap de sortie
+    }
 
-async def trade(mint, decimals, buy_amount_sol=TRADE_SIZE_SOL, hold_seconds=TRADE_HOLD_SECONDS):
-    global portfolio_balance, revenue_total, trade_count, rugged_count, successful_trades, pending_trades
-    global successful_trades_log, nosuccessful_trades, nosuccessful_trades_log, rugpull_trades_log
-    print_runtime(f"\n🚀 Simulation de trade sur {mint} (decimals={decimals}) avec {buy_amount_sol} SOL...")
-    # 🚦 Attendre qu'il y ait un slot dispo
-    while pending_trades >= MAX_CONCURRENT_TRADES:
-        print_runtime(f"⏸️ Trop de trades actifs ({pending_trades}/{MAX_CONCURRENT_TRADES}), attente...")
-        await asyncio.sleep(1)
 
-    async with trade_semaphore:
-        print(f"\n🤖 [SIMU] Achat fictif de {buy_amount_sol} SOL sur {mint} (decimals={decimals})...")
+async def sell_token(mint: str, amount_raw: int, out_file: str, prepared=None, exit_decision=None) -> dict:
+    """
+    Vente à la décision de sortie : la tx préparée pendant la détention si elle est encore
+    fraîche (envoi seul), sinon le swap complet, avec la quote qui a déclenché la sortie si
+    elle vient d'arriver (pas de re-quote).
+    """
+    ready = sell_preparer.take(prepared) if sell_preparer is not None else None
+    if ready is not None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
         try:
-            winsound.Beep(800, 200)
-        except Exception:
-            pass
+            data = await swap_worker.send_prepared_async(ready["prepared"], max_age=SELL_PREPARED_MAX_AGE,
+                                                         timeout=SWAP_TIMEOUT_SECONDS)
+        except RuntimeError as e:
+            if "Prepared swap" not in str(e):
+                raise
+            print_runtime(f"   ⚠️ Vente préparée inutilisable ({e}), swap complet")
+        else:
+            swap_latency.labels("sell").observe(loop.time() - started)
+            threading.Thread(target=persist_swap_result, args=(data, out_file), daemon=True).start()
+            print_runtime(f"[DEBUG] Vente préparée envoyée ({data.get('preparedAgeMs')} ms) : {data.get('signature')}")
+            return data
+    quote = None
+    update = exit_decision.update if exit_decision is not None else None
+    if update is not None and update.quote and asyncio.get_running_loop().time() - update.at <= SELL_PREPARED_MAX_AGE:
+        quote = update.quote.get("raw")
+    return await swap_token(mint, SOL_MINT, amount_raw, out_file, quote=quote)
+
+
+async def hold_position(mint: str, amount_token_raw: int, entry_lamports: int, hold_seconds: float):
+    """
+    Attend la sortie de la position : take-profit / stop-loss / trailing stop / liquidité disparue
+    sur le flux du price watcher, au plus tard après `hold_seconds`. Renvoie l'ExitDecision
+    (None sans price watcher : simple attente de hold_seconds).
+    """
+    if price_watcher is None:
+        await asyncio.sleep(hold_seconds)
+        return None
+    position = price_watcher.subscribe(mint, amount_token_raw)
+    rules = ExitRules(hold_seconds, EXIT_TAKE_PROFIT, EXIT_STOP_LOSS, EXIT_TRAILING_STOP,
+                      EXIT_TRAILING_ARM, EXIT_LIQUIDITY_MISSES)
+    try:
+        decision = await wait_exit(position, entry_lamports, rules)
+    finally:
+        position.close()
+    print_runtime(f"   ➤ Sortie {mint} : {decision.describe()}")
+    return decision
 
-        SOL_MINT = "So11111111111111111111111111111111111111112"
-        USD_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
-        try:
-            amount_in = int(buy_amount_sol * 1e9)  # lamports (input = SOL)
-            out_path = f"swap_buy_{mint}.json"
 
-            # 🟢 Swap réel SOL -> token (output = mint)
-            buy_swap = swap_token(SOL_MINT, mint, amount_in, out_path)
+async def trade(mint, decimals, buy_amount_sol=TRADE_SIZE_SOL, hold_seconds=TRADE_HOLD_SECONDS, trace=None,
+                prefetch=None):
+    print_runtime(f"\n🚀 Simulation de trade sur {mint} (decimals={decimals}) avec {buy_amount_sol} SOL...")
+    pipeline.state.open()
+    pipeline.save_stats()
+    try:
+        await _run_trade(mint, decimals, buy_amount_sol, hold_seconds, trace or TradeTrace(), prefetch)
+    finally:
+        pipeline.state.release()
+        pipeline.save_stats()
 
-        except Exception as e:
-            print(f"   ⚠️ Erreur swap TS buy: {e}")
-            pending_trades -= 1
-            return
-        print("wait_seconds")
-        await asyncio.sleep(hold_seconds)
 
-        # -------- VENTE (réelle) --------
-        try:
-            # montant de tokens à vendre en unités de base
-            amount_token = buy_swap.get("outAmount", 0)
-            amount_token_raw = int(amount_token * 10**decimals)
-            print(amount_token_raw)
-            out_path_sell = f"swap_sell_{mint}.json"
-
-            # 🔄 Swap réel : token -> SOL
-            swap_token(mint, SOL_MINT, amount_token_raw, out_path_sell)
-
-        except Exception as e:
-            print(f"   ⚠️ Erreur swap TS sell: {e}")
-            return
-        
-# ================== WEBSOCKET LISTENER ==================
-async def listen_pools(token_queue: asyncio.Queue):
+def mark_swap(trace: TradeTrace, side: str, sent_at: float, result: dict):
+    """
+    Étapes d'un swap dans la trace : requête envoyée au worker, quote reçue et tx envoyée
+    (stagesMs mesurés par le worker depuis la réception de la requête), résultat confirmé.
+    """
+    stages = result.get("stagesMs") or {}
+    trace.mark(f"{side}_quote_sent", sent_at)
+    if "quote" in stages:
+        trace.mark(f"{side}_quote_recv", sent_at + stages["quote"] / 1e3)
+    if "send" in stages:
+        trace.mark(f"{side}_swap_sent", sent_at + stages["send"] / 1e3)
+    trace.mark(f"{side}_swap_confirmed")
+
+
+async def _run_trade(mint, decimals, buy_amount_sol, hold_seconds, trace, prefetch=None):
+    print(f"\n🤖 [SIMU] Achat fictif de {buy_amount_sol} SOL sur {mint} (decimals={decimals})...")
     try:
-        async with websockets.connect(
-            SOLANA_STREAM_WS,
-            ping_interval=None,
-            close_timeout=10,
-            extra_headers={"X-API-KEY": API_KEY}
-        ) as ws:
-            await ws.send(json.dumps({
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "newPairSubscribe",
-                "params": {
-                    "include_pumpfun": False
-                }
-            }))
-            print_runtime("📡 Listening SolanaStreaming new pairs...")
-
-            while True:
-                try:
-                    msg = await ws.recv()
-                    data = json.loads(msg)
-                    #print_runtime(f"[DEBUG] WS message: {data}")
-
-                    pair = data.get("params", {}).get("pair", {})
-                    if not pair:
-                        continue
-
-                    base = pair.get("baseToken", {})
-                    mint = base.get("account")
-                    decimals = base.get("info", {}).get("decimals", 9)  # fallback 9
-
-                    if mint and mint not in seen_tokens:
-                        seen_tokens.add(mint)
-                        await token_queue.put((mint, decimals))
-                    await asyncio.sleep(0.1)  # 🧘 petit délai pour éviter de spammer la boucle
-                except Exception as e:
-                    print_runtime(f"⚠️ Inner WS error: {e}")
-                    continue  # 🔑 rester dans la boucle
+        winsound.Beep(800, 200)
+    except Exception:
+        pass
 
+    try:
+        amount_in = int(buy_amount_sol * 1e9)  # lamports (input = SOL)
+        out_path = f"swap_buy_{mint}.json"
+
+        # 🟢 Swap réel SOL -> token (output = mint)
+        buy_sent = time.monotonic()
+        # quote préchargée à la détection si encore fraîche, sinon le worker quote lui-même
+        quote = None
+        if quote_prefetcher is not None:
+            quote = await quote_prefetcher.take(prefetch, SOL_MINT, mint, amount_in, fetch_on_miss=False)
+        buy_swap = await swap_token(SOL_MINT, mint, amount_in, out_path, quote=quote)
+
+    except asyncio.TimeoutError:
+        pipeline.errors.labels("buy_timeout").inc()
+        print(f"   ⚠️ Swap TS buy: timeout ({SWAP_TIMEOUT_SECONDS}s), achat abandonné")
+        return
     except Exception as e:
-        print_runtime(f"⚠️ Outer WS error: {e} — retrying in 5s")
-        await asyncio.sleep(5)
-
-
-async def process_tokens(token_queue: asyncio.Queue):
-    last_trade_time = 0
-    RATE_LIMIT = 5  # secondes entre chaque trade
-    while True:
-        if not is_running():
-            print_runtime("⏸️ Bot en pause (pas de nouveaux tokens)")
-            await asyncio.sleep(2)
-            continue
-        try:
-            try:
-                now = time.time()
-                if now - last_trade_time < RATE_LIMIT:
-                    # trop tôt → on remet le token en file et attend un peu
-                    await asyncio.sleep(1)
-                    continue
-                mint, decimals = await asyncio.wait_for(token_queue.get(), timeout=5.0)
-            except asyncio.TimeoutError:
-                await asyncio.sleep(0)
-                continue
-
-            print_runtime(f"\n🔍 Nouveau token détecté : {mint}")
-            await asyncio.sleep(0.3)
-
-            print_runtime(f"✅ Nouveau token retenu: https://dexscreener.com/solana/{mint}")
-            asyncio.create_task(trade(mint, decimals))
-
-            last_trade_time = time.time()  # mise à jour du timestamp
-
-        except asyncio.CancelledError:
+        pipeline.errors.labels("buy").inc()
+        print(f"   ⚠️ Erreur swap TS buy: {e}")
+        return
+    mark_swap(trace, "buy", buy_sent, buy_swap)
+    # achat fantôme sur la quote du swap live (calcul local)
+    shadow_trade = shadow.buy(mint, decimals, buy_amount_sol, buy_swap) if shadow is not None else None
+    pipeline.journal.append("buy", {
+        "mint": mint,
+        "signature": buy_swap.get("signature"),
+        "in_sol": buy_swap.get("inAmount"),
+        "amount_token": buy_swap.get("outAmount"),
+        "buy_price": buy_swap.get("priceExecSolPerToken"),
+    })
+    # montant de tokens à vendre en unités de base
+    amount_token = buy_swap.get("outAmount", 0)
+    amount_token_raw = int(amount_token * 10**decimals)
+    prepared = None
+    if sell_preparer is not None:
+        prepared = sell_preparer.arm(asyncio.get_running_loop().time() + hold_seconds, mint, amount_token_raw)
+    try:
+        exit_decision = await hold_position(mint, amount_token_raw, amount_in, hold_seconds)
+    except BaseException:
+        if sell_preparer is not None:
+            sell_preparer.close(prepared)
+        if shadow is not None:
+            shadow.cancel(shadow_trade)
+        raise
+    trace.mark("hold_end")
+    if exit_decision is not None and exit_decision.reason == "liquidity":
+        rugs.inc()
+    sell_started = asyncio.get_running_loop().time()
+
+    # -------- VENTE (réelle) --------
+    try:
+        out_path_sell = f"swap_sell_{mint}.json"
+
+        # 🔄 Swap réel : token -> SOL
+        sell_sent = time.monotonic()
+        sell_swap = await sell_token(mint, amount_token_raw, out_path_sell, prepared, exit_decision)
+
+    except asyncio.TimeoutError:
+        pipeline.errors.labels("sell_timeout").inc()
+        print(f"   ⚠️ Swap TS sell: timeout ({SWAP_TIMEOUT_SECONDS}s), tokens toujours en portefeuille")
+        if shadow is not None:
+            shadow.cancel(shadow_trade)
+        return
+    except BaseException as e:
+        # pas de clôture live : l'achat fantôme est annulé pour ne pas fausser le solde simulé
+        if shadow is not None:
+            shadow.cancel(shadow_trade)
+        if not isinstance(e, Exception):
             raise
-        except Exception as e:
-            print_runtime(f"⚠️ Erreur process_tokens: {e}\n{traceback.format_exc()}")
-            await asyncio.sleep(1)
+        pipeline.errors.labels("sell").inc()
+        print(f"   ⚠️ Erreur swap TS sell: {e}")
+        return
+    sell_latency.observe(asyncio.get_running_loop().time() - sell_started)
+    mark_swap(trace, "sell", sell_sent, sell_swap)
+
+    record_close(mint, buy_swap, sell_swap, exit_decision, trace, shadow_trade)
+
+
+def record_close(mint: str, buy_swap: dict, sell_swap: dict, exit_decision=None, trace=None, shadow_trade=None):
+    """
+    Met à jour les compteurs et journalise le trade clôturé (PnL = SOL reçus - SOL dépensés),
+    avec son pendant fantôme (fills simulés sur les mêmes quotes) si la simulation fantôme est active.
+    """
+    buy_sol = float(buy_swap.get("inAmount") or 0)
+    sell_sol = float(sell_swap.get("outAmount") or 0)
+    pnl = sell_sol - buy_sol
+    outcome = "success" if pnl > 0 else "fail"
+    pipeline.state.close(TradeRecord(time.time(), mint, outcome, pnl, buy_swap.get("priceExecSolPerToken"),
+                                     sell_swap.get("priceExecSolPerToken"), buy_swap.get("outAmount"),
+                                     exit_decision.reason if exit_decision is not None else "max_hold",
+                                     round(exit_decision.held, 2) if exit_decision is not None else None))
+    shadow_record = shadow.sell(shadow_trade, sell_swap, pnl) if shadow_trade is not None else None
+    if shadow_record is not None:
+        print_runtime(f"👥 Fantôme {mint} : PnL live {pnl:+.4f} SOL, simulé {shadow_record['sim_pnl']:+.4f} SOL")
+    pipeline.journal.append("close", {
+        "outcome": outcome,
+        "time": datetime.now().strftime("%H:%M:%S"),
+        "mint": mint,
+        "pnl": pnl,
+        "buy_price": buy_swap.get("priceExecSolPerToken"),
+        "sell_price": sell_swap.get("priceExecSolPerToken"),
+        "amount_token": buy_swap.get("outAmount"),
+        "buy_signature": buy_swap.get("signature"),
+        "sell_signature": sell_swap.get("signature"),
+        "exit": exit_decision.reason if exit_decision is not None else "max_hold",
+        "held": round(exit_decision.held, 2) if exit_decision is not None else None,
+        "trace": trace.as_dict() if trace is not None else None,
+        "shadow": shadow_record,
+    })
+    pipeline.save_stats()
+
+# ================== PIPELINE ==================
+# flux, filtrage, admission, contrôle et journal communs avec test/test.py ; trades : trade()
+pipeline = Pipeline(
+    CONFIG, trade, lambda mint, timeout: dexscreener_api.dexscreener.get(mint, timeout=timeout),
+    quote_prefetcher=quote_prefetcher, sell_preparer=sell_preparer, price_watcher=price_watcher,
+    extra_state=lambda: {"shadow": shadow.stats() if shadow is not None else None},
+    extra_report=lambda: f"👥 Fantôme : {shadow.summary()}" if shadow is not None and shadow.trades else None,
+    print_fn=print_runtime)
 
 # ================== MAIN ==================
 async def main():
-    token_queue = asyncio.LifoQueue()
-    await asyncio.gather(
-        listen_pools(token_queue),
-        process_tokens(token_queue),
-    )
+    pipeline.start()
+    if swap_worker is not None:
+        print_runtime("⚙️ Démarrage du worker de swap...")
+        # compilation ts-node (jusqu'à start_timeout) hors event loop
+        await asyncio.get_running_loop().run_in_executor(None, swap_worker.start)
+        print_runtime("✅ Worker de swap prêt")
+    try:
+        await pipeline.run(loop_lag.run(report_every=LOOP_LAG_REPORT_SECONDS, report=print_runtime))
+    finally:
+        await dexscreener_api.dexscreener.close()
+        if swap_worker is not None:
+            swap_worker.stop()
 
 if __name__ == "__main__":
     try:
@@ -4,19 +4,36 @@ import { Connection, Keypair, VersionedTransaction } from "@solana/web3.js";
 import base58 from "bs58";
 import dotenv from "dotenv";
 import fs from "fs";
+import https from "https";
 import path from "path";
 
 dotenv.config();
 
-type Args = {
+// Agent keep-alive partagé : le worker réutilise les connexions TLS vers Jupiter
+export const httpAgent = new https.Agent({ keepAlive: true, maxSockets: 16 });
+
+export const SOL_MINT = "So11111111111111111111111111111111111111112";
+
+export type SwapRequest = {
   inputMint: string;
   outputMint: string;
   amount: bigint;           // en base units de l'input
   slippageBps: number;      // ex 200 = 2%
   priorityLamports: bigint; // ex 100000 = 0.0001 SOL
+  dryRun?: boolean;         // quote + build + sign, sans envoi (benchmarks)
+  quote?: any;              // quote Jupiter déjà obtenue (préchargée côté Python) : étape 1 sautée
+};
+
+type Args = SwapRequest & {
   outPath: string;
 };
 
+export type SwapContext = {
+  conn: Connection;
+  wallet: Keypair;
+  walletStr: string;
+};
+
 function parseArgs(): Args {
   const argv = process.argv.slice(2);
   const get = (name: string, def?: string) => {
@@ -37,18 +54,31 @@ function parseArgs(): Args {
   const priorityLamportsStr = get("priorityLamports", "100000"); // 0.0001 SOL
   const outPathArg = get("out", "last_swap.json")!;
   const outPath = path.join("swap", outPathArg);
+  const dryRun = argv.includes("--dryRun");
 
   const amount = BigInt(amountStr);
   const priorityLamports = BigInt(priorityLamportsStr);
 
-  return { inputMint, outputMint, amount, slippageBps, priorityLamports, outPath };
+  return { inputMint, outputMint, amount, slippageBps, priorityLamports, dryRun, outPath };
 }
 
-async function getQuote(inputMint: string, outputMint: string, amount: bigint, slippageBps: number) {
+export function createContext(): SwapContext {
+  const RPC = "https://api.mainnet-beta.solana.com";
+  const conn = new Connection(RPC, "confirmed");
+
+  // charge la clé
+  const pk = "Your_Solana_Private_Key";
+  const secretKey = base58.decode(pk);
+  const wallet = Keypair.fromSecretKey(secretKey);
+  const walletStr = wallet.publicKey.toBase58();
+  return { conn, wallet, walletStr };
+}
+
+export async function getQuote(inputMint: string, outputMint: string, amount: bigint, slippageBps: number) {
   const url =
     `https://lite-api.jup.ag/swap/v1/quote?inputMint=${inputMint}` +
     `&outputMint=${outputMint}&amount=${amount.toString()}&slippageBps=${slippageBps}`;
-  const resp = await fetch(url);
+  const resp = await fetch(url, { agent: httpAgent });
   const j = await resp.json();
   // console.log("Quote raw:", JSON.stringify(j, null, 2));
   if (j?.data && j.data.length > 0) return j.data[0];
@@ -56,7 +86,7 @@ async function getQuote(inputMint: string, outputMint: string, amount: bigint, s
   return null;
 }
 
-async function buildSwap(quoteResponse: any, userPublicKey: string, priorityLamports: bigint) {
+export async function buildSwap(quoteResponse: any, userPublicKey: string, priorityLamports: bigint) {
   const url = `https://lite-api.jup.ag/swap/v1/swap`;
   const body = {
     quoteResponse,
@@ -68,6 +98,7 @@ async function buildSwap(quoteResponse: any, userPublicKey: string, priorityLamp
   };
   const resp = await fetch(url, {
     method: "POST",
+    agent: httpAgent,
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(body),
   });
@@ -101,34 +132,76 @@ function tokenAmountFor(balances: any[] | undefined, mint: string, owner: string
   return { amount: 0n, decimals: 0 };
 }
 
-async function main() {
-
-  const RPC = "https://api.mainnet-beta.solana.com";
-  const conn = new Connection(RPC, "confirmed");
-
-  // charge la clé
-  const pk = "Your_Solana_Private_Key";
-  const secretKey = base58.decode(pk);
-  const wallet = Keypair.fromSecretKey(secretKey);
-  const walletStr = wallet.publicKey.toBase58();
-
-  const { inputMint, outputMint, amount, slippageBps, priorityLamports, outPath } = parseArgs();
+export type PreparedSwap = {
+  txn: VersionedTransaction;
+  quote: any;
+  builtAt: number;          // Date.now() à la signature
+};
 
-  // 1) Quote
-  const quote = await getQuote(inputMint, outputMint, amount, slippageBps);
+/**
+ * Prépare un swap sans l'envoyer (quote -> build -> sign) : la tx signée peut être
+ * gardée quelques secondes puis envoyée par sendSwap() (vente préparée avant la sortie).
+ */
+export async function prepareSwap(ctx: SwapContext, req: SwapRequest, stagesMs?: Record<string, number>,
+                                  t0: number = Date.now()): Promise<PreparedSwap> {
+  const { wallet, walletStr } = ctx;
+  const { inputMint, outputMint, amount, slippageBps, priorityLamports } = req;
+
+  // 1) Quote (sauf si préchargée)
+  const quote = req.quote ?? await getQuote(inputMint, outputMint, amount, slippageBps);
   if (!quote) throw new Error("No quote found");
+  if (stagesMs) stagesMs.quote = Date.now() - t0;
 
   // 2) Build swap tx
   const swapResp = await buildSwap(quote, walletStr, priorityLamports);
+  if (stagesMs) stagesMs.build = Date.now() - t0;
   const swapB64 = swapResp?.swapTransaction;
   if (!swapB64) throw new Error("No swapTransaction from swap API");
 
-  // 3) Send
   const txn = VersionedTransaction.deserialize(Buffer.from(swapB64, "base64"));
   txn.sign([wallet]);
-  console.log("[TS DEBUG] sending transaction...");
+  return { txn, quote, builtAt: Date.now() };
+}
+
+/**
+ * Exécute un swap complet (quote -> build -> sign -> send -> confirm -> parse)
+ * et renvoie le JSON de résultat, sans rien écrire sur disque.
+ */
+export async function executeSwap(ctx: SwapContext, req: SwapRequest, shouldAbort?: () => boolean): Promise<any> {
+  // ms depuis le début du swap à la fin de chaque étape (trace de latence côté Python)
+  const t0 = Date.now();
+  const stagesMs: Record<string, number> = {};
+  const prepared = await prepareSwap(ctx, req, stagesMs, t0);
+  return sendSwap(ctx, req, prepared, shouldAbort, stagesMs, t0);
+}
+
+/**
+ * Envoie une tx préparée par prepareSwap(), attend la confirmation et renvoie le JSON de
+ * résultat (montants exécutés). `stagesMs` : ms depuis `t0` à la fin de chaque étape.
+ */
+export async function sendSwap(ctx: SwapContext, req: SwapRequest, prepared: PreparedSwap,
+                               shouldAbort?: () => boolean, stagesMs: Record<string, number> = {},
+                               t0: number = Date.now()): Promise<any> {
+  const { conn, walletStr } = ctx;
+  const { inputMint, outputMint, priorityLamports } = req;
+  const { txn, quote } = prepared;
+  // quote sur laquelle la tx a été construite (fill simulé de la simulation fantôme côté Python)
+  const quoted = { quoteInAmountRaw: String(quote.inAmount), quoteOutAmountRaw: String(quote.outAmount) };
+
+  // 3) Send
+  // dernier point où l'on peut encore renoncer (timeout/annulation côté Python)
+  if (shouldAbort && shouldAbort()) throw new Error("Swap cancelled before send");
+  if (req.dryRun) {
+    // signature = 1re signature de la tx signée (non envoyée)
+    const sig = base58.encode(txn.signatures[0]);
+    stagesMs.send = Date.now() - t0;
+    return { signature: sig, dryRun: true, inputMint, outputMint, ...quoted, time: new Date().toISOString(), stagesMs };
+  }
+  console.error("[TS DEBUG] sending transaction...");
   const sig = await conn.sendTransaction(txn, { skipPreflight: true });
+  stagesMs.send = Date.now() - t0;
   await conn.confirmTransaction(sig, "confirmed");
+  stagesMs.confirm = Date.now() - t0;
 
   // 4) Parse executed amounts (vrai exécution)
   const parsed = await conn.getParsedTransaction(sig, {
@@ -137,19 +210,18 @@ async function main() {
   });
 
   if (!parsed || !parsed.meta) {
-    // fallback minimal
-    fs.writeFileSync(outPath, JSON.stringify({
+    // fallback minimal : on renvoie au moins la quote convertie
+    return {
       signature: sig,
       inputMint, outputMint,
-      // on renvoie au moins la quote convertie
       inAmountRaw: String(quote.inAmount),
       outAmountRaw: String(quote.outAmount),
       usedQuote: true,
+      ...quoted,
       time: new Date().toISOString(),
       explorer: `https://solscan.io/tx/${sig}`,
-    }, null, 2));
-    console.log("✅ Swap sent (fallback logging).", `https://solscan.io/tx/${sig}`);
-    return;
+      stagesMs,
+    };
   }
 
   const meta = parsed.meta;
@@ -171,7 +243,6 @@ async function main() {
   const deltaTokOut = (postTokOut.amount - preTokOut.amount); // devrait être positif si on a reçu l'output token
 
   // Calcul des montants exécutés réels normalisés + priceExecSolPerToken
-  const SOL_MINT = "So11111111111111111111111111111111111111112";
   const LAMPORTS_PER_SOL = 1_000_000_000n;
 
   let inAmountRaw = 0n;
@@ -231,16 +302,27 @@ async function main() {
     inAmount: inDecimals ? Number(inAmountRaw) / Math.pow(10, inDecimals) : Number(inAmountRaw) / 1e9,
     outAmount: outDecimals ? Number(outAmountRaw) / Math.pow(10, outDecimals) : Number(outAmountRaw) / 1e9,
     priceExecSolPerToken,    // prix réel exécuté (SOL/token) si SOL est impliqué
+    ...quoted,
     feeLamports: Number(feeLamports),
     priorityLamports: Number(priorityLamports),
     time: new Date().toISOString(),
+    stagesMs,
   };
 
-  fs.writeFileSync(outPath, JSON.stringify(outJson, null, 2));
-  console.log("✅ Swap confirmé:", outJson.explorer);
+  return outJson;
 }
 
-main().catch(e => {
-  console.error("Erreur swap:", e);
-  process.exit(1);
-});
+async function main() {
+  const args = parseArgs();
+  const outJson = await executeSwap(createContext(), args);
+  fs.writeFileSync(args.outPath, JSON.stringify(outJson, null, 2));
+  console.log("✅ Swap confirmé:", outJson.explorer ?? outJson.signature);
+}
+
+// CLI historique : `npx ts-node swap.ts --inputMint ... --out ...`
+if (require.main === module) {
+  main().catch(e => {
+    console.error("Erreur swap:", e);
+    process.exit(1);
+  });
+}
@@ -0,0 +1,361 @@
+import asyncio
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+
+
+def _npx_cmd(ts_path: str) -> list:
+    return ["npx", "ts-node", ts_path]
+
+
+def persist_swap_result(data: dict, out_file: str, swap_dir: str = "swap"):
+    """
+    Écrit le résultat d'un swap dans swap/<out_file> (historique lu par le dashboard).
+    Hors chemin critique : appelé après réception du résultat.
+    """
+    try:
+        os.makedirs(swap_dir, exist_ok=True)
+        path = os.path.join(swap_dir, out_file)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(path + ".tmp", path)  # le dashboard ne voit jamais un fichier à moitié écrit
+    except Exception as e:
+        print(f"⚠️ Impossible d'écrire {out_file}: {e}", flush=True)
+
+
+# ================== ANCIEN CHEMIN (spawn) ==================
+def run_swap_cli(ts_path: str, input_mint: str, output_mint: str, amount_raw: int, out_file: str,
+                 slippage_bps: int = 100, priority_lamports: int = 100000, dry_run: bool = False) -> dict:
+    """
+    Lance `npx ts-node swap.ts ...` (un process Node par swap) puis relit swap/<out_file>.
+    Conservé comme fallback et comme référence pour le benchmark.
+    """
+    cmd = _npx_cmd(ts_path) + [
+        "--inputMint", input_mint,
+        "--outputMint", output_mint,
+        "--amount", str(amount_raw),
+        "--slippageBps", str(slippage_bps),
+        "--priorityLamports", str(priority_lamports),
+        "--out", out_file,
+    ]
+    if dry_run:
+        cmd.append("--dryRun")
+
+    subprocess.run(cmd, text=True, shell=(os.name == "nt"))
+
+    path = os.path.join("swap", out_file)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        raise RuntimeError(f"[ERROR] Failed to read/parse {path}: {e}")
+
+
+async def run_swap_cli_async(ts_path: str, input_mint: str, output_mint: str, amount_raw: int, out_file: str,
+                             slippage_bps: int = 100, priority_lamports: int = 100000,
+                             dry_run: bool = False, timeout: float = 90.0) -> dict:
+    """
+    Variante asynchrone de run_swap_cli : le process Node est attendu sans bloquer
+    l'event loop, et tué en cas de timeout ou d'annulation.
+    """
+    cmd = _npx_cmd(ts_path) + [
+        "--inputMint", input_mint,
+        "--outputMint", output_mint,
+        "--amount", str(amount_raw),
+        "--slippageBps", str(slippage_bps),
+        "--priorityLamports", str(priority_lamports),
+        "--out", out_file,
+    ]
+    if dry_run:
+        cmd.append("--dryRun")
+
+    if os.name == "nt":
+        proc = await asyncio.create_subprocess_shell(subprocess.list2cmdline(cmd))
+    else:
+        proc = await asyncio.create_subprocess_exec(*cmd)
+    try:
+        await asyncio.wait_for(proc.wait(), timeout)
+    except BaseException:
+        # timeout ou CancelledError : on ne laisse pas un swap orphelin tourner
+        if proc.returncode is None:
+            proc.kill()
+        raise
+
+    path = os.path.join("swap", out_file)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        raise RuntimeError(f"[ERROR] Failed to read/parse {path}: {e}")
+
+
+# ================== WORKER PERSISTANT ==================
+class SwapWorker:
+    """
+    Client du worker `swap_worker.ts` : un seul process Node démarré au lancement du bot,
+    les swaps sont envoyés en JSON sur stdin et les résultats reviennent sur stdout.
+    Plusieurs swaps peuvent être en vol en même temps (corrélés par `id`).
+    Si le worker meurt, il est relancé en arrière-plan (compilation ts-node hors event loop) ;
+    les requêtes envoyées entre-temps échouent tout de suite.
+    """
+
+    def __init__(self, ts_path: str, start_timeout: float = 120.0, cmd: list = None):
+        self.ts_path = ts_path
+        self.start_timeout = start_timeout
+        self.cmd = cmd or _npx_cmd(ts_path)  # commande de lancement (un stub du protocole pour les benchs)
+        self._proc = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._pending = {}
+        self._stopped = False
+        self._restarting = None
+        self.restarts = 0
+
+    # ---------- cycle de vie ----------
+    def start(self):
+        """Lance le worker et attend son "ready" (bloquant : au démarrage, ou dans un thread)."""
+        if self.alive():
+            return
+        self._stopped = False
+        proc = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            cwd=os.path.dirname(os.path.abspath(self.ts_path)) or None,
+            shell=(os.name == "nt"),
+        )
+        ready = threading.Event()
+        ready.ok = False  # True sur {"event": "ready"}, False si le process sort avant
+        reader = threading.Thread(target=self._read_loop, args=(proc, ready), name="swap-worker-reader", daemon=True)
+        reader.start()
+        # ts-node compile une seule fois ici, pas à chaque trade
+        if not ready.wait(self.start_timeout) or not ready.ok:
+            self._close(proc)
+            raise RuntimeError("[ERROR] swap worker not ready (timeout or exited)")
+        self._proc, self._reader = proc, reader
+
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def stop(self):
+        self._stopped = True
+        proc, self._proc = self._proc, None
+        if proc is not None:
+            self._close(proc)
+
+    def _close(self, proc):
+        try:
+            proc.stdin.close()  # le worker sort à la fermeture de stdin
+            proc.wait(timeout=5)
+        except Exception:
+            proc.kill()
+        self._fail_pending(RuntimeError("swap worker stopped"), proc)
+
+    def _restart_in_background(self):
+        """Relance le worker dans un thread (un seul à la fois) ; l'appelant n'attend pas."""
+        with self._lock:
+            if self._stopped or (self._restarting is not None and self._restarting.is_alive()):
+                return
+            self._restarting = threading.Thread(target=self._restart, name="swap-worker-restart", daemon=True)
+            self._restarting.start()
+
+    def _restart(self):
+        print("⚙️ Worker de swap arrêté, redémarrage...", flush=True)
+        try:
+            self.start()
+        except Exception as e:
+            print(f"⚠️ Redémarrage du worker de swap impossible : {e}", flush=True)
+            return
+        self.restarts += 1
+        print("✅ Worker de swap redémarré", flush=True)
+
+    # ---------- protocole ----------
+    def _read_loop(self, proc, ready: threading.Event):
+        for line in proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                print(f"[WORKER] {line}", flush=True)
+                continue
+            if msg.get("event") == "ready":
+                ready.ok = True
+                ready.set()
+                continue
+            with self._lock:
+                fut = self._pending.pop(msg.get("id"), None)
+            if fut is None or fut.done():
+                continue
+            try:
+                if msg.get("ok"):
+                    fut.set_result(msg.get("result") or {})
+                else:
+                    fut.set_exception(RuntimeError(f"[ERROR] swap worker: {msg.get('error')}"))
+            except Exception:
+                pass  # annulé entre-temps par l'appelant
+        # stdout fermé : ce process-là est mort (seules ses requêtes échouent, pas celles d'un successeur)
+        ready.set()  # start() n'attend pas un "ready" qui ne viendra plus
+        self._fail_pending(RuntimeError("swap worker exited"), proc)
+
+    def _fail_pending(self, exc: Exception, proc):
+        with self._lock:
+            failed = [req_id for req_id, fut in self._pending.items() if fut.proc is proc]
+            futures = [self._pending.pop(req_id) for req_id in failed]
+        for fut in futures:
+            if not fut.done():
+                fut.set_exception(exc)
+
+    def submit(self, op: str, **params) -> Future:
+        """
+        Envoie une requête au worker et renvoie un Future résolu à la réponse. Worker mort :
+        RuntimeError immédiate, le redémarrage est lancé en arrière-plan.
+        """
+        proc = self._proc
+        if proc is None or proc.poll() is not None:
+            self._restart_in_background()
+            raise RuntimeError("[ERROR] swap worker unavailable (restarting)")
+        fut = Future()
+        fut.proc = proc
+        broken = None
+        with self._lock:
+            self._next_id += 1
+            req_id = self._next_id
+            self._pending[req_id] = fut
+            try:
+                proc.stdin.write(json.dumps(dict(params, id=req_id, op=op)) + "\n")
+                proc.stdin.flush()
+            except (OSError, ValueError) as e:  # mort entre le test et l'écriture
+                del self._pending[req_id]
+                broken = e
+        if broken is not None:
+            self._restart_in_background()
+            raise RuntimeError(f"[ERROR] swap worker unavailable ({broken})")
+        fut.req_id = req_id
+        return fut
+
+    def cancel(self, req_id: int):
+        """Demande au worker d'abandonner un swap s'il n'a pas encore envoyé la transaction."""
+        with self._lock:
+            fut = self._pending.pop(req_id, None)
+        if fut is None:
+            return  # déjà terminé
+        fut.cancel()
+        if self.alive():
+            try:
+                self.submit("cancel", target=req_id)
+            except Exception:
+                pass
+
+    def _submit_swap(self, input_mint, output_mint, amount_raw, slippage_bps, priority_lamports, dry_run,
+                     quote=None) -> Future:
+        fields = {}
+        if quote:
+            fields["quote"] = quote  # quote Jupiter brute déjà obtenue : le worker ne re-quote pas
+        return self.submit(
+            "swap",
+            inputMint=input_mint,
+            outputMint=output_mint,
+            amount=str(amount_raw),
+            slippageBps=slippage_bps,
+            priorityLamports=str(priority_lamports),
+            dryRun=dry_run,
+            **fields,
+        )
+
+    def swap(self, input_mint: str, output_mint: str, amount_raw: int,
+             slippage_bps: int = 100, priority_lamports: int = 100000,
+             dry_run: bool = False, timeout: float = 90.0) -> dict:
+        fut = self._submit_swap(input_mint, output_mint, amount_raw, slippage_bps, priority_lamports, dry_run)
+        return fut.result(timeout)
+
+    async def swap_async(self, input_mint: str, output_mint: str, amount_raw: int,
+                         slippage_bps: int = 100, priority_lamports: int = 100000,
+                         dry_run: bool = False, timeout: float = 90.0, quote: dict = None) -> dict:
+        """
+        Même chose que swap() mais attendu sur l'event loop : le WS et les autres trades
+        continuent pendant le swap. Timeout/annulation -> cancel envoyé au worker.
+        `quote` : réponse brute de quote_async() déjà obtenue, utilisée telle quelle.
+        """
+        fut = self._submit_swap(input_mint, output_mint, amount_raw, slippage_bps, priority_lamports, dry_run,
+                                quote)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(fut), timeout)
+        except BaseException:
+            self.cancel(fut.req_id)
+            raise
+
+    async def prepare_async(self, input_mint: str, output_mint: str, amount_raw: int,
+                            slippage_bps: int = 100, priority_lamports: int = 100000,
+                            dry_run: bool = False, timeout: float = 30.0, quote: dict = None) -> dict:
+        """
+        Quote + build + signature sans envoi : la tx reste dans le worker (quelques dizaines de s)
+        sous l'id renvoyé dans result["prepared"], à passer à send_prepared_async() ou discard().
+        """
+        fields = {"quote": quote} if quote else {}
+        fut = self.submit(
+            "prepare",
+            inputMint=input_mint,
+            outputMint=output_mint,
+            amount=str(amount_raw),
+            slippageBps=slippage_bps,
+            priorityLamports=str(priority_lamports),
+            dryRun=dry_run,
+            **fields,
+        )
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(fut), timeout)
+        except BaseException:
+            self.cancel(fut.req_id)
+            raise
+
+    async def send_prepared_async(self, prepared_id: int, max_age: float = None, timeout: float = 90.0) -> dict:
+        """
+        Envoie une tx préparée (même résultat que swap_async) ; RuntimeError si le worker
+        ne l'a plus ou si elle a été signée il y a plus de `max_age` s (re-vérifié côté worker).
+        """
+        fields = {"maxAgeMs": int(max_age * 1000)} if max_age is not None else {}
+        fut = self.submit("send_prepared", target=prepared_id, **fields)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(fut), timeout)
+        except BaseException:
+            self.cancel(fut.req_id)
+            raise
+
+    def discard(self, prepared_id: int):
+        """Oublie une tx préparée non utilisée (sans attendre la réponse)."""
+        if self.alive():
+            try:
+                self.submit("discard", target=prepared_id)
+            except Exception:
+                pass
+
+    async def quote_async(self, input_mint: str, output_mint: str, amount_raw: int,
+                          slippage_bps: int = 100, timeout: float = 10.0):
+        """Quote Jupiter seule (pas de transaction) : réponse brute de l'API, ou None si pas de route."""
+        fut = self.submit(
+            "quote",
+            inputMint=input_mint,
+            outputMint=output_mint,
+            amount=str(amount_raw),
+            slippageBps=slippage_bps,
+        )
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(fut), timeout)
+        except BaseException:
+            self.cancel(fut.req_id)
+            raise
+        return result or None
+
+    def ping(self, timeout: float = 5.0) -> float:
+        t0 = time.perf_counter()
+        self.submit("ping").result(timeout)
+        return time.perf_counter() - t0
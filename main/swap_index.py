@@ -0,0 +1,128 @@
+import json
+import os
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+INDEX_FILE = "swap_manifest.jsonl"  # à côté du dossier swap/, append-only (une ligne par fichier indexé)
+
+
+def classify_swap(data: dict) -> tuple:
+    """
+    (mint, side) d'un résultat de swap, d'après son contenu et non son nom de fichier :
+    SOL -> token = buy du token, token -> SOL = sell du token.
+    """
+    input_mint = data.get("inputMint")
+    output_mint = data.get("outputMint")
+    if input_mint == SOL_MINT and output_mint != SOL_MINT:
+        return output_mint, "buy"
+    if output_mint == SOL_MINT and input_mint != SOL_MINT:
+        return input_mint, "sell"
+    return None, None
+
+
+class SwapIndex:
+    """
+    Index persistant des fichiers swap/*.json, par mint et par côté (buy/sell).
+    refresh() liste le dossier et ne parse que les fichiers nouveaux ou modifiés (nom,
+    mtime, taille) ; les fichiers disparus sont retirés. Chaque changement est ajouté en
+    fin de swap_manifest.jsonl (le manifest n'est réécrit que pour le compacter) ; il est
+    reconstruit entièrement s'il est supprimé.
+    """
+
+    def __init__(self, swap_dir: str = "swap"):
+        self.swap_dir = swap_dir
+        self.index_path = os.path.join(os.path.dirname(os.path.abspath(swap_dir)), INDEX_FILE)
+        self._load()
+
+    def _reset(self):
+        self.files = {}     # nom de fichier -> (mtime, taille, mint, side)
+        self.trades = {}    # mint -> {"buy": {...}, "sell": {...}}
+        self._sources = {}  # (mint, side) -> fichier dont vient trades[mint][side]
+        self._lines = 0     # lignes du manifest, périmées comprises
+
+    def _load(self):
+        self._reset()
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        continue  # dernière ligne tronquée (arrêt pendant l'écriture)
+                    self._lines += 1
+        except OSError:
+            pass
+
+    def _apply(self, entry: dict):
+        name = entry["name"]
+        old = self.files.pop(name, None)
+        if old is not None and self._sources.get((old[2], old[3])) == name:
+            del self._sources[(old[2], old[3])]
+            sides = self.trades.get(old[2], {})
+            sides.pop(old[3], None)
+            if not sides:
+                self.trades.pop(old[2], None)
+        if entry.get("removed"):
+            return
+        mint, side = entry["mint"], entry["side"]
+        self.files[name] = (entry["mtime"], entry["size"], mint, side)
+        if mint:
+            self.trades.setdefault(mint, {})[side] = entry["data"]
+            self._sources[(mint, side)] = name
+
+    def _entry(self, name: str) -> dict:
+        mtime, size, mint, side = self.files[name]
+        data = self.trades[mint][side] if mint and self._sources.get((mint, side)) == name else None
+        return {"name": name, "mtime": mtime, "size": size, "mint": mint, "side": side, "data": data}
+
+    def _append(self, entries: list):
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e) + "\n" for e in entries))
+        self._lines += len(entries)
+        if self._lines > 2 * len(self.files) + 100:
+            self._compact()
+
+    def _compact(self):
+        """Réécrit le manifest sans les lignes périmées (fichiers modifiés ou supprimés)."""
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(self._entry(name)) + "\n" for name in self.files))
+        os.replace(tmp, self.index_path)
+        self._lines = len(self.files)
+
+    def refresh(self) -> list:
+        """Indexe les fichiers nouveaux ou modifiés ; renvoie la liste des fichiers ajoutés."""
+        if not os.path.isdir(self.swap_dir):
+            return []
+        if not os.path.exists(self.index_path):
+            self._reset()  # index supprimé : reconstruction complète
+
+        entries, added, listed = [], [], set()
+        with os.scandir(self.swap_dir) as it:
+            for entry in it:
+                name = entry.name
+                if not name.endswith(".json"):
+                    continue
+                listed.add(name)
+                st = entry.stat()
+                known = self.files.get(name)
+                if known is not None and known[0] == st.st_mtime and known[1] == st.st_size:
+                    continue
+                try:
+                    with open(entry.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue  # fichier en cours d'écriture : repris au prochain refresh
+                mint, side = classify_swap(data)
+                change = {"name": name, "mtime": st.st_mtime, "size": st.st_size, "mint": mint, "side": side,
+                          "data": data if mint else None}
+                self._apply(change)
+                entries.append(change)
+                added.append(name)
+        for name in [n for n in self.files if n not in listed]:
+            change = {"name": name, "removed": True}
+            self._apply(change)
+            entries.append(change)
+
+        if entries:
+            self._append(entries)
+        return added
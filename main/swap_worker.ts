@@ -0,0 +1,136 @@
+// swap_worker.ts
+// Worker long-lived : une seule instance Node/ts-node, une seule Connection et
+// un agent HTTP keep-alive pour tous les swaps du bot.
+//
+// Protocole (JSON, une ligne par message) :
+//   stdin  -> {"id": 1, "op": "swap", "inputMint": "...", "outputMint": "...",
+//              "amount": "150000000", "slippageBps": 100, "priorityLamports": "100000",
+//              "dryRun": false, "quote": {...}}   (quote optionnelle, préchargée : pas de re-quote)
+//   stdin  -> {"id": 2, "op": "ping"}
+//   stdin  -> {"id": 4, "op": "quote", "inputMint": "...", "outputMint": "...", "amount": "...", "slippageBps": 100}
+//             (quote Jupiter seule, result = réponse brute ou null si pas de route)
+//   stdin  -> {"id": 3, "op": "cancel", "target": 1}   (abandon avant envoi de la tx)
+//   stdin  -> {"id": 5, "op": "prepare", ...mêmes champs que swap...}
+//             (quote + build + sign sans envoi, tx gardée sous l'id 5 : result = {"prepared": 5, ...})
+//   stdin  -> {"id": 6, "op": "send_prepared", "target": 5, "maxAgeMs": 2000}
+//             (envoie la tx préparée ; erreur si absente ou signée il y a plus de maxAgeMs)
+//   stdin  -> {"id": 7, "op": "discard", "target": 5}   (tx préparée inutilisée)
+//   stdout <- {"event": "ready"}
+//   stdout <- {"id": 1, "ok": true, "result": {...}}   (même JSON que swap.ts --out)
+//   stdout <- {"id": 1, "ok": false, "error": "..."}
+// Les logs partent sur stderr : stdout est réservé au protocole.
+import readline from "readline";
+import { createContext, executeSwap, getQuote, prepareSwap, PreparedSwap, sendSwap, SwapContext,
+         SwapRequest } from "./swap";
+
+// swaps en cours, et ceux annulés par le client (timeout / CancelledError côté Python)
+const inflight = new Set<number>();
+const cancelled = new Set<number>();
+// txs signées en attente d'envoi (op "prepare"), oubliées d'office après PREPARED_TTL_MS
+const prepared = new Map<number, { req: SwapRequest, swap: PreparedSwap }>();
+const PREPARED_TTL_MS = 30_000;
+
+function swapRequest(msg: any): SwapRequest {
+  return {
+    inputMint: String(msg.inputMint),
+    outputMint: String(msg.outputMint),
+    amount: BigInt(msg.amount),
+    slippageBps: Number(msg.slippageBps ?? 200),
+    priorityLamports: BigInt(msg.priorityLamports ?? "100000"),
+    dryRun: Boolean(msg.dryRun),
+    quote: msg.quote ?? undefined,
+  };
+}
+
+function reply(msg: any) {
+  process.stdout.write(JSON.stringify(msg) + "\n");
+}
+
+async function handle(ctx: SwapContext, msg: any) {
+  const id = msg?.id;
+  try {
+    switch (msg?.op) {
+      case "ping":
+        reply({ id, ok: true, result: { pong: Date.now() } });
+        return;
+      case "cancel":
+        if (inflight.has(Number(msg.target))) cancelled.add(Number(msg.target));
+        reply({ id, ok: true, result: { cancelled: msg.target } });
+        return;
+      case "quote": {
+        const quote = await getQuote(
+          String(msg.inputMint),
+          String(msg.outputMint),
+          BigInt(msg.amount),
+          Number(msg.slippageBps ?? 100),
+        );
+        reply({ id, ok: true, result: quote });
+        return;
+      }
+      case "swap": {
+        inflight.add(id);
+        const result = await executeSwap(ctx, swapRequest(msg), () => cancelled.has(id));
+        reply({ id, ok: true, result });
+        return;
+      }
+      case "prepare": {
+        inflight.add(id);
+        const req = swapRequest(msg);
+        const t0 = Date.now();
+        const stagesMs: Record<string, number> = {};
+        const swap = await prepareSwap(ctx, req, stagesMs, t0);
+        if (cancelled.has(id)) throw new Error("Prepare cancelled");
+        prepared.set(id, { req, swap });
+        setTimeout(() => prepared.delete(id), PREPARED_TTL_MS).unref();
+        reply({ id, ok: true, result: { prepared: id, outAmount: String(swap.quote?.outAmount ?? "0"), stagesMs } });
+        return;
+      }
+      case "send_prepared": {
+        const entry = prepared.get(Number(msg.target));
+        prepared.delete(Number(msg.target));
+        if (!entry) throw new Error("Prepared swap not found");
+        const age = Date.now() - entry.swap.builtAt;
+        if (msg.maxAgeMs != null && age > Number(msg.maxAgeMs)) throw new Error(`Prepared swap too old (${age} ms)`);
+        inflight.add(id);
+        const result = await sendSwap(ctx, entry.req, entry.swap, () => cancelled.has(id));
+        reply({ id, ok: true, result: { ...result, preparedAgeMs: age } });
+        return;
+      }
+      case "discard":
+        prepared.delete(Number(msg.target));
+        reply({ id, ok: true, result: { discarded: msg.target } });
+        return;
+      default:
+        throw new Error(`Unknown op: ${msg?.op}`);
+    }
+  } catch (e: any) {
+    reply({ id, ok: false, error: String(e?.message ?? e) });
+  } finally {
+    inflight.delete(id);
+    cancelled.delete(id);
+  }
+}
+
+function main() {
+  const ctx = createContext();
+  const rl = readline.createInterface({ input: process.stdin, terminal: false });
+
+  rl.on("line", line => {
+    if (!line.trim()) return;
+    let msg: any;
+    try {
+      msg = JSON.parse(line);
+    } catch (e) {
+      console.error("[WORKER] ligne invalide:", line);
+      return;
+    }
+    // pas d'await : les swaps concurrents s'exécutent en parallèle
+    handle(ctx, msg);
+  });
+  // stdin fermé = le bot Python s'est arrêté
+  rl.on("close", () => process.exit(0));
+
+  reply({ event: "ready" });
+}
+
+main();
@@ -0,0 +1,3 @@
+"""
+Briques partagées entre le bot live (main/main.py) et le bot de simulation (test/test.py).
+"""
@@ -0,0 +1,187 @@
+import asyncio
+import bisect
+import itertools
+from contextlib import contextmanager
+
+
+class Ticket:
+    __slots__ = ("mint", "decimals", "score", "at", "waited", "received_at", "prefetch")
+
+    def __init__(self, mint, decimals, score, at, received_at=None):
+        self.mint = mint
+        self.decimals = decimals
+        self.score = score
+        self.at = at                    # loop.time() d'entrée en file
+        self.waited = 0.0               # s passées en file avant admission
+        self.received_at = received_at  # time.monotonic() de réception du message WS (trace du trade)
+        self.prefetch = None            # pybot.prefetch.Prefetch : quote d'achat demandée pendant l'attente
+
+
+class AdmissionScheduler:
+    """
+    File d'admission des nouvelles paires vers les slots de trade.
+
+    - file bornée (`maxsize`), triée par fraîcheur (priority="age" : la paire la plus récente
+      d'abord) ou par score puis fraîcheur (priority="score") ; file pleine = la moins
+      prioritaire est abandonnée
+    - une paire en file depuis plus de `stale_after` s est abandonnée (trop vieille pour être achetée)
+    - `slots` trades simultanés ; next() attend qu'un slot soit libre, release() réveille
+      immédiatement le consommateur (pas de polling)
+    - `min_spacing` : écart minimal entre deux admissions (ex-RATE_LIMIT), attendu au plus juste
+
+    Métriques : profondeur de file, abandons (périmés / file pleine), attente en file,
+    temps de slot inoccupé alors que des paires attendaient.
+    """
+
+    def __init__(self, slots: int, maxsize: int = 256, stale_after: float = 10.0, min_spacing: float = 0.0,
+                 priority: str = "age"):
+        self.slots = slots
+        self.maxsize = maxsize
+        self.stale_after = stale_after
+        self.min_spacing = min_spacing
+        self.priority = priority
+        self.busy = 0
+        self._items = []                 # [(clé, seq, Ticket)] trié, meilleur à la fin
+        self._seq = itertools.count()
+        self._changed = None             # asyncio.Event, créé dans l'event loop
+        self._last_admit = -float("inf")
+        self._last_change = None
+        # métriques
+        self.offered = 0
+        self.admitted = 0
+        self.dropped_stale = 0
+        self.dropped_full = 0
+        self.max_depth = 0
+        self.wait = 0.0                  # s, EWMA de l'attente en file des paires admises
+        self.slot_idle_seconds = 0.0     # slots libres x durée, pendant que la file n'était pas vide
+
+    # ---------- horloge / métriques ----------
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_event_loop().time()
+
+    def _account(self, now: float):
+        """Cumule le temps de slot inoccupé depuis le dernier changement d'état."""
+        if self._last_change is not None and self._items:
+            free = max(0, self.slots - self.busy)
+            self.slot_idle_seconds += free * (now - self._last_change)
+        self._last_change = now
+
+    def _notify(self):
+        if self._changed is not None:
+            self._changed.set()
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    @property
+    def free(self) -> int:
+        return max(0, self.slots - self.busy)
+
+    # ---------- file ----------
+    def _key(self, ticket: Ticket):
+        if self.priority == "score":
+            return (ticket.score if ticket.score is not None else float("-inf"), ticket.at)
+        return ticket.at
+
+    def offer(self, mint: str, decimals: int, score: float = None, received_at: float = None):
+        """Ajoute une paire (appel synchrone, depuis le callback du WS) ; renvoie son Ticket, None si abandonnée."""
+        now = self._now()
+        self._account(now)
+        self.offered += 1
+        self._purge(now)
+        ticket = Ticket(mint, decimals, score, now, received_at)
+        entry = (self._key(ticket), next(self._seq), ticket)
+        if len(self._items) >= self.maxsize:
+            if entry[:2] <= self._items[0][:2]:
+                self.dropped_full += 1
+                return None
+            self._items.pop(0)  # la moins prioritaire
+            self.dropped_full += 1
+        bisect.insort(self._items, entry)
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._notify()
+        return ticket
+
+    def _purge(self, now: float):
+        if not self._items or not self.stale_after:
+            return
+        limit = now - self.stale_after
+        kept = [e for e in self._items if e[2].at >= limit]
+        self.dropped_stale += len(self._items) - len(kept)
+        self._items = kept
+
+    async def next(self) -> Ticket:
+        """Attend un slot libre et une paire fraîche ; le slot est réservé jusqu'à release()."""
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        while True:
+            now = self._now()
+            self._purge(now)
+            timeout = None
+            if self._items and self.free > 0:
+                timeout = self._last_admit + self.min_spacing - now
+                if timeout <= 0:
+                    self._account(now)
+                    ticket = self._items.pop()[2]
+                    ticket.waited = now - ticket.at
+                    self.busy += 1
+                    self.admitted += 1
+                    self._last_admit = now
+                    self.wait += 0.2 * (ticket.waited - self.wait)
+                    return ticket
+            if self._items and self.stale_after:
+                # réveil au plus tard quand la plus vieille paire devient périmée
+                oldest = min(e[2].at for e in self._items) + self.stale_after - now
+                timeout = oldest if timeout is None else min(timeout, oldest)
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), None if timeout is None else max(0.0, timeout))
+            except asyncio.TimeoutError:
+                pass
+
+    def resize(self, slots: int):
+        """Change le nombre de slots à chaud ; les trades en cours gardent le leur."""
+        self._account(self._now())
+        self.slots = max(1, int(slots))
+        self._notify()
+
+    def release(self):
+        """Libère un slot (fin du trade) : le consommateur est réveillé tout de suite."""
+        self._account(self._now())
+        self.busy = max(0, self.busy - 1)
+        self._notify()
+
+    @contextmanager
+    def release_on_exit(self):
+        """Libère le slot réservé par next() à la sortie du bloc, quoi qu'il arrive."""
+        try:
+            yield
+        finally:
+            self.release()
+
+    # ---------- export ----------
+    def stats(self) -> dict:
+        self._account(self._now())
+        return {
+            "queue_depth": self.depth,
+            "queue_max_depth": self.max_depth,
+            "offered": self.offered,
+            "admitted": self.admitted,
+            "dropped_stale": self.dropped_stale,
+            "dropped_full": self.dropped_full,
+            "slots_busy": self.busy,
+            "slots": self.slots,
+            "queue_wait": round(self.wait, 4),
+            "slot_idle_seconds": round(self.slot_idle_seconds, 3),
+        }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (
+            f"file {s['queue_depth']} (max {s['queue_max_depth']}) | {s['admitted']}/{s['offered']} admises | "
+            f"abandons : {s['dropped_stale']} périmées, {s['dropped_full']} file pleine | "
+            f"attente {s['queue_wait'] * 1e3:.0f}ms | slots {s['slots_busy']}/{s['slots']} "
+            f"(inoccupés {s['slot_idle_seconds']:.1f}s)"
+        )
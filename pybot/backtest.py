@@ -0,0 +1,346 @@
+"""
+Backtest hors ligne de la stratégie du simulateur (test/test.py) sur une grille de paramètres :
+TRADE_HOLD_SECONDS, TRADE_SIZE_SOL, SLIPPAGE_RATE_BUY/SELL, FEE_RATE, MAX_CONCURRENT_TRADES
+(et RATE_LIMIT). Toutes les configurations avancent ensemble, mint par mint, en opérations
+NumPy ; les grandes grilles sont découpées entre plusieurs processus.
+
+    python -m pybot.backtest test/session.jsonl.gz --hold 6,12,30 --size 0.05,0.15 \\
+        --slip-buy 0.01,0.02 --concurrency 1,2,4 --workers 4 --out sweep.csv
+
+Entrée : un enregistrement pybot.recorder (quotes Jupiter par mint) ou un fichier de
+trajectoires JSONL, une ligne par mint :
+    {"mint": "...", "t0": 1700000000.0, "r_buy": 1234.5, "t": [0.4, 12.5], "r_sell": [0.00081, null]}
+r_buy = tokens bruts reçus par lamport à l'entrée, r_sell = lamports reçus par token brut
+`t` secondes après la détection (null = plus de route : rug).
+
+Modèle (identique à simulate_trade, sans impact de prix) :
+    coût   = size * (1 + FEE_RATE + TAX_RATE)
+    reçu   = size * (1 - SLIPPAGE_RATE_BUY) * r_buy * r_sell(t0 + hold) * (1 - SLIPPAGE_RATE_SELL)
+    pnl    = reçu * (1 - FEE_RATE - TAX_RATE) - coût       (rug : pnl = -coût)
+Un mint détecté quand tous les slots sont pris, moins de RATE_LIMIT s après le trade
+précédent ou sans solde suffisant est ignoré.
+"""
+import argparse
+import gzip
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pybot.ingest import parse_new_pair
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+
+# valeurs de test/test.py
+DEFAULT_GRID = {
+    "hold": [12],
+    "size": [0.15],
+    "slip_buy": [0.02],
+    "slip_sell": [0.02],
+    "fee": [0.0025],
+    "concurrency": [2],
+    "rate_limit": [5.0],
+}
+TAX_RATE = 0.0
+INITIAL_BALANCE = 1.38
+EXIT_TOLERANCE_SECONDS = 5.0  # écart max entre la sortie et la quote la plus proche
+CHUNK_CONFIGS = 2000          # configurations par tâche du pool
+
+
+# ================== TRAJECTOIRES ==================
+class PricePaths:
+    """Trajectoires de prix par mint, triées par heure de détection."""
+
+    def __init__(self, paths: list):
+        paths = sorted((p for p in paths if p.get("r_buy")), key=lambda p: p["t0"])
+        self.mints = [p["mint"] for p in paths]
+        self.t0 = np.array([p["t0"] for p in paths], dtype=float)
+        self.r_buy = np.array([p["r_buy"] for p in paths], dtype=float)
+        self.t = [np.asarray(p["t"], dtype=float) for p in paths]
+        self.r_sell = [np.array([np.nan if r is None else r for r in p["r_sell"]], dtype=float) for p in paths]
+
+    def __len__(self):
+        return len(self.mints)
+
+    @property
+    def span(self) -> float:
+        return float(self.t0[-1] - self.t0[0]) if len(self) > 1 else 0.0
+
+    def exit_ratios(self, holds: np.ndarray, tolerance: float = EXIT_TOLERANCE_SECONDS) -> tuple:
+        """
+        (ratio, valid) de forme (mints, holds) : r_sell à t0 + hold (quote la plus proche
+        à `tolerance` près). ratio = 0 si la liquidité a disparu avant la sortie (rug) ;
+        valid = False si aucune quote n'est assez proche pour juger.
+        """
+        ratio = np.zeros((len(self), len(holds)))
+        valid = np.zeros((len(self), len(holds)), dtype=bool)
+        for i, (t, r) in enumerate(zip(self.t, self.r_sell)):
+            no_route = np.isnan(r)
+            # rug : une quote sans route à ou avant la sortie (la liquidité ne revient pas)
+            rugged = t[no_route][0] <= holds if no_route.any() else np.zeros(len(holds), dtype=bool)
+            tq, rq = t[~no_route], r[~no_route]
+            if len(tq):
+                j = np.searchsorted(tq, holds)
+                left = np.clip(j - 1, 0, len(tq) - 1)
+                right = np.clip(j, 0, len(tq) - 1)
+                nearest = np.where(np.abs(tq[left] - holds) <= np.abs(tq[right] - holds), left, right)
+                valid[i] = np.abs(tq[nearest] - holds) <= tolerance
+                ratio[i] = rq[nearest]
+            valid[i] |= rugged
+            ratio[i][rugged] = 0.0
+        return ratio, valid
+
+
+def _ratio(body: str, invert: bool = False):
+    """r = outAmount / inAmount d'une réponse quote (None si pas de route)."""
+    try:
+        data = json.loads(body)
+        if not data.get("routePlan"):
+            return None
+        r = int(data["outAmount"]) / int(data["inAmount"])
+    except (ValueError, TypeError, KeyError, ZeroDivisionError, AttributeError):
+        return None
+    return (1.0 / r if r else None) if invert else r
+
+
+def paths_from_recording(path: str) -> list:
+    """
+    Trajectoires depuis un enregistrement pybot.recorder : détection = message WS,
+    entrée = première quote SOL -> mint ; chaque quote mint -> SOL donne un point r_sell,
+    les quotes SOL -> mint suivantes un point implicite 1 / r_buy.
+    """
+    from pybot.recorder import read_recording
+
+    detected, quotes = {}, {}
+    for e in read_recording(path):
+        if e.get("k") == "ws":
+            try:
+                parsed = parse_new_pair(json.loads(e["msg"]))
+            except ValueError:
+                continue
+            if parsed and parsed[0] not in detected:
+                detected[parsed[0]] = e["t"]
+        elif e.get("k") == "quote":
+            buy = e["in"] == SOL_MINT
+            mint = e["out"] if buy else e["in"]
+            ok = e.get("status") == 200
+            quotes.setdefault(mint, []).append((e["t"], buy, _ratio(e["body"]) if ok else None))
+
+    paths = []
+    for mint, items in quotes.items():
+        items.sort(key=lambda x: x[0])
+        entry = next((k for k, x in enumerate(items) if x[1] and x[2]), None)
+        if entry is None:
+            continue
+        t_entry, _, r_buy = items[entry]
+        t0 = detected.get(mint, t_entry)
+        t, r_sell = [], []
+        for k, (ts, buy, r) in enumerate(items):
+            if k == entry:
+                continue
+            t.append(ts - t0)
+            r_sell.append((1.0 / r if r else None) if buy else r)
+        paths.append({"mint": mint, "t0": t0, "r_buy": r_buy, "t": t, "r_sell": r_sell})
+    return paths
+
+
+def load_paths(path: str) -> PricePaths:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        first = f.readline()
+    try:
+        is_recording = "k" in json.loads(first)
+    except ValueError:
+        is_recording = False
+    if is_recording:
+        return PricePaths(paths_from_recording(path))
+    with opener(path, "rt", encoding="utf-8") as f:
+        return PricePaths([json.loads(line) for line in f if line.strip()])
+
+
+# ================== GRILLE ==================
+def make_grid(**values) -> dict:
+    """Produit cartésien des listes de paramètres -> dict de tableaux de même longueur."""
+    grid = dict(DEFAULT_GRID)
+    grid.update({k: v for k, v in values.items() if v})
+    keys = list(DEFAULT_GRID)
+    combos = np.array(list(itertools.product(*(grid[k] for k in keys))), dtype=float)
+    return {k: combos[:, i] for i, k in enumerate(keys)}
+
+
+# ================== MOTEUR ==================
+def run_grid(paths: PricePaths, grid: dict, initial_balance: float = INITIAL_BALANCE) -> dict:
+    """Simule toutes les configurations de `grid` sur `paths` ; renvoie des tableaux de métriques."""
+    n = len(grid["hold"])
+    hold, size = grid["hold"], grid["size"]
+    concurrency = grid["concurrency"].astype(int)
+    rate_limit = grid["rate_limit"]
+    cost = size * (1 + grid["fee"] + TAX_RATE)
+    gross = size * (1 - grid["slip_buy"]) * (1 - grid["slip_sell"]) * (1 - grid["fee"] - TAX_RATE)
+
+    holds, hold_idx = np.unique(hold, return_inverse=True)
+    exit_ratio, exit_valid = paths.exit_ratios(holds)
+    rows = np.arange(n)
+
+    k_max = int(concurrency.max()) if n else 0
+    slot_end = np.full((n, k_max), np.inf)
+    slot_proceeds = np.zeros((n, k_max))
+    active = np.zeros((n, k_max), dtype=bool)
+    active |= np.arange(k_max)[None, :] >= concurrency[:, None]  # slots au-delà de la limite : jamais libres
+    blocked = active.copy()
+    balance = np.full(n, float(initial_balance))
+    last_trade = np.full(n, -np.inf)
+    trades = np.zeros(n, dtype=np.int64)
+    rugs = np.zeros(n, dtype=np.int64)
+    wins = np.zeros(n, dtype=np.int64)
+    losses = np.zeros(n, dtype=np.int64)
+    revenue = np.zeros(n)
+    gross_win = np.zeros(n)
+    gross_loss = np.zeros(n)
+
+    for i in range(len(paths)):
+        t0 = paths.t0[i]
+        # ventes terminées avant cette détection : le solde est crédité
+        done = active & ~blocked & (slot_end <= t0)
+        balance += (slot_proceeds * done).sum(axis=1)
+        active &= ~done
+
+        ratio = exit_ratio[i, hold_idx]
+        take = (
+            exit_valid[i, hold_idx]
+            & ~active.all(axis=1)
+            & (t0 - last_trade >= rate_limit)
+            & (balance >= cost)
+        )
+        if not take.any():
+            continue
+        slot = np.argmin(active, axis=1)
+        proceeds = gross * paths.r_buy[i] * ratio
+        pnl = proceeds - cost
+        rug = ratio <= 0
+
+        sel = rows[take]
+        balance[take] -= cost[take]
+        last_trade[take] = t0
+        active[sel, slot[take]] = True
+        slot_end[sel, slot[take]] = t0 + hold[take]
+        slot_proceeds[sel, slot[take]] = proceeds[take]
+
+        trades += take
+        rugs += take & rug
+        wins += take & ~rug & (pnl > 0)
+        losses += take & ~rug & (pnl <= 0)
+        revenue += np.where(take, pnl, 0.0)
+        gross_win += np.where(take & (pnl > 0), pnl, 0.0)
+        gross_loss += np.where(take & (pnl <= 0), -pnl, 0.0)
+
+    balance += (slot_proceeds * (active & ~blocked)).sum(axis=1)
+    elapsed = paths.span + (hold.max() if n else 0.0)
+    minutes, hours = elapsed / 60, elapsed / 3600
+    return {
+        "trade_count": trades,
+        "rugged_count": rugs,
+        "successful_trades": wins,
+        "nosuccessful_trades": losses,
+        "win_rate": np.where(trades > 0, wins / np.maximum(trades, 1), 0.0),
+        "rug_rate": np.where(trades > 0, rugs / np.maximum(trades, 1), 0.0),
+        "portfolio_balance": balance,
+        "revenue_total": revenue,
+        "avg_per_min": revenue / minutes if minutes > 0 else np.zeros(n),
+        "avg_per_hour": revenue / hours if hours > 0 else np.zeros(n),
+        "profit_factor": np.where(gross_loss > 0, gross_win / np.maximum(gross_loss, 1e-12), np.inf),
+    }
+
+
+# ================== POOL ==================
+_worker_paths = None
+
+
+def _init_worker(paths):
+    global _worker_paths
+    _worker_paths = paths
+
+
+def _run_chunk(args):
+    grid, initial_balance = args
+    return run_grid(_worker_paths, grid, initial_balance)
+
+
+def sweep(paths: PricePaths, grid: dict, workers: int = 1, initial_balance: float = INITIAL_BALANCE,
+          chunk: int = CHUNK_CONFIGS):
+    """
+    run_grid sur toute la grille, découpée en paquets de `chunk` configurations répartis
+    sur `workers` processus (les trajectoires sont envoyées une fois par processus).
+    Renvoie un DataFrame paramètres + métriques.
+    """
+    import pandas as pd
+
+    n = len(grid["hold"])
+    parts = [{k: v[s:s + chunk] for k, v in grid.items()} for s in range(0, n, chunk)]
+    if workers > 1 and len(parts) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(paths,)) as pool:
+            results = list(pool.map(_run_chunk, [(p, initial_balance) for p in parts]))
+    else:
+        results = [run_grid(paths, p, initial_balance) for p in parts]
+
+    frame = pd.DataFrame({k: np.concatenate([r[k] for r in results]) for k in results[0]})
+    params = pd.DataFrame(grid)
+    params["concurrency"] = params["concurrency"].astype(int)
+    return pd.concat([params, frame], axis=1)
+
+
+def _floats(text: str) -> list:
+    return [float(x) for x in text.split(",") if x.strip()]
+
+
+def _format_row(row) -> str:
+    return (
+        f"hold={row['hold']:g}s size={row['size']:g} slip={row['slip_buy']:g}/{row['slip_sell']:g} "
+        f"fee={row['fee']:g} conc={int(row['concurrency'])} rate={row['rate_limit']:g}s | "
+        f"Trades pris : {int(row['trade_count'])} | Rugged : {int(row['rugged_count'])} | "
+        f"Réussis : {int(row['successful_trades'])} | Non réussis : {int(row['nosuccessful_trades'])} | "
+        f"Solde : {row['portfolio_balance']:.4f} SOL | Revenu : {row['revenue_total']:.4f} SOL | "
+        f"/heure : {row['avg_per_hour']:.4f} SOL"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Balayage de paramètres de la stratégie de simulation")
+    parser.add_argument("data", help="enregistrement pybot.recorder (.jsonl.gz) ou trajectoires JSONL")
+    parser.add_argument("--hold", type=_floats, help="TRADE_HOLD_SECONDS, ex. 6,12,30")
+    parser.add_argument("--size", type=_floats, help="TRADE_SIZE_SOL")
+    parser.add_argument("--slip-buy", type=_floats, help="SLIPPAGE_RATE_BUY")
+    parser.add_argument("--slip-sell", type=_floats, help="SLIPPAGE_RATE_SELL")
+    parser.add_argument("--fee", type=_floats, help="FEE_RATE")
+    parser.add_argument("--concurrency", type=_floats, help="MAX_CONCURRENT_TRADES")
+    parser.add_argument("--rate-limit", type=_floats, help="secondes min entre deux trades")
+    parser.add_argument("--balance", type=float, default=INITIAL_BALANCE, help="solde initial (SOL)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--out", default=None, help="CSV de toutes les configurations")
+    args = parser.parse_args()
+
+    paths = load_paths(args.data)
+    grid = make_grid(hold=args.hold, size=args.size, slip_buy=args.slip_buy, slip_sell=args.slip_sell,
+                     fee=args.fee, concurrency=args.concurrency, rate_limit=args.rate_limit)
+    n = len(grid["hold"])
+    print(f"▶️ {len(paths)} mints, {paths.span / 60:.0f} min de données, {n} configurations, {args.workers} processus")
+
+    start = time.perf_counter()
+    results = sweep(paths, grid, workers=args.workers, initial_balance=args.balance)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {n} configurations en {elapsed:.2f}s ({n / elapsed * 60:,.0f}/min)" if elapsed > 0 else "✅")
+
+    if args.out:
+        results.to_csv(args.out, index=False)
+        print(f"💾 {args.out}")
+    print(f"\n--- Top {args.top} (revenu total) ---")
+    for _, row in results.sort_values("revenue_total", ascending=False).head(args.top).iterrows():
+        print(_format_row(row))
+
+
+if __name__ == "__main__":
+    main()
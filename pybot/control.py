@@ -0,0 +1,294 @@
+import asyncio
+import ctypes
+import ctypes.util
+import json
+import os
+import struct
+import urllib.request
+
+from aiohttp import web
+
+from pybot.journal import write_atomic
+
+
+# ================== RÉGLAGES À CHAUD ==================
+class BotControl:
+    """
+    Réglages du bot modifiables à chaud (API locale ou control.json), sans redémarrage :
+    les positions ouvertes ne sont pas touchées, les nouvelles valeurs s'appliquent aux
+    trades suivants.
+
+    - running : False = plus aucune nouvelle paire admise (les trades en cours continuent)
+    - trade_size_sol, hold_seconds : montant / durée max des prochains trades
+    - max_concurrent_trades : nombre de slots d'admission
+    """
+
+    FIELDS = {
+        "running": bool,
+        "trade_size_sol": float,
+        "hold_seconds": float,
+        "max_concurrent_trades": int,
+    }
+
+    def __init__(self, trade_size_sol: float, hold_seconds: float, max_concurrent_trades: int,
+                 running: bool = True, on_change=None):
+        self.running = running
+        self.trade_size_sol = trade_size_sol
+        self.hold_seconds = hold_seconds
+        self.max_concurrent_trades = max_concurrent_trades
+        self.on_change = on_change   # callback(changes: dict, source: str)
+        self._resumed = None         # asyncio.Event, créé dans l'event loop
+
+    def _validate(self, values: dict) -> dict:
+        clean = {}
+        for key, value in values.items():
+            if key not in self.FIELDS:
+                raise ValueError(f"réglage inconnu : {key}")
+            kind = self.FIELDS[key]
+            if kind is bool:
+                if not isinstance(value, bool):
+                    raise ValueError(f"{key} doit être true/false")
+            else:
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise ValueError(f"{key} doit être un nombre")
+                value = kind(value)
+                if value <= 0:
+                    raise ValueError(f"{key} doit être > 0")
+            clean[key] = value
+        return clean
+
+    def update(self, values: dict, source: str = "api") -> dict:
+        """Applique les réglages (ValueError si invalides, rien n'est appliqué) ; renvoie ceux qui ont changé."""
+        changes = {k: v for k, v in self._validate(values).items() if getattr(self, k) != v}
+        for key, value in changes.items():
+            setattr(self, key, value)
+        if "running" in changes and self._resumed is not None:
+            if self.running:
+                self._resumed.set()
+            else:
+                self._resumed.clear()
+        if changes and self.on_change is not None:
+            self.on_change(changes, source)
+        return changes
+
+    async def wait_running(self):
+        """Retourne tout de suite si le bot tourne, sinon attend la reprise (pas de polling)."""
+        if self._resumed is None:
+            self._resumed = asyncio.Event()
+            if self.running:
+                self._resumed.set()
+        await self._resumed.wait()
+
+    def snapshot(self) -> dict:
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+
+# ================== API LOCALE ==================
+class ControlServer:
+    """
+    API HTTP locale (127.0.0.1 par défaut) :
+
+        GET  /state               réglages + état courant (compteurs, admission...)
+        POST /pause, /resume
+        POST /config {"trade_size_sol": 0.1, "hold_seconds": 20, "max_concurrent_trades": 3}
+        GET  /metrics             métriques au format texte Prometheus (si `metrics` est fourni)
+
+    `state` : callable sans argument renvoyant un dict sérialisable (l'état du bot).
+    `metrics` : pybot.metrics.Registry.
+    Chaque changement est recopié dans `control_file` (survit à un redémarrage, et le
+    fichier surveillé ne ramène jamais d'anciennes valeurs).
+    """
+
+    def __init__(self, control: BotControl, state=None, host: str = "127.0.0.1", port: int = 8765,
+                 control_file: str = None, metrics=None):
+        self.control = control
+        self.state = state
+        self.host = host
+        self.port = port
+        self.control_file = control_file
+        self.metrics = metrics
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/state", self._get_state),
+            web.post("/pause", self._pause),
+            web.post("/resume", self._resume),
+            web.post("/config", self._config),
+        ])
+        if metrics is not None:
+            self.app.add_routes([web.get("/metrics", self._get_metrics)])
+
+    def _payload(self) -> dict:
+        payload = {"control": self.control.snapshot()}
+        if self.state is not None:
+            payload.update(self.state())
+        return payload
+
+    async def _get_state(self, request):
+        return web.json_response(self._payload())
+
+    async def _get_metrics(self, request):
+        return web.Response(text=self.metrics.render(), content_type="text/plain",
+                            headers={"X-Prometheus-Format": "0.0.4"})
+
+    async def _apply(self, values: dict):
+        if self.control.update(values, source="api") and self.control_file:
+            await asyncio.get_running_loop().run_in_executor(None, self._persist, self.control.snapshot())
+        return web.json_response(self._payload())
+
+    def _persist(self, snapshot: dict):
+        try:
+            with open(self.control_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        data.update(snapshot)
+        write_atomic(self.control_file, json.dumps(data))
+
+    async def _pause(self, request):
+        return await self._apply({"running": False})
+
+    async def _resume(self, request):
+        return await self._apply({"running": True})
+
+    async def _config(self, request):
+        try:
+            values = await request.json()
+            if not isinstance(values, dict):
+                raise ValueError("objet JSON attendu")
+            return await self._apply(values)
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+
+    async def run(self):
+        runner = web.AppRunner(self.app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+
+def request_control(path: str, payload: dict = None, base_url: str = "http://127.0.0.1:8765",
+                    timeout: float = 1.0):
+    """Appel synchrone de l'API (dashboards Streamlit) ; None si le bot ne répond pas."""
+    data = None if path == "/state" else json.dumps(payload or {}).encode()
+    req = urllib.request.Request(base_url + path, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read())
+    except (OSError, ValueError):
+        return None
+
+
+# ================== SURVEILLANCE DE control.json ==================
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+_EVENT = struct.Struct("iIII")
+
+
+def _inotify(directory: str):
+    """fd inotify non bloquant sur `directory` (Linux), None si indisponible (Windows, macOS...)."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class ControlFileWatcher:
+    """
+    Applique control.json à chaque modification : inotify sur le dossier (remplacements
+    atomiques compris) quand il est disponible, sinon un os.stat toutes les `poll_interval` s.
+    Plus aucune lecture de fichier dans la boucle d'admission.
+    """
+
+    def __init__(self, path: str, control: BotControl, poll_interval: float = 1.0, print_fn=print):
+        self.path = os.path.abspath(path)
+        self.control = control
+        self.poll_interval = poll_interval
+        self.print_fn = print_fn
+        self.reloads = 0
+
+    def load(self):
+        """Lit et applique le fichier (absent ou invalide = ignoré)."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.print_fn(f"⚠️ {os.path.basename(self.path)} illisible : {e}")
+            return
+        values = {k: v for k, v in data.items() if k in BotControl.FIELDS} if isinstance(data, dict) else {}
+        try:
+            self.control.update(values, source="file")
+        except ValueError as e:
+            self.print_fn(f"⚠️ {os.path.basename(self.path)} : {e}")
+        self.reloads += 1
+
+    def _mtime(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    async def run(self):
+        self.load()
+        loop = asyncio.get_running_loop()
+        fd = _inotify(os.path.dirname(self.path))
+        if fd is None or not hasattr(loop, "add_reader"):
+            await self._poll()
+            return
+        name = os.fsencode(os.path.basename(self.path))
+        changed = asyncio.Event()
+
+        def on_readable():
+            try:
+                buf = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset + _EVENT.size <= len(buf):
+                _, _, _, length = _EVENT.unpack_from(buf, offset)
+                offset += _EVENT.size
+                if buf[offset:offset + length].rstrip(b"\0") == name:
+                    changed.set()
+                offset += length
+
+        try:
+            loop.add_reader(fd, on_readable)
+        except NotImplementedError:  # ProactorEventLoop (Windows)
+            os.close(fd)
+            await self._poll()
+            return
+        try:
+            while True:
+                await changed.wait()
+                await asyncio.sleep(0.05)  # regroupe les événements d'une même écriture
+                changed.clear()
+                self.load()
+        finally:
+            loop.remove_reader(fd)
+            os.close(fd)
+
+    async def _poll(self):
+        last = self._mtime()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = self._mtime()
+            if current != last:
+                last = current
+                self.load()
@@ -0,0 +1,59 @@
+"""
+Blocs Streamlit communs aux deux dashboards (main/dashboard.py et test/dashboard.py).
+"""
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+from pybot.trace import percentile_table, waterfall
+
+
+def _latency_view(df_all: pd.DataFrame):
+    """Tableau de percentiles, traces et libellés des trades tracés (None sans trace)."""
+    traced = df_all[df_all["trace"].apply(lambda t: isinstance(t, dict) and len(t) > 1)] if "trace" in df_all else pd.DataFrame()
+    if traced.empty:
+        return None
+
+    # percentiles par segment + médiane gagnants / perdants : relie les étapes lentes aux trades perdants
+    table = pd.DataFrame(percentile_table(traced["trace"])).set_index("étape")
+    for label, subset in (("p50 gagnants (ms)", traced[traced["outcome"] == "success"]),
+                          ("p50 perdants (ms)", traced[traced["outcome"] != "success"])):
+        p50 = {row["étape"]: row["p50 (ms)"] for row in percentile_table(subset["trace"], pcts=(50,))}
+        table[label] = table.index.map(lambda k: p50.get(k))
+
+    labels = [
+        f"{row.get('time', '')} | {row.get('outcome', '')} | {str(row.get('mint', ''))[-12:]} | {float(row.get('pnl') or 0):+.4f} SOL"
+        for _, row in traced.iterrows()
+    ]
+    return table, list(traced["trace"]), labels
+
+
+def render_latency(history):
+    """
+    "Latence par étape" : percentiles par segment des traces du journal (avec la médiane
+    des gagnants et des perdants), puis le waterfall d'un trade choisi. `history` :
+    pybot.history.TradeHistory ; le tableau et les libellés sont recalculés seulement quand
+    l'historique change de version (comme render_cache dans test/dashboard.py).
+    """
+    key = (history.tail.path, history.run, history.version)
+    cached = st.session_state.get("latency_cache")
+    if cached is None or cached[0] != key:
+        cached = st.session_state["latency_cache"] = (key, _latency_view(history.all))
+    view = cached[1]
+    if view is None:
+        st.info("Aucune trace de latence pour l'instant.")
+        return
+    table, traces, labels = view
+    st.table(table)
+
+    choice = st.selectbox("Trade", list(range(len(traces)))[::-1], format_func=lambda i: labels[i])
+    with_hold = st.checkbox("Inclure la détention", value=False)
+    rows = waterfall(traces[choice], skip=() if with_hold else ("hold_end",))
+    if rows:
+        chart = alt.Chart(pd.DataFrame(rows)).mark_bar().encode(
+            x=alt.X("début (ms):Q", title="ms depuis la réception WS"),
+            x2="fin (ms):Q",
+            y=alt.Y("étape:N", sort=None, title=None),
+            tooltip=["étape", "durée (ms)"],
+        )
+        st.altair_chart(chart, use_container_width=True)
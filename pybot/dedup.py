@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import struct
+import time
+
+MAGIC = b"PYBOTBLM1"
+
+
+def bloom_params(capacity: int, fp_rate: float) -> tuple:
+    """(bits, nb de hash) optimaux pour `capacity` éléments à `fp_rate` de faux positifs."""
+    bits = int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+    hashes = max(1, int(round(bits / capacity * math.log(2))))
+    return bits, hashes
+
+
+class SeenMints:
+    """
+    Mints déjà vus, mémoire fixe : filtre de Bloom à deux générations.
+    La génération courante reçoit les ajouts ; quand elle contient `capacity` mints
+    (ou a plus de `max_age` secondes), elle devient la précédente et l'ancienne précédente
+    est oubliée. Un mint est "vu" s'il est dans l'une des deux : on se souvient donc au
+    moins des `capacity` derniers mints / de la dernière fenêtre `max_age`.
+
+    Chaque génération est dimensionnée pour fp_rate / 2, ce qui borne le taux de faux
+    positifs global (un faux positif = un nouveau token ignoré) à ~fp_rate.
+    Taille mémoire : 2 x bloom_params(capacity, fp_rate / 2)[0] bits, quel que soit le trafic.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, fp_rate: float = 0.001, max_age: float = 0.0, path: str = None):
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.max_age = max_age
+        self.path = path
+        self.bits, self.hashes = bloom_params(capacity, fp_rate / 2)
+        self._nbytes = (self.bits + 7) // 8
+        self.current = bytearray(self._nbytes)
+        self.previous = bytearray(self._nbytes)
+        self.count = 0
+        self.started_at = time.time()
+        self.rotations = 0
+        self._dirty = False
+        if path:
+            self.load()
+
+    @property
+    def memory_bytes(self) -> int:
+        return 2 * self._nbytes
+
+    # ---------- hash ----------
+    def _positions(self, mint: str):
+        digest = hashlib.blake2b(mint.encode(), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        h2 |= 1
+        bits = self.bits
+        return [(h1 + i * h2) % bits for i in range(self.hashes)]
+
+    @staticmethod
+    def _test(array: bytearray, positions) -> bool:
+        for p in positions:
+            if not array[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    # ---------- API ----------
+    def __contains__(self, mint: str) -> bool:
+        positions = self._positions(mint)
+        return self._test(self.current, positions) or self._test(self.previous, positions)
+
+    def add_if_new(self, mint: str) -> bool:
+        """Ajoute le mint ; renvoie True s'il n'avait (probablement) jamais été vu."""
+        positions = self._positions(mint)
+        if self._test(self.current, positions):
+            return False
+        seen_before = self._test(self.previous, positions)
+        self._maybe_rotate()
+        current = self.current
+        for p in positions:
+            current[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+        self._dirty = True
+        return not seen_before
+
+    def add(self, mint: str):
+        self.add_if_new(mint)
+
+    def _maybe_rotate(self):
+        expired = self.max_age and time.time() - self.started_at >= self.max_age
+        if self.count >= self.capacity or expired:
+            self.previous = self.current
+            self.current = bytearray(self._nbytes)
+            self.count = 0
+            self.started_at = time.time()
+            self.rotations += 1
+
+    # ---------- persistance ----------
+    def _header(self) -> bytes:
+        return json.dumps({
+            "bits": self.bits,
+            "hashes": self.hashes,
+            "count": self.count,
+            "started_at": self.started_at,
+        }).encode()
+
+    def save(self):
+        if not self.path:
+            return
+        header = self._header()
+        current, previous = bytes(self.current), bytes(self.previous)
+        self._dirty = False
+        self._write(header, current, previous)
+
+    def _write(self, header: bytes, current: bytes, previous: bytes):
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header)
+            f.write(current)
+            f.write(previous)
+        os.replace(tmp, self.path)
+
+    def load(self) -> bool:
+        """Recharge l'état sauvegardé (ignoré si absent ou dimensionné différemment)."""
+        try:
+            with open(self.path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return False
+                (size,) = struct.unpack("<I", f.read(4))
+                header = json.loads(f.read(size))
+                if header["bits"] != self.bits or header["hashes"] != self.hashes:
+                    return False
+                current = bytearray(f.read(self._nbytes))
+                previous = bytearray(f.read(self._nbytes))
+        except (OSError, ValueError, KeyError, struct.error):
+            return False
+        if len(current) != self._nbytes or len(previous) != self._nbytes:
+            return False
+        self.current, self.previous = current, previous
+        self.count = header.get("count", 0)
+        self.started_at = header.get("started_at", time.time())
+        return True
+
+    async def run(self, every: float = 30.0):
+        """Sauvegarde périodique hors event loop (copie des bits dans la boucle, écriture en thread)."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(every)
+            if self.path and self._dirty:
+                header = self._header()
+                current, previous = bytes(self.current), bytes(self.previous)
+                self._dirty = False
+                try:
+                    await loop.run_in_executor(None, self._write, header, current, previous)
+                except Exception as e:
+                    self._dirty = True
+                    print(f"⚠️ Sauvegarde des mints vus impossible : {e}", flush=True)
@@ -0,0 +1,224 @@
+import collections
+import time
+
+from pybot.stats import percentile
+
+
+# ================== COMPTABILITÉ DU SIMULATEUR ==================
+class SimBuy:
+    __slots__ = ("amount_sol", "amount_token", "amount_raw", "fee", "tax", "cost", "price")
+
+    def __init__(self, amount_sol, amount_token, amount_raw, fee, tax, cost, price):
+        self.amount_sol = amount_sol      # SOL investis (hors frais)
+        self.amount_token = amount_token  # tokens reçus, slippage déduit
+        self.amount_raw = amount_raw      # idem en unités de base (montant à revendre)
+        self.fee = fee
+        self.tax = tax
+        self.cost = cost                  # SOL débités : montant + frais + taxe
+        self.price = price                # SOL par token
+
+
+class SimSell:
+    __slots__ = ("sol_received", "value", "fee", "tax", "pnl", "price", "rug")
+
+    def __init__(self, sol_received, value, fee, tax, pnl, price, rug):
+        self.sol_received = sol_received  # SOL de la quote (hors slippage)
+        self.value = value                # SOL reçus, slippage déduit (avant frais)
+        self.fee = fee
+        self.tax = tax
+        self.pnl = pnl
+        self.price = price                # SOL par token
+        self.rug = rug                    # plus de liquidité : tout le coût est perdu
+
+
+class SimExecutor:
+    """
+    Exécuteur fictif : fills calculés sur une quote Jupiter (format jupiter.py : out_amount,
+    price_per_token) avec slippage, frais et taxe fixes, sur un solde fictif. Comptabilité de
+    simulate_trade (test/test.py), réutilisée par la simulation fantôme du bot live.
+    """
+
+    def __init__(self, balance: float, fee_rate: float, slippage_buy: float, slippage_sell: float,
+                 tax_rate: float = 0.0):
+        self.balance = balance
+        self.initial_balance = balance
+        self.fee_rate = fee_rate
+        self.slippage_buy = slippage_buy
+        self.slippage_sell = slippage_sell
+        self.tax_rate = tax_rate
+        self.revenue = 0.0
+        self.trades = 0
+        self.rugs = 0
+
+    def buy_fill(self, quote: dict, amount_sol: float, decimals: int):
+        """Fill d'achat de `amount_sol` SOL au prix de `quote` ; None si prix / quantité invalides."""
+        if not quote or quote.get("out_amount", 0) <= 0:
+            return None
+        amount_token = quote["out_amount"] / (10 ** decimals) * (1 - self.slippage_buy)
+        if quote.get("price_per_token", 0) <= 0 or amount_token <= 0:
+            return None
+        fee = amount_sol * self.fee_rate
+        tax = amount_sol * self.tax_rate
+        return SimBuy(amount_sol, amount_token, int(amount_token * (10 ** decimals)), fee, tax,
+                      amount_sol + fee + tax, amount_sol / amount_token)
+
+    def open(self, buy: SimBuy) -> bool:
+        """Débite le coût de l'achat ; False (rien débité) si le solde ne suffit pas."""
+        if self.balance < buy.cost:
+            return False
+        self.balance -= buy.cost
+        return True
+
+    def cancel(self, buy: SimBuy):
+        """Annule un achat ouvert (coût recrédité)."""
+        self.balance += buy.cost
+
+    def close(self, buy: SimBuy, quote: dict) -> SimSell:
+        """Vente de toute la position au prix de `quote` ; sans quote valide = rug (coût perdu)."""
+        self.trades += 1
+        if not quote or "error" in quote or quote.get("out_amount", 0) <= 0:
+            self.rugs += 1
+            self.revenue -= buy.cost
+            return SimSell(0.0, 0.0, 0.0, 0.0, -buy.cost, 0.0, True)
+        sol_received = quote["out_amount"] / 1e9
+        value = sol_received * (1 - self.slippage_sell)
+        fee = value * self.fee_rate
+        tax = value * self.tax_rate
+        pnl = value - buy.cost - fee - tax
+        self.balance += value - fee - tax
+        self.revenue += pnl
+        return SimSell(sol_received, value, fee, tax, pnl, sol_received / buy.amount_token, False)
+
+
+# ================== SIMULATION FANTÔME ==================
+def quote_from_swap(result: dict):
+    """Quote sur laquelle le swap live a été construit (quoteInAmountRaw / quoteOutAmountRaw de swap.ts)."""
+    try:
+        in_amount = int(result["quoteInAmountRaw"])
+        out_amount = int(result["quoteOutAmountRaw"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return {
+        "in_amount": in_amount,
+        "out_amount": out_amount,
+        "price_per_token": out_amount / in_amount if in_amount else 0,
+    }
+
+
+def _gap(live, expected):
+    return live / expected - 1 if live and expected else None
+
+
+class ShadowTrade:
+    __slots__ = ("mint", "buy", "quote_out", "live_raw")
+
+    def __init__(self, mint, buy, quote_out, live_raw):
+        self.mint = mint
+        self.buy = buy              # SimBuy
+        self.quote_out = quote_out  # tokens bruts de la quote d'achat live
+        self.live_raw = live_raw    # tokens bruts reçus en live (None en dry-run)
+
+
+class ShadowBook:
+    """
+    Simulation fantôme dans le bot live : chaque trade live est aussi comptabilisé par un
+    SimExecutor, sur les quotes mêmes des swaps live (pas de requête en plus, rien d'attendu
+    sur le chemin live). Mesure, trade par trade, l'écart entre fill réel et fill simulé et
+    le slippage réel par rapport à la quote (à comparer à SLIPPAGE_RATE_BUY / _SELL).
+    """
+
+    def __init__(self, executor: SimExecutor, samples: int = 1000):
+        self.executor = executor
+        self.trades = 0
+        self.skipped = 0                                   # pas de quote exploitable ou solde fictif insuffisant
+        self.live_revenue = 0.0
+        self.gaps = {
+            name: collections.deque(maxlen=samples)
+            for name in ("buy_fill", "sell_fill", "buy_slippage", "sell_slippage")
+        }
+        self.overhead = 0.0                                # s cumulées dans buy() / sell()
+
+    def _sample(self, name: str, value):
+        if value is not None:
+            self.gaps[name].append(value)
+
+    def buy(self, mint: str, decimals: int, amount_sol: float, live: dict):
+        """Achat fantôme sur la quote du swap d'achat live `live` ; None si pas simulable."""
+        started = time.perf_counter()
+        try:
+            quote = quote_from_swap(live)
+            buy = self.executor.buy_fill(quote, amount_sol, decimals)
+            if buy is None or not self.executor.open(buy):
+                self.skipped += 1
+                return None
+            live_raw = int(live["outAmountRaw"]) if live.get("outAmountRaw") else None
+            self._sample("buy_fill", _gap(live_raw, buy.amount_raw))
+            self._sample("buy_slippage", _gap(live_raw, quote["out_amount"]))
+            return ShadowTrade(mint, buy, quote["out_amount"], live_raw)
+        finally:
+            self.overhead += time.perf_counter() - started
+
+    def cancel(self, trade: ShadowTrade):
+        """Trade live abandonné avant sa clôture (vente en échec, annulation) : achat fantôme annulé."""
+        if trade is None:
+            return
+        self.executor.cancel(trade.buy)
+        self.skipped += 1
+
+    def sell(self, trade: ShadowTrade, live: dict, live_pnl: float):
+        """
+        Vente fantôme sur la quote du swap de vente live, ramenée à la quantité simulée ;
+        renvoie le record joint au trade dans le journal (None si pas de quote live).
+        """
+        started = time.perf_counter()
+        try:
+            quote = quote_from_swap(live)
+            if quote is None or not quote["in_amount"]:
+                # swap live sans quote connue : rien à comparer
+                self.executor.cancel(trade.buy)
+                self.skipped += 1
+                return None
+            quoted_sol = quote["out_amount"] / 1e9
+            # la quote live vend les tokens réellement reçus ; la position simulée n'en a pas le même nombre
+            quote["out_amount"] = quote["out_amount"] * trade.buy.amount_raw // quote["in_amount"]
+            sell = self.executor.close(trade.buy, quote)
+            live_sol = int(live["outAmountRaw"]) / 1e9 if live.get("outAmountRaw") else None
+            if not sell.rug:
+                # modèle appliqué à la quantité vendue en live (la quote est linéaire en quantité)
+                self._sample("sell_fill", _gap(live_sol, quoted_sol * (1 - self.executor.slippage_sell)))
+                self._sample("sell_slippage", _gap(live_sol, quoted_sol))
+            self.trades += 1
+            self.live_revenue += live_pnl
+            return {
+                "sim_pnl": sell.pnl,
+                "live_pnl": live_pnl,
+                "sim_tokens": trade.buy.amount_raw,
+                "live_tokens": trade.live_raw,
+                "sim_sol": sell.value,
+                "live_sol": live_sol,
+                "rug": sell.rug,
+            }
+        finally:
+            self.overhead += time.perf_counter() - started
+
+    # ---------- export ----------
+    def stats(self) -> dict:
+        calls = self.trades * 2 + self.skipped
+        return {
+            "trades": self.trades,
+            "skipped": self.skipped,
+            "sim_revenue": round(self.executor.revenue, 6),
+            "live_revenue": round(self.live_revenue, 6),
+            "sim_balance": round(self.executor.balance, 6),
+            **{f"{name}_p50": round(percentile(values, 50), 4) for name, values in self.gaps.items()},
+            "overhead_us": round(self.overhead / calls * 1e6, 1) if calls else 0.0,
+        }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (
+            f"{s['trades']} trades ({s['skipped']} non simulés) | PnL live {s['live_revenue']:+.4f} SOL, "
+            f"simulé {s['sim_revenue']:+.4f} SOL | fill réel / simulé p50 : achat {s['buy_fill_p50']:+.2%}, "
+            f"vente {s['sell_fill_p50']:+.2%} | slippage réel p50 : achat {s['buy_slippage_p50']:+.2%}, "
+            f"vente {s['sell_slippage_p50']:+.2%} | {s['overhead_us']:.0f}µs/appel"
+        )
@@ -0,0 +1,104 @@
+import asyncio
+
+
+class ExitRules:
+    """
+    Conditions de sortie d'une position, en fraction de la valeur d'entrée (0.3 = +30 %).
+    0 / None désactive une condition ; max_hold est toujours actif.
+
+    - take_profit : valeur >= entrée * (1 + take_profit)
+    - stop_loss : valeur <= entrée * (1 - stop_loss)
+    - trailing_stop : armé dès que le gain atteint trailing_arm, se déclenche si la valeur
+      retombe de trailing_stop sous le plus haut atteint
+    - liquidity_misses : N quotes consécutives sans route = liquidité disparue
+    - max_hold : durée max de détention (s)
+    """
+
+    __slots__ = ("take_profit", "stop_loss", "trailing_stop", "trailing_arm", "liquidity_misses", "max_hold")
+
+    def __init__(self, max_hold: float, take_profit: float = None, stop_loss: float = None,
+                 trailing_stop: float = None, trailing_arm: float = 0.0, liquidity_misses: int = 2):
+        self.max_hold = max_hold
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        self.trailing_stop = trailing_stop
+        self.trailing_arm = trailing_arm
+        self.liquidity_misses = liquidity_misses
+
+
+class ExitDecision:
+    __slots__ = ("reason", "update", "change", "peak", "held", "updates")
+
+    def __init__(self, reason, update, change, peak, held, updates):
+        self.reason = reason      # "take_profit" | "stop_loss" | "trailing_stop" | "liquidity" | "max_hold"
+        self.update = update      # PriceUpdate déclencheur (None pour max_hold sans quote)
+        self.change = change      # variation de valeur au déclenchement (0.1 = +10 %), None si inconnue
+        self.peak = peak          # plus haute variation vue
+        self.held = held          # s
+        self.updates = updates    # quotes reçues pendant la détention
+
+    def describe(self) -> str:
+        change = f"{self.change:+.1%}" if self.change is not None else "n/a"
+        peak = f"{self.peak:+.1%}" if self.peak is not None else "n/a"
+        return f"{self.reason} après {self.held:.1f}s ({change}, plus haut {peak}, {self.updates} quotes)"
+
+
+def check_exit(rules: ExitRules, change: float, peak: float):
+    """Condition de prix déclenchée par une variation `change` (plus haut `peak`), ou None."""
+    if rules.take_profit and change >= rules.take_profit:
+        return "take_profit"
+    if rules.stop_loss and change <= -rules.stop_loss:
+        return "stop_loss"
+    if rules.trailing_stop and peak >= rules.trailing_arm:
+        if (1 + change) <= (1 + peak) * (1 - rules.trailing_stop):
+            return "trailing_stop"
+    return None
+
+
+def exit_margin(rules: ExitRules, change: float, peak: float):
+    """
+    Écart relatif entre la valeur courante et la condition de prix la plus proche (0.02 = à 2 %
+    du take-profit, du stop-loss ou du trailing stop armé), None sans condition de prix.
+    Sert de priorité au price watcher : plus l'écart est faible, plus la quote doit être fraîche.
+    """
+    margins = []
+    if rules.take_profit:
+        margins.append(rules.take_profit - change)
+    if rules.stop_loss:
+        margins.append(change + rules.stop_loss)
+    if rules.trailing_stop and peak >= rules.trailing_arm:
+        margins.append((1 + change) / ((1 + peak) * (1 - rules.trailing_stop)) - 1)
+    return max(0.0, min(margins)) if margins else None
+
+
+async def wait_exit(position, entry_value: float, rules: ExitRules) -> ExitDecision:
+    """
+    Attend la première condition de sortie sur le flux de prix `position`
+    (pybot.price_watcher.Subscription) ; `entry_value` est comparé à quote["out_amount"]
+    (même unité : lamports pour une sortie vers SOL). Réagit à chaque quote, sans attente fixe.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + rules.max_hold
+    change = peak = None
+    misses = 0
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return ExitDecision("max_hold", position.latest, change, peak, loop.time() - start, position.updates)
+        update = await position.next(timeout=remaining)
+        if update is None:
+            continue
+        if not update.quote or update.quote.get("out_amount", 0) <= 0:
+            misses += 1
+            position.margin = 0.0  # route disparue : confirmer au plus vite
+            if rules.liquidity_misses and misses >= rules.liquidity_misses:
+                return ExitDecision("liquidity", update, -1.0, peak, loop.time() - start, position.updates)
+            continue
+        misses = 0
+        change = update.quote["out_amount"] / entry_value - 1 if entry_value else 0.0
+        peak = change if peak is None else max(peak, change)
+        position.margin = exit_margin(rules, change, peak)
+        reason = check_exit(rules, change, peak)
+        if reason is not None:
+            return ExitDecision(reason, update, change, peak, loop.time() - start, position.updates)
@@ -0,0 +1,382 @@
+"""
+Fan-out : un process d'ingestion lit le flux de paires une seule fois et le diffuse à N
+process de stratégie. Chacun est un simulateur test/test.py avec ses propres réglages, son
+propre état et son dossier de sortie (trades.jsonl, stats.json, result.txt, console.log).
+Les quotes Jupiter et les fiches DexScreener des variants passent aussi par le process
+d'ingestion : une connexion WebSocket, une session HTTP et un cache partagés, quel que soit N.
+
+    python -m pybot.fanout variants.json --workdir runs/
+    python -m pybot.fanout variants.json --workdir runs/ --control-port 8800   # API du variant i : 8800 + i
+
+variants.json : {"nom": {"CONSTANTE": valeur, ...}, ...}, par exemple
+    {"hold12": {}, "hold30": {"TRADE_HOLD_SECONDS": 30}, "sl10": {"EXIT_STOP_LOSS": 0.1}}
+
+Les paires gardent leur horodatage time.monotonic() de réception (horloge commune aux
+process d'une même machine) : le transit entre process est mesuré côté variant.
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+
+from pybot.replay import DEFAULT_SIM, load_sim
+from pybot.stats import percentile
+
+REPORT_SECONDS = 60          # fréquence du résumé par variant (0 = off)
+STOP_TIMEOUT_SECONDS = 30    # attente de l'arrêt propre d'un variant avant terminate()
+
+
+def _pump(queue, loop, handle):
+    """Thread lecteur : chaque message de `queue` (multiprocessing) est remis à `handle` dans `loop` ; None = fin."""
+
+    def reader():
+        while True:
+            msg = queue.get()
+            if msg is None:
+                return
+            try:
+                loop.call_soon_threadsafe(handle, msg)
+            except RuntimeError:  # event loop fermé
+                return
+
+    thread = threading.Thread(target=reader, name="fanout-reader", daemon=True)
+    thread.start()
+    return thread
+
+
+# ================== CÔTÉ VARIANT ==================
+class QueueFeed:
+    """
+    Flux de paires d'un variant : les paires diffusées par le process d'ingestion. Remplace
+    le MultiFeed du simulateur (mêmes run / stats / summary / report), sans connexion.
+    """
+
+    def __init__(self, lag_samples: int = 1000, print_fn=print):
+        self.feeds = []                  # aucun flux propre (métriques ws_errors_total / feed_* vides)
+        self.race = {}
+        self.lag_metric = None
+        self.recorder = None
+        self.print_fn = print_fn
+        self.received = 0
+        self.dropped = 0                 # arrivées avant le démarrage de listen_pools()
+        self.transit = collections.deque(maxlen=lag_samples)  # s, réception (ingestion) -> remise au variant
+        self._on_pair = None
+
+    def deliver(self, mint: str, decimals: int, received_at: float):
+        if self._on_pair is None:
+            self.dropped += 1
+            return
+        self.received += 1
+        self.transit.append(time.monotonic() - received_at)
+        self._on_pair(mint, decimals, received_at)
+
+    async def run(self, on_pair):
+        self._on_pair = on_pair
+        try:
+            await asyncio.get_event_loop().create_future()
+        finally:
+            self._on_pair = None
+
+    @property
+    def errors(self) -> int:
+        return 0
+
+    def stats(self) -> dict:
+        return {
+            "fanout": {
+                "received": self.received,
+                "dropped": self.dropped,
+                "transit_p50": round(percentile(self.transit, 50), 4),
+                "transit_p99": round(percentile(self.transit, 99), 4),
+            }
+        }
+
+    def summary(self) -> str:
+        s = self.stats()["fanout"]
+        return (f"{s['received']} paires reçues | transit p50 {s['transit_p50'] * 1e3:.1f}ms "
+                f"p99 {s['transit_p99'] * 1e3:.1f}ms")
+
+    async def report(self, every: float):
+        while True:
+            await asyncio.sleep(every)
+            self.print_fn(f"📥 Ingestion fan-out : {self.summary()}")
+
+
+class VariantClient:
+    """
+    Côté variant : reçoit paires et réponses du process d'ingestion (`inbound`), lui envoie
+    ses requêtes de quotes / fiches DexScreener (`outbound`, partagée entre variants).
+    """
+
+    def __init__(self, index: int, inbound, outbound, quote_latency=None):
+        self.index = index
+        self.inbound = inbound
+        self.outbound = outbound
+        self.quote_latency = quote_latency   # pybot.metrics.Histogram (optionnel)
+        self.feed = QueueFeed()
+        self.requests = collections.Counter()
+        self._pending = {}                   # id -> Future
+        self._ids = itertools.count()
+        self._stop = None
+
+    def _handle(self, msg):
+        kind = msg[0]
+        if kind == "pair":
+            self.feed.deliver(*msg[1:])
+        elif kind == "reply":
+            fut = self._pending.pop(msg[1], None)
+            if fut is not None and not fut.done():
+                fut.set_result(msg[2])
+        elif kind == "stop":
+            self._stop.set()
+
+    def call(self, kind: str, *args):
+        """Future de la réponse du process d'ingestion (une annulation n'annule pas la requête là-bas)."""
+        request_id = next(self._ids)
+        fut = self._pending[request_id] = asyncio.get_event_loop().create_future()
+        self.requests[kind] += 1
+        self.outbound.put((self.index, kind, request_id, args))
+        return fut
+
+    async def quote(self, input_mint, output_mint, amount):
+        loop = asyncio.get_event_loop()
+        started = loop.time()
+        try:
+            return await self.call("quote", input_mint, output_mint, int(amount))
+        finally:
+            if self.quote_latency is not None:
+                self.quote_latency.observe(loop.time() - started)
+
+    async def run(self, main):
+        """Exécute `main` (coroutine du simulateur) jusqu'à l'ordre d'arrêt du process d'ingestion."""
+        loop = asyncio.get_event_loop()
+        self._stop = asyncio.Event()
+        _pump(self.inbound, loop, self._handle)
+        task = asyncio.ensure_future(main)
+        stop = asyncio.ensure_future(self._stop.wait())
+        try:
+            await asyncio.wait([task, stop], return_when=asyncio.FIRST_COMPLETED)
+            if task.done():
+                task.result()
+        finally:
+            stop.cancel()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            # trades et requêtes encore en cours
+            others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in others:
+                t.cancel()
+            await asyncio.gather(*others, return_exceptions=True)
+            for fut in self._pending.values():
+                fut.cancel()
+
+
+class RemoteDexScreener:
+    """dexscreener (fetch_dexscreener.py) d'un variant : fiches servies par le process d'ingestion."""
+
+    def __init__(self, client: VariantClient):
+        self.client = client
+
+    async def get(self, mint: str, timeout: float = 20.0):
+        return await self.client.call("dexscreener", mint, timeout)
+
+    async def close(self):
+        pass
+
+
+def run_variant(index: int, name: str, overrides: dict, workdir: str, sim_path: str, inbound, outbound,
+                control_port: int = 0):
+    """Process de stratégie : test/test.py avec `overrides`, dans `workdir`, alimenté par le process d'ingestion."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C : arrêt ordonné par le process d'ingestion
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    sys.stdout = sys.stderr = open("console.log", "a", buffering=1, encoding="utf-8")
+    print(f"▶️ Variant {name} : {json.dumps(overrides)}", flush=True)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)  # avant le chargement : le simulateur crée ses primitives asyncio à la construction
+    try:
+        sim = load_sim(sim_path, dict(overrides, RECORD_FILE=None, CONTROL_PORT=control_port))
+        client = VariantClient(index, inbound, outbound, quote_latency=sim.jupiter.quote_latency)
+        sim.pipeline.pair_feed = client.feed
+        sim.jupiter.quote_cache = sim.jupiter.QuoteCache(client.quote)
+        sim.dexscreener_api.dexscreener = RemoteDexScreener(client)
+        loop.run_until_complete(client.run(sim.run()))
+        sim.print_and_write_end_of_trade(None)
+        print("\n" + sim.stats_header(), flush=True)
+    finally:
+        loop.close()
+
+
+# ================== CÔTÉ INGESTION ==================
+class Variant:
+    __slots__ = ("name", "workdir", "process", "inbound")
+
+    def __init__(self, name, workdir, process, inbound):
+        self.name = name
+        self.workdir = workdir
+        self.process = process
+        self.inbound = inbound
+
+
+class FanOut:
+    """
+    Process d'ingestion : `feed` (MultiFeed) est lu une fois et chaque nouvelle paire part
+    vers tous les variants vivants ; leurs requêtes sont servies par `quote` (async fn(in,
+    out, amount)) et `dexscreener` (async fn(mint, timeout)), avec le cache du process.
+    Les variants sont des process "spawn" (même comportement sous Windows et Linux).
+    """
+
+    def __init__(self, variants: dict, workdir: str, feed, quote, dexscreener, sim_path: str = DEFAULT_SIM,
+                 control_port: int = 0, print_fn=print):
+        self.variants = dict(variants)
+        self.workdir = os.path.abspath(workdir)
+        self.feed = feed
+        self.quote = quote
+        self.dexscreener = dexscreener
+        self.sim_path = os.path.abspath(sim_path)
+        self.control_port = control_port
+        self.print_fn = print_fn
+        self._ctx = multiprocessing.get_context("spawn")
+        self.requests = self._ctx.Queue()   # variants -> ingestion, partagée
+        self.workers = []
+        self.pairs = 0
+        self.served = collections.Counter()
+        self.errors = 0
+
+    def start(self):
+        for index, (name, overrides) in enumerate(self.variants.items()):
+            workdir = os.path.join(self.workdir, name)
+            inbound = self._ctx.Queue()
+            port = self.control_port + index if self.control_port else 0
+            process = self._ctx.Process(
+                target=run_variant, name=f"pybot-{name}", daemon=True,
+                args=(index, name, overrides, workdir, self.sim_path, inbound, self.requests, port))
+            process.start()
+            self.workers.append(Variant(name, workdir, process, inbound))
+            self.print_fn(f"🧪 Variant {name} (pid {process.pid}) -> {workdir}")
+
+    def _on_pair(self, mint: str, decimals: int, received_at: float):
+        self.pairs += 1
+        for worker in self.workers:
+            if worker.process.is_alive():
+                worker.inbound.put(("pair", mint, decimals, received_at))
+
+    def _on_request(self, msg):
+        index, kind, request_id, args = msg
+        self.served[kind] += 1
+        asyncio.ensure_future(self._serve(index, kind, request_id, args))
+
+    async def _serve(self, index: int, kind: str, request_id: int, args):
+        try:
+            result = await (self.quote(*args) if kind == "quote" else self.dexscreener(*args))
+        except Exception as e:
+            self.errors += 1
+            result = None
+            self.print_fn(f"⚠️ Fan-out : {kind} {args} : {e}")
+        self.workers[index].inbound.put(("reply", request_id, result))
+
+    async def run(self):
+        """Lit le flux et sert les variants (jusqu'à annulation)."""
+        _pump(self.requests, asyncio.get_event_loop(), self._on_request)
+        await self.feed.run(self._on_pair)
+
+    def stop(self, timeout: float = STOP_TIMEOUT_SECONDS):
+        """Arrêt ordonné des variants (journal et stats écrits), terminate() au-delà de `timeout` s."""
+        for worker in self.workers:
+            worker.inbound.put(("stop",))
+            worker.inbound.put(None)
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                self.print_fn(f"⚠️ Variant {worker.name} ne répond pas : terminate()")
+                worker.process.terminate()
+                worker.process.join()
+        self.requests.put(None)
+
+    # ---------- export ----------
+    def variant_stats(self) -> dict:
+        """Dernier stats.json de chaque variant (écrit par son journal)."""
+        out = {}
+        for worker in self.workers:
+            try:
+                with open(os.path.join(worker.workdir, "stats.json"), encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+            state["alive"] = worker.process.is_alive()
+            out[worker.name] = state
+        return out
+
+    def summary(self) -> str:
+        lines = [f"{self.pairs} paires diffusées | requêtes servies : "
+                 + ", ".join(f"{k} {v}" for k, v in sorted(self.served.items())) + f" | {self.errors} erreurs"]
+        for name, s in self.variant_stats().items():
+            lines.append(
+                f"  {name:<16} {s.get('trade_count', 0)} trades | {s.get('revenue_total', 0.0):+.4f} SOL | "
+                f"{s.get('pending_trades', 0)} en cours{'' if s['alive'] else ' | arrêté'}")
+        return "\n".join(lines)
+
+    async def report(self, every: float):
+        while True:
+            await asyncio.sleep(every)
+            self.print_fn(f"🧪 Fan-out : {self.summary()}")
+
+
+# ================== CLI ==================
+def main():
+    parser = argparse.ArgumentParser(description="Un flux de paires, N variants du simulateur en parallèle")
+    parser.add_argument("variants", help='JSON {"nom": {"CONSTANTE": valeur}}')
+    parser.add_argument("--workdir", default="fanout", help="un sous-dossier de sortie par variant")
+    parser.add_argument("--sim", default=DEFAULT_SIM, help="script simulateur (défaut : test/test.py)")
+    parser.add_argument("--control-port", type=int, default=0, help="API de contrôle du variant i sur ce port + i")
+    parser.add_argument("--report", type=float, default=REPORT_SECONDS, help="s entre deux résumés (0 = off)")
+    args = parser.parse_args()
+
+    with open(args.variants, encoding="utf-8") as f:
+        variants = json.load(f)
+    workdir = os.path.abspath(args.workdir)
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    # config du flux et des API (PAIR_FEEDS, jupiter, dexscreener) reprise du simulateur
+    sim = load_sim(os.path.abspath(args.sim))
+    unknown = sorted({key for overrides in variants.values() for key in overrides if key not in sim.config})
+    if unknown:
+        parser.error(f"constantes inconnues dans {args.variants} : {', '.join(unknown)}")
+    fanout = FanOut(variants, workdir, sim.pipeline.pair_feed, sim.jupiter.get_cached_swap_price,
+                    lambda mint, timeout: sim.dexscreener_api.dexscreener.get(mint, timeout=timeout),
+                    sim_path=args.sim, control_port=args.control_port, print_fn=sim.pipeline.print_fn)
+    fanout.start()
+    try:
+        loop.run_until_complete(asyncio.gather(
+            fanout.run(),
+            fanout.report(args.report) if args.report else asyncio.sleep(0),
+            sim.pipeline.pair_feed.report(sim.config["INGEST_REPORT_SECONDS"])
+            if sim.config["INGEST_REPORT_SECONDS"] else asyncio.sleep(0),
+        ))
+    except KeyboardInterrupt:
+        print("\n⏹️ Fan-out arrêté.")
+    finally:
+        fanout.stop()
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.run_until_complete(sim.jupiter.close_session())
+        loop.run_until_complete(sim.dexscreener_api.dexscreener.close())
+        loop.close()
+        print(fanout.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import asyncio
+
+
+# ================== FILTRES ==================
+class Filter:
+    """
+    Un critère d'entrée, évalué sur une source de données (`source` : "dexscreener" = fiche
+    aplatie de fetch_dexscreener, "quote" = quote d'achat Jupiter). check() renvoie
+    (accepté, score dans [0, 1]) ; la valeur seuil 0 / None désactive le filtre.
+    """
+
+    name = ""
+    source = ""
+
+    def check(self, data: dict):
+        raise NotImplementedError
+
+
+def _ratio(value: float, threshold: float) -> float:
+    """Score : 0.25 au seuil, 1 à 4x le seuil."""
+    return min(1.0, value / (4 * threshold)) if threshold else 1.0
+
+
+class MinLiquidity(Filter):
+    name = "liquidity"
+    source = "dexscreener"
+
+    def __init__(self, min_usd: float):
+        self.min_usd = min_usd
+
+    def check(self, data):
+        value = float(data.get("liquidity_usd") or 0)
+        return value >= self.min_usd, _ratio(value, self.min_usd)
+
+
+class MinVolume(Filter):
+    name = "volume"
+    source = "dexscreener"
+
+    def __init__(self, min_usd_m5: float):
+        self.min_usd_m5 = min_usd_m5
+
+    def check(self, data):
+        value = float(data.get("volume_m5") or 0)
+        return value >= self.min_usd_m5, _ratio(value, self.min_usd_m5)
+
+
+class BuySellRatio(Filter):
+    """Achats / ventes sur 5 min (un token que tout le monde vend est écarté)."""
+
+    name = "txn_ratio"
+    source = "dexscreener"
+
+    def __init__(self, min_ratio: float, min_txns: int = 0):
+        self.min_ratio = min_ratio
+        self.min_txns = min_txns
+
+    def check(self, data):
+        buys = int(data.get("txns_m5_buys") or 0)
+        sells = int(data.get("txns_m5_sells") or 0)
+        ratio = buys / sells if sells else float(buys)
+        return buys + sells >= self.min_txns and ratio >= self.min_ratio, _ratio(ratio, self.min_ratio)
+
+
+class MinSocials(Filter):
+    name = "socials"
+    source = "dexscreener"
+
+    def __init__(self, min_count: int):
+        self.min_count = min_count
+
+    def check(self, data):
+        count = len(data.get("socials") or {}) + len(data.get("websites") or [])
+        return count >= self.min_count, _ratio(count, self.min_count)
+
+
+class QuoteDepth(Filter):
+    """Impact de prix de la quote d'achat (montant du trade) : liquidité trop mince = écarté."""
+
+    name = "quote_depth"
+    source = "quote"
+
+    def __init__(self, max_impact: float):
+        self.max_impact = max_impact
+
+    def check(self, data):
+        if not data.get("out_amount", data.get("outAmount")):
+            return False, 0.0
+        impact = abs(float(data.get("price_impact", data.get("priceImpactPct")) or 0))
+        return impact <= self.max_impact, 1.0 - min(1.0, impact / self.max_impact)
+
+
+# ================== PIPELINE ==================
+class Verdict:
+    __slots__ = ("passed", "score", "reason", "elapsed", "missing")
+
+    def __init__(self, passed, score, reason, elapsed, missing):
+        self.passed = passed
+        self.score = score        # moyenne des scores disponibles (priorité d'admission "score"), None sans donnée
+        self.reason = reason      # nom du filtre qui a rejeté, None si accepté
+        self.elapsed = elapsed    # s, durée de l'évaluation
+        self.missing = missing    # filtres sans donnée dans le budget
+
+
+class FilterStats:
+    __slots__ = ("evaluated", "rejected", "missing", "seconds", "max")
+
+    def __init__(self):
+        self.evaluated = 0
+        self.rejected = 0
+        self.missing = 0      # source sans donnée (pas encore indexé, pas de route) ou hors budget
+        self.seconds = 0.0    # cumul début de l'évaluation -> verdict du filtre
+        self.max = 0.0
+
+
+class FilterPipeline:
+    """
+    Étage de filtrage entre la détection et la file d'admission : les sources de chaque
+    candidat sont demandées en parallèle et chaque filtre tranche dès que sa source répond ;
+    le premier rejet arrête l'évaluation. Au-delà de `budget` s, les filtres sans réponse
+    comptent comme sans donnée.
+
+    - `sources` : {nom: async fn(mint, decimals) -> dict ou None}
+    - `on_missing` : "accept" (donnée absente = filtre ignoré) ou "reject". DexScreener indexe
+      une paire 2 à 15 s après sa création (bench/bench_dexscreener.py) : dans le budget, une
+      paire neuve est le plus souvent sans fiche, et "reject" écarterait presque tout
+    - les verdicts rendus sans donnée sont comptés à part (`missing`), ni acceptés ni rejetés
+    - `max_inflight` : évaluations simultanées max ; au-delà le candidat passe sans filtrage,
+      quel que soit `on_missing` (compté dans `overload`), plutôt que d'attendre
+    - `latency_metric` : pybot.metrics.Histogram à label "filter" (optionnel)
+    """
+
+    def __init__(self, filters, sources: dict, budget: float = 0.5, on_missing: str = "accept",
+                 max_inflight: int = 32, latency_metric=None):
+        self.filters = [f for f in filters if f is not None]
+        self.sources = sources
+        self.budget = budget
+        self.on_missing = on_missing
+        self.max_inflight = max_inflight
+        self.latency_metric = latency_metric
+        self.stats_by_filter = {f.name: FilterStats() for f in self.filters}
+        self.inflight = 0
+        self.screened = 0
+        self.accepted = 0
+        self.rejected = 0      # écartées par un filtre, sur donnée
+        self.missing = 0       # verdict rendu avec au moins un filtre sans donnée (selon `on_missing`)
+        self.overload = 0
+        self.elapsed = 0.0     # s, EWMA de la durée d'une évaluation
+
+    def _record(self, name: str, seconds: float, rejected: bool = False, missing: bool = False):
+        stats = self.stats_by_filter[name]
+        stats.evaluated += 1
+        stats.seconds += seconds
+        stats.max = max(stats.max, seconds)
+        if rejected:
+            stats.rejected += 1
+        if missing:
+            stats.missing += 1
+        if self.latency_metric is not None:
+            self.latency_metric.labels(name).observe(seconds)
+
+    async def evaluate(self, mint: str, decimals: int, **given) -> Verdict:
+        """
+        Verdict pour un candidat. `given` : données déjà en vol pour une source (ex.
+        quote="Future de la quote préchargée") : attendues sans être annulées, pas de requête en plus.
+        """
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        if not self.filters:
+            return Verdict(True, None, None, 0.0, [])
+        if self.inflight >= self.max_inflight:
+            self.overload += 1
+            return Verdict(True, None, None, 0.0, [f.name for f in self.filters])
+        self.inflight += 1
+        self.screened += 1
+        by_source = {}
+        for f in self.filters:
+            by_source.setdefault(f.source, []).append(f)
+        tasks = {}
+        owned = set()
+        for name in by_source:
+            if given.get(name) is not None:
+                tasks[asyncio.ensure_future(asyncio.shield(given[name]))] = name
+            elif name in self.sources:
+                task = asyncio.ensure_future(self.sources[name](mint, decimals))
+                tasks[task] = name
+                owned.add(task)
+        scores, missing, reason = [], [], None
+        try:
+            for name in set(by_source) - set(tasks.values()):
+                for f in by_source[name]:
+                    self._record(f.name, 0.0, missing=True)
+                    missing.append(f.name)
+            pending = set(tasks)
+            while pending and reason is None:
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, start + self.budget - loop.time()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                now = loop.time()
+                for task in done:
+                    data = None if task.cancelled() or task.exception() is not None else task.result()
+                    for f in by_source[tasks[task]]:
+                        if not data:
+                            self._record(f.name, now - start, missing=True)
+                            missing.append(f.name)
+                            continue
+                        passed, score = f.check(data)
+                        self._record(f.name, now - start, rejected=not passed)
+                        scores.append(score)
+                        if not passed and reason is None:
+                            reason = f.name
+            now = loop.time()
+            for task in pending:  # hors budget
+                for f in by_source[tasks[task]]:
+                    if reason is None:
+                        self._record(f.name, now - start, missing=True)
+                        missing.append(f.name)
+                task.cancel()
+        finally:
+            self.inflight -= 1
+            for task in owned:
+                task.cancel()
+        elapsed = loop.time() - start
+        self.elapsed += 0.2 * (elapsed - self.elapsed)
+        if reason is None and missing:
+            self.missing += 1
+            if self.on_missing != "accept":
+                reason = missing[0]
+        elif reason is None:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+        return Verdict(reason is None, sum(scores) / len(scores) if scores else None, reason, elapsed, missing)
+
+    # ---------- export ----------
+    def rejections(self) -> dict:
+        return {name: s.rejected for name, s in self.stats_by_filter.items()}
+
+    def missing_counts(self) -> dict:
+        return {name: s.missing for name, s in self.stats_by_filter.items()}
+
+    def stats(self) -> dict:
+        return {
+            "screened": self.screened,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "missing": self.missing,
+            "on_missing": self.on_missing,
+            "overload": self.overload,
+            "elapsed": round(self.elapsed, 4),
+            "filters": {
+                name: {
+                    "evaluated": s.evaluated,
+                    "rejected": s.rejected,
+                    "missing": s.missing,
+                    "avg_ms": round(s.seconds / s.evaluated * 1e3, 1) if s.evaluated else 0.0,
+                    "max_ms": round(s.max * 1e3, 1),
+                }
+                for name, s in self.stats_by_filter.items()
+            },
+        }
+
+    def summary(self) -> str:
+        s = self.stats()
+        parts = [
+            f"{name} {f['rejected']} rejets / {f['missing']} sans donnée ({f['avg_ms']:.0f}ms, max {f['max_ms']:.0f}ms)"
+            for name, f in s["filters"].items()
+        ]
+        return (
+            f"{s['accepted']}/{s['screened']} acceptées, {s['rejected']} écartées, {s['missing']} sans donnée "
+            f"({'acceptées' if self.on_missing == 'accept' else 'écartées'}) ({s['overload']} sans filtrage) | "
+            f"{s['elapsed'] * 1e3:.0f}ms | " + " | ".join(parts)
+        )
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from pybot.journal import JournalTail
+
+NUMERIC_COLUMNS = ("pnl", "buy_price", "sell_price", "amount_token", "equity_before", "equity_after")
+
+
+class TradeHistory:
+    """
+    Historique des trades clôturés d'un run, construit à partir du journal et gardé en
+    mémoire entre deux rafraîchissements du dashboard : refresh() ne parse que les
+    nouvelles lignes et les ajoute aux DataFrames existants (PnL cumulé compris).
+    """
+
+    def __init__(self, journal_path: str):
+        self.tail = JournalTail(journal_path)
+        self.run = None
+        self.reset()
+
+    def reset(self):
+        self.all = pd.DataFrame()
+        self.by_outcome = {}
+        self.cum_pnl = 0.0
+        self.version = 0
+
+    def refresh(self, run: str = None) -> int:
+        """Intègre les nouveaux trades du run ; renvoie le nombre de trades ajoutés."""
+        if run != self.run:
+            self.run = run
+            self.tail.reset()
+            self.reset()
+        entries, was_reset = self.tail.read_new()
+        if was_reset:
+            self.reset()
+
+        closes = [e for e in entries if e.get("event") == "close" and (run is None or e.get("run") == run)]
+        if not closes:
+            return 0
+
+        delta = pd.DataFrame(closes)
+        for col in NUMERIC_COLUMNS:
+            if col in delta:
+                delta[col] = pd.to_numeric(delta[col], errors="coerce")
+        delta["pnl"] = delta.get("pnl", pd.Series(0.0, index=delta.index)).fillna(0.0)
+        delta["cum_pnl"] = self.cum_pnl + delta["pnl"].cumsum()
+        self.cum_pnl = float(delta["cum_pnl"].iloc[-1])
+
+        self.all = pd.concat([self.all, delta], ignore_index=True)
+        for outcome, group in delta.groupby("outcome", sort=False):
+            previous = self.by_outcome.get(outcome)
+            self.by_outcome[outcome] = group if previous is None else pd.concat([previous, group], ignore_index=True)
+        self.version += 1
+        return len(closes)
+
+    def outcome(self, outcome: str) -> pd.DataFrame:
+        return self.by_outcome.get(outcome, pd.DataFrame())
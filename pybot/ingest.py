@@ -0,0 +1,288 @@
+import asyncio
+import collections
+import json
+import random
+import time
+
+import websockets
+
+from pybot.stats import percentile
+
+SUBSCRIBE_NEW_PAIRS = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "newPairSubscribe",
+    "params": {
+        "include_pumpfun": False
+    }
+}
+
+_WS_MAJOR = int(websockets.__version__.split(".")[0])
+
+
+def ws_connect(url: str, headers: dict, **kwargs):
+    """websockets.connect compatible avant/après websockets 14 (extra_headers -> additional_headers)."""
+    if _WS_MAJOR >= 14:
+        return websockets.connect(url, additional_headers=headers, **kwargs)
+    return websockets.connect(url, extra_headers=headers, **kwargs)
+
+
+def parse_new_pair(data: dict):
+    """(mint, decimals) d'un message newPairSubscribe, ou None si ce n'est pas une paire."""
+    pair = data.get("params", {}).get("pair", {})
+    if not pair:
+        return None
+    base = pair.get("baseToken", {})
+    mint = base.get("account")
+    if not mint:
+        return None
+    decimals = base.get("info", {}).get("decimals", 9)  # fallback 9
+    return mint, decimals
+
+
+class IngestStats:
+    """Compteurs d'ingestion : débit (EWMA), latence réception -> fin du handler, reconnexions."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.messages = 0
+        self.pairs = 0
+        self.errors = 0
+        self.reconnects = 0
+        self.rate = 0.0            # messages/s (EWMA par fenêtre d'une seconde)
+        self.handler_lag = 0.0     # s, EWMA réception -> paire transmise
+        self.max_handler_lag = 0.0
+        self.event_lag = None      # s, maintenant - blockTime (si le flux le fournit)
+        self.last_message_at = None
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def on_message(self, received_at: float, done_at: float):
+        self.messages += 1
+        self.last_message_at = received_at
+        lag = done_at - received_at
+        self.handler_lag += self.alpha * (lag - self.handler_lag)
+        if lag > self.max_handler_lag:
+            self.max_handler_lag = lag
+        self._window_count += 1
+        elapsed = done_at - self._window_start
+        if elapsed >= 1.0:
+            instant = self._window_count / elapsed
+            self.rate = instant if not self.rate else self.rate + self.alpha * (instant - self.rate)
+            self._window_start = done_at
+            self._window_count = 0
+
+    def summary(self) -> str:
+        event = f" | lag bloc {self.event_lag:.2f}s" if self.event_lag is not None else ""
+        return (
+            f"{self.messages} msgs ({self.rate:.0f}/s) | {self.pairs} paires | "
+            f"handler {self.handler_lag * 1e6:.0f}µs (max {self.max_handler_lag * 1e3:.1f}ms) | "
+            f"{self.reconnects} reconnexions | {self.errors} erreurs{event}"
+        )
+
+
+class PairFeed:
+    """
+    Connexion WebSocket SolanaStreaming auto-réparatrice : lit les messages dès qu'ils
+    arrivent (pas de sleep par message), pings keepalive, reconnexion avec backoff
+    exponentiel + jitter. Chaque nouvelle paire est passée à `on_pair(mint, decimals, received_at)`,
+    un callback synchrone et rapide (ex. put_nowait dans une queue).
+    """
+
+    def __init__(self, url: str, api_key: str, name: str = "solanastreaming", subscribe: dict = None,
+                 ping_interval: float = 20, ping_timeout: float = 20,
+                 backoff_min: float = 0.5, backoff_max: float = 30.0, print_fn=print):
+        self.url = url
+        self.api_key = api_key
+        self.name = name
+        self.subscribe = subscribe or SUBSCRIBE_NEW_PAIRS
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.print_fn = print_fn
+        self.stats = IngestStats()
+        self.connected = False
+        self.recorder = None  # pybot.recorder.Recorder : capture brute du flux (rejouable)
+
+    def _backoff(self, attempt: int) -> float:
+        # "full jitter" : évite que plusieurs clients se reconnectent en rafale
+        return random.uniform(self.backoff_min, min(self.backoff_max, self.backoff_min * (2 ** attempt)))
+
+    async def run(self, on_pair):
+        attempt = 0
+        while True:
+            try:
+                async with ws_connect(
+                    self.url,
+                    {"X-API-KEY": self.api_key},
+                    ping_interval=self.ping_interval,
+                    ping_timeout=self.ping_timeout,
+                    close_timeout=10,
+                ) as ws:
+                    await ws.send(json.dumps(self.subscribe))
+                    self.connected = True
+                    self.print_fn(f"📡 Listening {self.name} new pairs...")
+                    async for msg in ws:
+                        attempt = 0  # connexion saine : on repart du backoff minimal
+                        self._handle(msg, on_pair)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats.errors += 1
+                self.print_fn(f"⚠️ WS {self.name} error: {e}")
+            self.connected = False
+            self.stats.reconnects += 1
+            delay = self._backoff(attempt)
+            attempt += 1
+            self.print_fn(f"🔁 Reconnexion {self.name} dans {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def _handle(self, msg, on_pair):
+        received_at = time.monotonic()
+        if self.recorder is not None:
+            self.recorder.ws(msg)
+        try:
+            data = json.loads(msg)
+            parsed = parse_new_pair(data)
+            if parsed is not None:
+                self.stats.pairs += 1
+                block_time = data.get("params", {}).get("blockTime")
+                if block_time:
+                    self.stats.event_lag = time.time() - float(block_time)
+                on_pair(parsed[0], parsed[1], received_at)
+        except Exception as e:
+            self.stats.errors += 1
+            self.print_fn(f"⚠️ Inner WS error: {e}")
+        self.stats.on_message(received_at, time.monotonic())
+
+    async def report(self, every: float):
+        """Log périodique des métriques d'ingestion."""
+        while True:
+            await asyncio.sleep(every)
+            self.print_fn(f"📥 Ingestion {self.name} : {self.stats.summary()}")
+
+
+class FeedRace:
+    """Arrivées d'un flux dans MultiFeed : premières arrivées gagnées et retard sur le premier flux."""
+
+    def __init__(self, samples: int = 1000):
+        self.arrivals = 0
+        self.wins = 0
+        self.lags = collections.deque(maxlen=samples)   # s, 0 pour une arrivée gagnée
+        self.lag = 0.0                                  # s, EWMA des retards (arrivées perdues)
+
+    def on_arrival(self, lag: float):
+        self.arrivals += 1
+        self.lags.append(lag)
+        if lag == 0.0:
+            self.wins += 1
+        else:
+            self.lag += 0.2 * (lag - self.lag)
+
+    def lag_percentile(self, pct: float) -> float:
+        return percentile(self.lags, pct)
+
+
+class MultiFeed:
+    """
+    Plusieurs connexions de paires (PairFeed, ex. régions ou fournisseurs différents) tenues en
+    même temps et fusionnées en un seul flux : seule la première arrivée de chaque mint est
+    passée à `on_pair` ; un flux qui décroche ou traîne ne retarde plus la détection.
+
+    Les arrivées suivantes du même mint servent aux statistiques par flux (taux de victoire,
+    retard sur le premier). Les mints sont oubliés après `window` s (mémoire bornée) : une
+    arrivée plus tardive repasse, le dédoublonnage en aval (SeenMints) l'écarte.
+    """
+
+    def __init__(self, feeds, window: float = 120.0, lag_samples: int = 1000, lag_metric=None, print_fn=print):
+        self.feeds = list(feeds)
+        self.window = window
+        self.lag_samples = lag_samples
+        self.lag_metric = lag_metric     # pybot.metrics.Histogram à label "feed" (optionnel)
+        self.print_fn = print_fn
+        self.race = {}                   # nom du flux -> FeedRace
+        self.unique = 0
+        self._first = collections.OrderedDict()  # mint -> time.monotonic() de la première arrivée
+
+    @property
+    def recorder(self):
+        return self.feeds[0].recorder if self.feeds else None
+
+    @recorder.setter
+    def recorder(self, recorder):
+        # tous les flux sont enregistrés : les doublons sont écartés au rejeu comme en direct
+        for feed in self.feeds:
+            feed.recorder = recorder
+
+    def _race(self, name: str) -> FeedRace:
+        race = self.race.get(name)
+        if race is None:
+            race = self.race[name] = FeedRace(self.lag_samples)
+        return race
+
+    def _arrival(self, name: str, mint: str, decimals: int, received_at: float, on_pair):
+        first = self._first.get(mint)
+        if first is None:
+            self._first[mint] = received_at
+            # purge des plus anciens (insertion ordonnée)
+            limit = received_at - self.window
+            while self._first:
+                oldest = next(iter(self._first.values()))
+                if oldest >= limit:
+                    break
+                self._first.popitem(last=False)
+            self.unique += 1
+            lag = 0.0
+            on_pair(mint, decimals, received_at)
+        else:
+            lag = max(received_at - first, 1e-9)
+        self._race(name).on_arrival(lag)
+        if self.lag_metric is not None:
+            self.lag_metric.labels(name).observe(lag)
+
+    async def run(self, on_pair):
+        for feed in self.feeds:
+            self._race(feed.name)
+        await asyncio.gather(*(
+            feed.run(lambda mint, decimals, received_at, name=feed.name:
+                     self._arrival(name, mint, decimals, received_at, on_pair))
+            for feed in self.feeds
+        ))
+
+    @property
+    def errors(self) -> int:
+        return sum(feed.stats.errors for feed in self.feeds)
+
+    def stats(self) -> dict:
+        out = {}
+        for feed in self.feeds:
+            race = self._race(feed.name)
+            out[feed.name] = {
+                "connected": feed.connected,
+                "arrivals": race.arrivals,
+                "wins": race.wins,
+                "win_rate": round(race.wins / self.unique, 3) if self.unique else 0.0,
+                "lag_p50": round(race.lag_percentile(50), 4),
+                "lag_p99": round(race.lag_percentile(99), 4),
+                "reconnects": feed.stats.reconnects,
+                "errors": feed.stats.errors,
+            }
+        return out
+
+    def summary(self) -> str:
+        parts = [
+            f"{name} {s['win_rate']:.0%} premières, retard p50 {s['lag_p50'] * 1e3:.0f}ms "
+            f"p99 {s['lag_p99'] * 1e3:.0f}ms ({s['arrivals']} arrivées{'' if s['connected'] else ', déconnecté'})"
+            for name, s in self.stats().items()
+        ]
+        return f"{self.unique} mints uniques | " + " | ".join(parts)
+
+    async def report(self, every: float):
+        """Log périodique des métriques d'ingestion de chaque flux et de la course entre flux."""
+        while True:
+            await asyncio.sleep(every)
+            for feed in self.feeds:
+                self.print_fn(f"📥 Ingestion {feed.name} : {feed.stats.summary()}")
+            if len(self.feeds) > 1:
+                self.print_fn(f"🏁 Flux : {self.summary()}")
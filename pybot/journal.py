@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+
+# ================== ÉCRITURE ATOMIQUE ==================
+def write_atomic(path: str, text: str):
+    """Écrit dans un fichier temporaire puis os.replace : jamais de stats.json à moitié écrit."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _last_seq(path: str) -> int:
+    """Lit le seq de la dernière ligne du journal (seek en fin de fichier, pas de relecture complète)."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 8192))
+            tail = f.read().splitlines()
+    except OSError:
+        return 0
+    for line in reversed(tail):
+        try:
+            return int(json.loads(line)["seq"])
+        except (ValueError, KeyError, TypeError):
+            continue
+    return 0
+
+
+# ================== JOURNAL ==================
+class TradeJournal:
+    """
+    Journal append-only des événements de trade (JSONL, une ligne par événement) +
+    petit snapshot des compteurs (stats.json, sans historique).
+
+    append() et snapshot() ne font que bufferiser : l'écriture disque est regroupée
+    par run() toutes les `flush_interval` secondes, dans un thread, hors event loop.
+    """
+
+    def __init__(self, journal_path: str = "trades.jsonl", snapshot_path: str = "stats.json",
+                 flush_interval: float = 0.5):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.flush_interval = flush_interval
+        self.run_id = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        self._seq = _last_seq(journal_path)
+        self._buffer = []
+        self._snapshot = None
+        self._lock = None  # créé dans l'event loop au premier flush
+
+    def append(self, event: str, record: dict):
+        self._seq += 1
+        entry = {"seq": self._seq, "ts": time.time(), "run": self.run_id, "event": event}
+        entry.update(record)
+        self._buffer.append(json.dumps(entry, separators=(",", ":")))
+
+    def snapshot(self, counters: dict):
+        """Mémorise le dernier état des compteurs ; seul le plus récent est écrit."""
+        snap = dict(counters)
+        snap["run"] = self.run_id
+        snap["journal"] = os.path.basename(self.journal_path)
+        snap["seq"] = self._seq
+        snap["updated"] = time.time()
+        self._snapshot = snap
+
+    def _write(self, lines, snap):
+        if lines:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        if snap is not None:
+            write_atomic(self.snapshot_path, json.dumps(snap, indent=2))
+
+    async def flush(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            lines, self._buffer = self._buffer, []
+            snap, self._snapshot = self._snapshot, None
+            if not lines and snap is None:
+                return
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self._write, lines, snap)
+            except Exception as e:
+                # on remet en tête du buffer pour retenter au prochain flush
+                self._buffer[:0] = lines
+                if self._snapshot is None:
+                    self._snapshot = snap
+                print(f"⚠️ Journal: écriture impossible ({e})", flush=True)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self):
+        await self.flush()
+
+
+# ================== LECTURE ==================
+def read_journal(path: str, run: str = None):
+    """Itère les événements du journal (filtrés sur un run si demandé)."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # ligne tronquée (crash en cours d'écriture)
+            if run is None or entry.get("run") == run:
+                yield entry
+
+
+class JournalTail:
+    """
+    Lecture incrémentale du journal : ne lit que les octets ajoutés depuis le dernier appel.
+    Une ligne incomplète (écriture en cours) est laissée pour l'appel suivant.
+    Si le fichier a été remplacé (compaction) ou tronqué, on repart du début.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self._inode = None
+
+    def reset(self):
+        self.offset = 0
+        self._inode = None
+
+    def read_new(self) -> tuple:
+        """Renvoie (nouveaux événements, reset) ; reset=True si le fichier a été réécrit."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return [], False
+        reset = False
+        if (self._inode is not None and st.st_ino != self._inode) or st.st_size < self.offset:
+            self.offset = 0
+            reset = True
+        self._inode = st.st_ino
+        if st.st_size == self.offset:
+            return [], reset
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(st.st_size - self.offset)
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return [], reset
+        self.offset += end + 1
+
+        entries = []
+        for line in chunk[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return entries, reset
+
+
+# ================== OUTILS ==================
+def compact(path: str, keep_runs: int = 0, drop_opens: bool = True) -> tuple:
+    """
+    Réécrit le journal : supprime les événements "buy" des trades clôturés et,
+    si keep_runs > 0, ne garde que les `keep_runs` derniers runs. Remplacement atomique.
+    À lancer bot arrêté : un append concurrent entre lecture et remplacement serait perdu.
+    """
+    entries = list(read_journal(path))
+    runs = []
+    for e in entries:
+        if e.get("run") not in runs:
+            runs.append(e.get("run"))
+    kept_runs = set(runs[-keep_runs:]) if keep_runs > 0 else set(runs)
+    closed = {(e.get("run"), e.get("mint")) for e in entries if e.get("event") == "close"}
+
+    out = []
+    for e in entries:
+        if e.get("run") not in kept_runs:
+            continue
+        if drop_opens and e.get("event") == "buy" and (e.get("run"), e.get("mint")) in closed:
+            continue
+        out.append(json.dumps(e, separators=(",", ":")))
+    write_atomic(path, "\n".join(out) + ("\n" if out else ""))
+    return len(entries), len(out)
+
+
+LEGACY_LOGS = (
+    ("successful_trades_log", "success"),
+    ("nosuccessful_trades_log", "fail"),
+    ("rugpull_trades_log", "rug"),
+)
+
+
+def import_stats(stats_path: str, path: str) -> int:
+    """Migre les *_trades_log d'un ancien stats.json complet vers le journal."""
+    with open(stats_path, "r", encoding="utf-8") as f:
+        stats = json.load(f)
+    seq = _last_seq(path)
+    run = "legacy-" + time.strftime("%Y%m%d-%H%M%S", time.localtime(os.path.getmtime(stats_path)))
+    lines = []
+    for key, outcome in LEGACY_LOGS:
+        for t in stats.get(key, []):
+            seq += 1
+            entry = {"seq": seq, "ts": os.path.getmtime(stats_path), "run": run, "event": "close", "outcome": outcome}
+            entry.update(t)
+            lines.append(json.dumps(entry, separators=(",", ":")))
+    if lines:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    return len(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Outils du journal de trades")
+    sub = parser.add_subparsers(dest="cmd")
+    p_compact = sub.add_parser("compact", help="compacte le journal")
+    p_compact.add_argument("journal")
+    p_compact.add_argument("--keep-runs", type=int, default=0, help="nombre de runs à garder (0 = tous)")
+    p_compact.add_argument("--keep-opens", action="store_true", help="garder les événements buy")
+    p_import = sub.add_parser("import-stats", help="migre un ancien stats.json vers le journal")
+    p_import.add_argument("stats")
+    p_import.add_argument("journal")
+    args = parser.parse_args()
+
+    if args.cmd == "compact":
+        before, after = compact(args.journal, keep_runs=args.keep_runs, drop_opens=not args.keep_opens)
+        print(f"✅ {args.journal} : {before} -> {after} événements")
+    elif args.cmd == "import-stats":
+        n = import_stats(args.stats, args.journal)
+        print(f"✅ {n} trades importés dans {args.journal}")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from pybot.stats import percentile
+
+
+class LoopLagMonitor:
+    """
+    Mesure le retard de l'event loop : une tâche dort `interval` secondes et note
+    de combien elle se réveille en retard. Un appel bloquant (subprocess.run, I/O disque...)
+    se voit directement dans ce retard.
+    """
+
+    def __init__(self, interval: float = 0.05, window: int = 1200):
+        self.interval = interval
+        self.window = window
+        self.samples = []
+        self.max_lag = 0.0
+
+    def record(self, lag: float):
+        self.samples.append(lag)
+        if len(self.samples) > self.window:
+            del self.samples[: len(self.samples) - self.window]
+        if lag > self.max_lag:
+            self.max_lag = lag
+
+    def percentile(self, pct: float) -> float:
+        return percentile(self.samples, pct)
+
+    def summary(self) -> str:
+        return (
+            f"p50={self.percentile(50) * 1000:.1f}ms "
+            f"p99={self.percentile(99) * 1000:.1f}ms "
+            f"max={self.max_lag * 1000:.1f}ms"
+        )
+
+    async def run(self, report_every: float = 0.0, report=print):
+        """Boucle de mesure ; si report_every > 0, affiche un résumé périodique."""
+        last_report = time.perf_counter()
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self.record(max(0.0, now - t0 - self.interval))
+            if report_every and now - last_report >= report_every:
+                report(f"⏱️ Event loop lag : {self.summary()}")
+                last_report = now
@@ -0,0 +1,238 @@
+import asyncio
+import time
+import traceback
+
+from pybot.admission import AdmissionScheduler
+from pybot.control import BotControl, ControlFileWatcher, ControlServer
+from pybot.dedup import SeenMints
+from pybot.filters import BuySellRatio, FilterPipeline, MinLiquidity, MinSocials, MinVolume, QuoteDepth
+from pybot.ingest import MultiFeed, PairFeed
+from pybot.journal import TradeJournal
+from pybot.metrics import METRICS
+from pybot.state import TradeState
+from pybot.trace import TradeTrace
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+
+
+class Pipeline:
+    """
+    Chaîne commune au bot live (main/main.py) et au simulateur (test/test.py) : flux de paires,
+    dédoublonnage, filtrage, file d'admission, canal de contrôle, journal et métriques.
+
+    Le trade est délégué à `execute` (async fn(mint, decimals, trade_size_sol, hold_seconds,
+    trace, prefetch)) : swaps réels côté live, fills fictifs côté simulateur. Le slot
+    d'admission est libéré à la fin de `execute`, quelle que soit l'issue.
+
+    `config` : constantes de la section CONFIG du point d'entrée ({"MAX_CONCURRENT_TRADES": 2, ...}).
+    `dexscreener` : async fn(mint, timeout) -> fiche DexScreener (source des filtres).
+    `quote_prefetcher`, `sell_preparer`, `price_watcher` : briques propres au point d'entrée
+    (None = absentes), exposées dans les stats et les métriques.
+    `extra_state` : fn() -> dict ajouté à bot_state() ; `extra_report` : fn() -> ligne de log ou None.
+    """
+
+    def __init__(self, config: dict, execute, dexscreener, quote_prefetcher=None, sell_preparer=None,
+                 price_watcher=None, extra_state=None, extra_report=None, print_fn=print):
+        self.config = config
+        self.execute = execute
+        self.quote_prefetcher = quote_prefetcher
+        self.sell_preparer = sell_preparer
+        self.price_watcher = price_watcher
+        self.extra_state = extra_state
+        self.extra_report = extra_report
+        self.print_fn = print_fn
+
+        self.seen_tokens = SeenMints(config["SEEN_MINTS_CAPACITY"], config["SEEN_MINTS_FP_RATE"],
+                                     config["SEEN_MINTS_MAX_AGE"], config["SEEN_MINTS_FILE"])
+        self.pair_feed = MultiFeed([
+            PairFeed(url, key, name=name, ping_interval=config["WS_PING_INTERVAL"],
+                     ping_timeout=config["WS_PING_INTERVAL"], print_fn=self._print)
+            for name, url, key in config["PAIR_FEEDS"]
+        ], window=config["FEED_DEDUP_WINDOW"], print_fn=self._print)
+        # compteurs du run + derniers trades par issue (ring buffers), l'historique complet est au journal
+        self.state = TradeState(config["TRADE_HISTORY_SIZE"])
+        self.admission = AdmissionScheduler(config["MAX_CONCURRENT_TRADES"], maxsize=config["ADMISSION_QUEUE_SIZE"],
+                                            stale_after=config["ADMISSION_STALE_SECONDS"],
+                                            min_spacing=config["ADMISSION_MIN_SPACING"],
+                                            priority=config["ADMISSION_PRIORITY"])
+        self.journal = TradeJournal(config["JOURNAL_FILE"], config["STATS_FILE"])
+        self.control = BotControl(config["TRADE_SIZE_SOL"], config["TRADE_HOLD_SECONDS"],
+                                  config["MAX_CONCURRENT_TRADES"], on_change=self.apply_control)
+        self.control_watcher = ControlFileWatcher(config["CONTROL_FILE"], self.control, print_fn=self._print)
+
+        # ================== MÉTRIQUES ==================
+        # GET /metrics de l'API de contrôle (format Prometheus) ; les jauges sont lues au scrape
+        self.ws_to_enqueue = METRICS.histogram("ws_to_enqueue_seconds",
+                                               "Réception du message WS -> paire en file d'admission")
+        self.queue_wait = METRICS.histogram("queue_wait_seconds", "Attente en file d'admission avant un slot")
+        self.errors = METRICS.counter("errors_total", "Erreurs par étape", ["stage"])
+
+        # filtrage avant admission : fiche DexScreener + quote d'achat préchargée (pas de requête Jupiter en plus)
+        budget = config["FILTER_BUDGET_SECONDS"]
+        self.filter_pipeline = FilterPipeline([
+            MinLiquidity(config["FILTER_MIN_LIQUIDITY_USD"]) if config["FILTER_MIN_LIQUIDITY_USD"] else None,
+            MinVolume(config["FILTER_MIN_VOLUME_M5_USD"]) if config["FILTER_MIN_VOLUME_M5_USD"] else None,
+            BuySellRatio(config["FILTER_MIN_BUY_SELL_RATIO"]) if config["FILTER_MIN_BUY_SELL_RATIO"] else None,
+            MinSocials(config["FILTER_MIN_SOCIALS"]) if config["FILTER_MIN_SOCIALS"] else None,
+            QuoteDepth(config["FILTER_MAX_PRICE_IMPACT"]) if config["FILTER_MAX_PRICE_IMPACT"] else None,
+        ], sources={
+            "dexscreener": lambda mint, decimals: dexscreener(mint, budget),
+        }, budget=budget, on_missing=config["FILTER_ON_MISSING"], max_inflight=config["FILTER_CONCURRENCY"],
+            latency_metric=METRICS.histogram("filter_seconds", "Début du filtrage -> verdict, par filtre",
+                                             ["filter"]))
+
+        METRICS.counter("drops_total", "Paires abandonnées avant achat", ["reason"]).set_function(
+            lambda: {"stale": self.admission.dropped_stale, "full": self.admission.dropped_full})
+        METRICS.counter("ws_errors_total", "Erreurs des flux WebSocket", ["feed"]).set_function(
+            lambda: {feed.name: feed.stats.errors for feed in self.pair_feed.feeds})
+        METRICS.counter("feed_arrivals_total", "Paires reçues par flux (doublons compris)", ["feed"]).set_function(
+            lambda: {name: race.arrivals for name, race in self.pair_feed.race.items()})
+        METRICS.counter("feed_wins_total", "Paires reçues en premier par flux", ["feed"]).set_function(
+            lambda: {name: race.wins for name, race in self.pair_feed.race.items()})
+        self.pair_feed.lag_metric = METRICS.histogram("feed_lag_seconds",
+                                                      "Retard d'arrivée d'une paire sur le premier flux", ["feed"])
+        METRICS.counter("filter_rejections_total", "Paires écartées avant admission, par filtre",
+                        ["filter"]).set_function(lambda: self.filter_pipeline.rejections())
+        METRICS.counter("filter_missing_total", "Filtres sans donnée dans le budget (pas un rejet), par filtre",
+                        ["filter"]).set_function(lambda: self.filter_pipeline.missing_counts())
+        METRICS.gauge("queue_depth", "Paires en file d'admission").set_function(lambda: self.admission.depth)
+        METRICS.counter("buy_prefetch_total", "Quotes d'achat préchargées, par usage", ["result"]).set_function(
+            lambda: self.quote_prefetcher.outcomes() if self.quote_prefetcher is not None else {})
+        METRICS.counter("sell_prepared_total", "Ventes à la sortie, par chemin", ["result"]).set_function(
+            lambda: {k: self.sell_preparer.stats()[k] for k in ("hits", "stale", "missing")}
+            if self.sell_preparer is not None else {})
+        METRICS.gauge("pending_trades", "Trades en cours").set_function(lambda: self.state.pending)
+
+    def _print(self, msg: str):
+        self.print_fn(msg)
+
+    def apply_control(self, changes: dict, source: str):
+        """Réglages modifiés à chaud (API locale ou control.json) : les positions ouvertes ne sont pas touchées."""
+        if "max_concurrent_trades" in changes:
+            self.admission.resize(changes["max_concurrent_trades"])
+        self._print(f"🎛️ Réglages ({source}) : " + ", ".join(f"{k}={v}" for k, v in changes.items()))
+
+    def bot_state(self) -> dict:
+        """Compteurs + réglages courants (stats.json et GET /state de l'API de contrôle)."""
+        return {
+            **(self.extra_state() if self.extra_state is not None else {}),
+            **self.state.stats(),
+            "admission": self.admission.stats(),
+            "feeds": self.pair_feed.stats(),
+            "filters": self.filter_pipeline.stats(),
+            "prefetch": self.quote_prefetcher.stats() if self.quote_prefetcher is not None else None,
+            "sell_prep": self.sell_preparer.stats() if self.sell_preparer is not None else None,
+            "control": self.control.snapshot(),
+        }
+
+    def save_stats(self):
+        """Snapshot des compteurs ; l'écriture de stats.json est regroupée par le journal (hors event loop)."""
+        self.journal.snapshot(self.bot_state())
+
+    # ================== WEBSOCKET LISTENER ==================
+    async def listen_pools(self):
+        def enqueue(mint, decimals, received_at, prefetch=None, score=None):
+            ticket = self.admission.offer(mint, decimals, score=score, received_at=received_at)
+            self.ws_to_enqueue.observe(time.monotonic() - received_at)
+            if ticket is not None:
+                ticket.prefetch = prefetch
+
+        async def screen(mint, decimals, received_at, prefetch):
+            """Filtrage avant la file d'admission : une paire écartée ne prend jamais de slot."""
+            try:
+                verdict = await self.filter_pipeline.evaluate(mint, decimals,
+                                                              quote=prefetch.task if prefetch is not None else None)
+            except Exception as e:
+                self.errors.labels("filter").inc()
+                self._print(f"⚠️ Erreur filtrage {mint}: {e}")
+                return
+            if not verdict.passed:
+                missing = " sans donnée" if verdict.reason in verdict.missing else ""
+                self._print(f"🚫 {mint} écarté : {verdict.reason}{missing} ({verdict.elapsed * 1e3:.0f} ms)")
+                return
+            enqueue(mint, decimals, received_at, prefetch, verdict.score)
+
+        def on_pair(mint, decimals, received_at):
+            if self.seen_tokens.add_if_new(mint):
+                prefetch = None
+                if self.control.running and self.quote_prefetcher is not None:
+                    prefetch = self.quote_prefetcher.start(SOL_MINT, mint, int(self.control.trade_size_sol * 1e9))
+                if self.filter_pipeline.filters:
+                    asyncio.ensure_future(screen(mint, decimals, received_at, prefetch))
+                else:
+                    enqueue(mint, decimals, received_at, prefetch)
+
+        await self.pair_feed.run(on_pair)
+
+    # ================== ADMISSION ==================
+    async def process_tokens(self):
+        """Admet les paires dès qu'un slot se libère ; pause / reprise poussées par le canal de contrôle (pas de polling)."""
+        control = self.control
+        while True:
+            if not control.running:
+                self._print("⏸️ Bot en pause (pas de nouveaux tokens)")
+                await control.wait_running()
+                self._print("▶️ Bot relancé")
+            ticket = await self.admission.next()
+            self.queue_wait.observe(ticket.waited)
+            try:
+                if not control.running:
+                    self.admission.release()
+                    continue
+                self._print(f"\n🔍 Nouveau token détecté : {ticket.mint} (en file {ticket.waited * 1e3:.0f} ms)")
+                self._print(f"✅ Nouveau token retenu: https://dexscreener.com/solana/{ticket.mint}")
+                trace = TradeTrace(ticket.received_at)
+                trace.mark("dequeue")
+                asyncio.create_task(self._trade(ticket.mint, ticket.decimals, control.trade_size_sol,
+                                                control.hold_seconds, trace, ticket.prefetch))
+            except Exception as e:
+                self.admission.release()
+                self.errors.labels("admission").inc()
+                self._print(f"⚠️ Erreur process_tokens: {e}\n{traceback.format_exc()}")
+
+    async def _trade(self, mint, decimals, trade_size_sol, hold_seconds, trace, prefetch):
+        # 🚦 le slot a été réservé par le scheduler d'admission : libéré à la fin du trade
+        with self.admission.release_on_exit():
+            await self.execute(mint, decimals, trade_size_sol, hold_seconds, trace, prefetch)
+
+    async def report_admission(self, every: float):
+        """Log + snapshot périodiques des métriques d'admission (profondeur, abandons, slots inoccupés)."""
+        while True:
+            await asyncio.sleep(every)
+            self._print(f"🚦 Admission : {self.admission.summary()}")
+            line = self.extra_report() if self.extra_report is not None else None
+            if line:
+                self._print(line)
+            self.save_stats()
+
+    # ================== MAIN ==================
+    def start(self):
+        """État de pause / réglages persistés, à charger avant la première admission."""
+        self.control_watcher.load()
+        self.save_stats()
+
+    async def run(self, *tasks):
+        """
+        Tâches communes + `tasks` (propres au point d'entrée) jusqu'à l'annulation ; le filtre
+        des mints vus est sauvegardé et le journal vidé à la sortie.
+        """
+        config = self.config
+        report_every = config["INGEST_REPORT_SECONDS"]
+        try:
+            await asyncio.gather(
+                self.listen_pools(),
+                self.process_tokens(),
+                self.pair_feed.report(report_every) if report_every else asyncio.sleep(0),
+                self.report_admission(report_every) if report_every else asyncio.sleep(0),
+                self.journal.run(),
+                self.control_watcher.run(),
+                ControlServer(self.control, self.bot_state, config["CONTROL_HOST"], config["CONTROL_PORT"],
+                              config["CONTROL_FILE"], METRICS).run()
+                if config["CONTROL_PORT"] else asyncio.sleep(0),
+                self.seen_tokens.run(),
+                self.price_watcher.run() if self.price_watcher is not None else asyncio.sleep(0),
+                *tasks,
+            )
+        finally:
+            self.seen_tokens.save()
+            await self.journal.close()
@@ -0,0 +1,112 @@
+import asyncio
+
+
+class Prefetch:
+    __slots__ = ("key", "task", "started", "done_at")
+
+    def __init__(self, key, task, started):
+        self.key = key
+        self.task = task
+        self.started = started   # loop.time() de la requête
+        self.done_at = None      # loop.time() de la réponse
+
+
+class QuotePrefetcher:
+    """
+    Quote d'achat demandée de façon spéculative dès la détection de la paire, pendant
+    qu'elle attend en file d'admission ; le trade la récupère avec take().
+
+    - `max_inflight` : requêtes spéculatives simultanées max ; au-delà, pas de prefetch
+      (la quote sera demandée normalement au début du trade). 0 = désactivé.
+    - `ttl` : âge max (s) d'une quote préchargée quand le trade démarre ; plus vieille,
+      elle est redemandée. Une requête encore en vol est attendue (déjà partiellement payée).
+    - une réponse vide (pas encore de route) n'est pas réutilisée : la paire vient de naître,
+      la route peut exister quelques instants plus tard.
+    """
+
+    def __init__(self, fetch, max_inflight: int = 4, ttl: float = 1.5):
+        self.fetch = fetch
+        self.max_inflight = max_inflight
+        self.ttl = ttl
+        self.inflight = 0
+        self.started = 0
+        self.skipped = 0     # budget épuisé
+        self.hits = 0        # quote prête et fraîche
+        self.joined = 0      # requête encore en vol, attendue
+        self.expired = 0     # trop vieille, redemandée
+        self.empty = 0       # pas de route / erreur, redemandée
+        self.misses = 0      # trade sans prefetch (ou montant changé)
+
+    def start(self, *key):
+        """Lance la quote spéculative (appel synchrone, depuis le callback du WS) ; None si hors budget."""
+        if self.max_inflight <= 0:
+            return None
+        if self.inflight >= self.max_inflight:
+            self.skipped += 1
+            return None
+        loop = asyncio.get_event_loop()
+        prefetch = Prefetch(key, asyncio.ensure_future(self.fetch(*key)), loop.time())
+        self.inflight += 1
+        self.started += 1
+        prefetch.task.add_done_callback(lambda t, p=prefetch: self._done(p, t))
+        return prefetch
+
+    def _done(self, prefetch: Prefetch, task):
+        self.inflight -= 1
+        prefetch.done_at = asyncio.get_event_loop().time()
+        if not task.cancelled():
+            task.exception()  # récupérée ici : pas de "exception was never retrieved" si la paire est abandonnée
+
+    async def take(self, prefetch, *key, fetch_on_miss: bool = True):
+        """
+        Quote pour `key` : la quote préchargée si elle est encore fraîche (ou en vol), sinon
+        une nouvelle requête (ou None si fetch_on_miss=False : l'appelant se débrouille).
+        """
+        quote = None
+        if prefetch is None or prefetch.key != key:
+            self.misses += 1
+        elif not prefetch.task.done():
+            self.joined += 1
+            try:
+                quote = await asyncio.shield(prefetch.task)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                quote = None
+            if not quote:
+                self.empty += 1
+        elif asyncio.get_event_loop().time() - prefetch.done_at > self.ttl:
+            self.expired += 1
+        elif prefetch.task.cancelled() or prefetch.task.exception() is not None or not prefetch.task.result():
+            self.empty += 1
+        else:
+            self.hits += 1
+            quote = prefetch.task.result()
+        if quote or not fetch_on_miss:
+            return quote
+        return await self.fetch(*key)
+
+    def outcomes(self) -> dict:
+        """Devenir des quotes : utilisées (hits, joined), redemandées (expired, empty, misses), non lancées (skipped)."""
+        return {
+            "hits": self.hits,
+            "joined": self.joined,
+            "expired": self.expired,
+            "empty": self.empty,
+            "misses": self.misses,
+            "skipped": self.skipped,
+        }
+
+    def stats(self) -> dict:
+        used = self.hits + self.joined
+        taken = used + self.expired + self.empty + self.misses
+        return dict(self.outcomes(), started=self.started, inflight=self.inflight,
+                    hit_rate=round(used / taken, 3) if taken else 0.0)
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (
+            f"{s['started']} préchargées ({s['skipped']} hors budget) | utilisées {s['hits']} prêtes + "
+            f"{s['joined']} en vol ({s['hit_rate']:.0%}) | redemandées : {s['expired']} expirées, "
+            f"{s['empty']} sans route, {s['misses']} sans prefetch"
+        )
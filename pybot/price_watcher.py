@@ -0,0 +1,221 @@
+import asyncio
+import heapq
+import math
+import random
+
+
+class PriceUpdate:
+    __slots__ = ("mint", "amount", "quote", "at", "latency")
+
+    def __init__(self, mint, amount, quote, at, latency):
+        self.mint = mint
+        self.amount = amount
+        self.quote = quote        # dict au format jupiter.get_jupiter_swap_price, ou None (pas de route)
+        self.at = at              # loop.time() de la réponse
+        self.latency = latency    # s, durée de la requête
+
+
+def _wake(waiter):
+    if waiter is not None and not waiter.done():
+        waiter.set_result(None)
+
+
+class Subscription:
+    """
+    Flux de prix d'une position ouverte. Les mises à jour sont conflatées : un consommateur
+    lent ne voit que la plus récente (pas de file qui grossit).
+    """
+
+    def __init__(self, watcher, mint: str, amount: int):
+        self.watcher = watcher
+        self.key = (mint, int(amount))
+        self.latest = None
+        self.updates = 0
+        self.low = None           # out_amount min / max vus pendant l'abonnement
+        self.high = None
+        self.margin = None        # écart au seuil de sortie le plus proche (0.02 = à 2 %), posé par wait_exit
+        self.closed = False
+        self._seen = 0
+        self._waiter = None       # future du consommateur en attente (pas de wait_for : ni tâche ni Event par appel)
+
+    def _push(self, update: PriceUpdate):
+        self.latest = update
+        self.updates += 1
+        if update.quote:
+            out = update.quote["out_amount"]
+            self.low = out if self.low is None else min(self.low, out)
+            self.high = out if self.high is None else max(self.high, out)
+        _wake(self._waiter)
+
+    async def next(self, timeout: float = None):
+        """Prochaine mise à jour non encore lue (None si timeout)."""
+        if self.updates == self._seen:
+            loop = asyncio.get_running_loop()
+            waiter = self._waiter = loop.create_future()
+            timer = loop.call_later(timeout, _wake, waiter) if timeout is not None else None
+            try:
+                await waiter
+            finally:
+                self._waiter = None
+                if timer is not None:
+                    timer.cancel()
+            if self.updates == self._seen:
+                return None
+        self._seen = self.updates
+        return self.latest
+
+    async def fresh(self, max_age: float):
+        """Quote de moins de `max_age` s : la dernière reçue, sinon une requête immédiate."""
+        latest = self.latest
+        if latest is not None and asyncio.get_running_loop().time() - latest.at <= max_age:
+            return latest.quote
+        update = await self.watcher.poll_now(self.key)
+        return update.quote
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.closed:
+            raise StopAsyncIteration
+        return await self.next()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.watcher._unsubscribe(self)
+
+
+class PriceWatcher:
+    """
+    Une seule tâche interroge les quotes de sortie de toutes les positions ouvertes, sur un
+    tick commun. À chaque tick, les clés (mint, montant) sont réparties en paquets de
+    `batch_size` étalés sur le tick ; au plus `max_concurrency` requêtes en vol, jamais deux
+    pour la même clé ; le tick est décalé d'un jitter aléatoire (pas de rafales synchronisées).
+    `fetch(mint, amount)` renvoie une quote ou None.
+
+    Un tick ne lance pas plus de requêtes que `max_concurrency` n'en termine en un tick (d'après
+    la latence mesurée, requêtes encore en vol déduites). Au-delà, les clés sont prises par priorité : d'abord celles sans
+    aucune quote, puis âge de la dernière quote divisé par l'écart au seuil de sortie
+    (Subscription.margin, borné à `min_margin`). Une position proche de son take-profit /
+    stop-loss est rafraîchie à chaque tick, une position loin de tout seuil attend son tour.
+    """
+
+    def __init__(self, fetch, tick: float = 1.0, max_concurrency: int = 8, batch_size: int = 10,
+                 jitter: float = 0.1, min_margin: float = 0.01):
+        self._fetch = fetch
+        self.tick = tick
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.jitter = jitter
+        self.min_margin = min_margin
+        self._subs = {}         # (mint, amount) -> set(Subscription)
+        self._inflight = {}     # (mint, amount) -> Task
+        self._last_at = {}      # (mint, amount) -> loop.time() de la dernière quote
+        self._semaphore = None  # créé dans l'event loop
+        self.polls = 0
+        self.errors = 0
+        self.skipped = 0        # clé encore en vol au tick suivant
+        self.deferred = 0       # clé reportée à un tick suivant (budget de requêtes du tick atteint)
+        self.latency = 0.0      # s, EWMA
+
+    # ---------- abonnements ----------
+    def subscribe(self, mint: str, amount: int) -> Subscription:
+        sub = Subscription(self, mint, amount)
+        self._subs.setdefault(sub.key, set()).add(sub)
+        return sub
+
+    def _unsubscribe(self, sub: Subscription):
+        subs = self._subs.get(sub.key)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subs[sub.key]
+                self._last_at.pop(sub.key, None)
+
+    @property
+    def positions(self) -> int:
+        return sum(len(s) for s in self._subs.values())
+
+    # ---------- requêtes ----------
+    def _start(self, key) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._poll(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._inflight.pop(k, None))
+        return task
+
+    async def poll_now(self, key) -> PriceUpdate:
+        """Requête immédiate pour une clé (partagée avec celle déjà en vol s'il y en a une)."""
+        return await asyncio.shield(self._start(key))
+
+    async def _poll(self, key) -> PriceUpdate:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            start = loop.time()
+            try:
+                quote = await self._fetch(*key)
+            except Exception:
+                self.errors += 1
+                quote = None
+            now = loop.time()
+        self.polls += 1
+        self.latency += 0.2 * ((now - start) - self.latency)
+        update = PriceUpdate(key[0], key[1], quote, now, now - start)
+        if key in self._subs:
+            self._last_at[key] = now
+        for sub in list(self._subs.get(key, ())):
+            sub._push(update)
+        return update
+
+    def _budget(self) -> int:
+        """
+        Requêtes à lancer ce tick : ce que max_concurrency termine en un tick à la latence mesurée,
+        moins les requêtes encore en vol (sinon la file du sémaphore grossit et tout repasse en FIFO).
+        """
+        if self.latency <= 0:
+            return len(self._subs)
+        capacity = max(self.max_concurrency, int(self.max_concurrency * self.tick / self.latency))
+        return max(0, capacity - len(self._inflight))
+
+    def _priority(self, key, now: float) -> float:
+        last = self._last_at.get(key)
+        if last is None:
+            return math.inf  # pas encore de prix : la position ne peut pas encore sortir sur seuil
+        margins = [sub.margin for sub in self._subs.get(key, ()) if sub.margin is not None]
+        margin = max(self.min_margin, min(margins)) if margins else 1.0
+        return (now - last) / margin
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            keys = []
+            for key in self._subs:
+                if key in self._inflight:
+                    self.skipped += 1
+                else:
+                    keys.append(key)
+            budget = self._budget()
+            if len(keys) > budget:
+                self.deferred += len(keys) - budget
+                keys = heapq.nlargest(budget, keys, key=lambda k: self._priority(k, start))
+            size = self.batch_size or len(keys) or 1
+            batches = max(1, math.ceil(len(keys) / size))
+            for b in range(batches):
+                for key in keys[b * size:(b + 1) * size]:
+                    if key in self._subs and key not in self._inflight:
+                        self._start(key)
+                if b < batches - 1:
+                    await asyncio.sleep(self.tick / batches)
+            period = self.tick * (1 + random.uniform(-self.jitter, self.jitter))
+            await asyncio.sleep(max(0.0, start + period - loop.time()))
+
+    def summary(self) -> str:
+        return (
+            f"{self.positions} positions | {self.polls} quotes ({self.latency * 1e3:.0f}ms) | "
+            f"{self.skipped} ticks sautés | {self.deferred} reportées | {self.errors} erreurs"
+        )
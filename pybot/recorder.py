@@ -0,0 +1,72 @@
+import asyncio
+import gzip
+import json
+import time
+
+
+class Recorder:
+    """
+    Enregistre le flux brut newPairSubscribe et chaque quote Jupiter (requête + réponse brute),
+    horodatés, dans un JSONL gzip. Les appels ws()/quote() ne font que bufferiser ;
+    run() écrit les lignes en arrière-plan, dans un thread.
+
+    Format d'une ligne :
+      {"t": 1700000000.123, "k": "ws", "msg": "<message brut>"}
+      {"t": ..., "k": "quote", "in": "...", "out": "...", "amount": 123, "status": 200, "body": "<json brut>"}
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self.count = 0
+
+    def _add(self, entry: dict):
+        self._buffer.append(json.dumps(entry, separators=(",", ":")))
+        self.count += 1
+
+    def ws(self, msg):
+        if isinstance(msg, bytes):
+            msg = msg.decode("utf-8", "replace")
+        self._add({"t": time.time(), "k": "ws", "msg": msg})
+
+    def quote(self, input_mint, output_mint, amount, status, body):
+        self._add({
+            "t": time.time(), "k": "quote",
+            "in": input_mint, "out": output_mint, "amount": int(amount),
+            "status": status, "body": body,
+        })
+
+    def _write(self, lines):
+        # un membre gzip par flush : le fichier reste lisible même après un crash
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    async def flush(self):
+        lines, self._buffer = self._buffer, []
+        if lines:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, lines)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self):
+        await self.flush()
+
+
+def read_recording(path: str):
+    """Itère les événements d'un enregistrement (lignes tronquées ignorées)."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        while True:
+            try:
+                line = f.readline()
+            except EOFError:
+                return  # dernier membre gzip incomplet (crash pendant l'écriture)
+            if not line:
+                return
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
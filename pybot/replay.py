@@ -0,0 +1,305 @@
+"""
+Rejoue un enregistrement pybot.recorder dans le simulateur (test/test.py) :
+le WebSocket SolanaStreaming et l'API quote de Jupiter sont remplacés par des stand-ins
+locaux qui renvoient les messages et réponses enregistrés, avec leur chronologie.
+
+    python -m pybot.replay session.jsonl.gz              # temps réel
+    python -m pybot.replay session.jsonl.gz --speed 20   # 20x plus vite
+    python -m pybot.replay session.jsonl.gz --asap       # aussi vite que possible (temps virtuel)
+
+Toute l'horloge asyncio (sleep, timeouts, hold des trades, RATE_LIMIT) suit la vitesse
+du replay : un même enregistrement donne les mêmes trades quelle que soit la vitesse.
+Les fichiers produits (trades.jsonl, stats.json, ...) vont dans --workdir.
+"""
+import argparse
+import asyncio
+import bisect
+import importlib.util
+import json
+import os
+import tempfile
+import time
+
+import websockets
+from aiohttp import web
+
+from pybot.recorder import read_recording
+
+DEFAULT_SIM = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test", "test.py")
+IDLE_GRACE_SECONDS = 0.005  # en --asap : attente réelle d'I/O avant de sauter au prochain timer
+REPLAY_CONFIG = {"RECORD_FILE": None, "INGEST_REPORT_SECONDS": 0, "CONTROL_PORT": 0}  # ni enregistrement ni API
+
+
+# ================== ENREGISTREMENT ==================
+class Recording:
+    """Événements d'un enregistrement, en secondes depuis le premier événement."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ws = []        # [(offset, msg)]
+        self.quotes = {}    # (in, out, amount) -> ([offsets], [(status, body)])
+        self.pairs = {}     # (in, out) -> ([offsets], [(amount, status, body)])
+        t0 = None
+        for e in read_recording(path):
+            t0 = e["t"] if t0 is None else t0
+            offset = e["t"] - t0
+            if e.get("k") == "ws":
+                self.ws.append((offset, e["msg"]))
+            elif e.get("k") == "quote":
+                offsets, values = self.quotes.setdefault((e["in"], e["out"], int(e["amount"])), ([], []))
+                offsets.append(offset)
+                values.append((e["status"], e["body"]))
+                offsets, values = self.pairs.setdefault((e["in"], e["out"]), ([], []))
+                offsets.append(offset)
+                values.append((int(e["amount"]), e["status"], e["body"]))
+        self.ws.sort(key=lambda x: x[0])
+        self.duration = max([o for o, _ in self.ws] + [o[-1] for o, _ in self.quotes.values()] + [0.0])
+
+    @staticmethod
+    def _nearest(offsets: list, values: list, offset: float):
+        i = bisect.bisect_left(offsets, offset)
+        if i == len(offsets) or (i > 0 and offset - offsets[i - 1] <= offsets[i] - offset):
+            i -= 1
+        return values[i]
+
+    def quote(self, input_mint: str, output_mint: str, amount: int, offset: float):
+        """
+        (status, body, kind) de la réponse enregistrée la plus proche dans le temps :
+        kind = "exact" (même montant), "scaled" (même paire, autre montant : montants
+        remis à l'échelle linéairement, sans impact de prix) ou "missing".
+        """
+        found = self.quotes.get((input_mint, output_mint, amount))
+        if found:
+            status, body = self._nearest(found[0], found[1], offset)
+            return status, body, "exact"
+        found = self.pairs.get((input_mint, output_mint))
+        if found:
+            recorded_amount, status, body = self._nearest(found[0], found[1], offset)
+            return status, _rescale(body, amount / recorded_amount) if status == 200 else body, "scaled"
+        return 400, json.dumps({"error": "quote non enregistrée"}), "missing"
+
+
+def _rescale(body: str, ratio: float) -> str:
+    try:
+        data = json.loads(body)
+        for obj in [data] + [r.get("swapInfo", {}) for r in data.get("routePlan") or []]:
+            for key in ("inAmount", "outAmount", "feeAmount", "otherAmountThreshold"):
+                if key in obj:
+                    obj[key] = str(int(int(obj[key]) * ratio))
+        return json.dumps(data)
+    except (ValueError, TypeError, AttributeError):
+        return body
+
+
+# ================== HORLOGE ==================
+class _ScaledSelector:
+    """Selector de l'event loop : convertit les timeouts virtuels en attente réelle."""
+
+    def __init__(self, selector, loop):
+        self._selector = selector
+        self._loop = loop
+
+    def select(self, timeout=None):
+        speed = self._loop.speed
+        if timeout is None or timeout <= 0:
+            return self._selector.select(timeout)
+        if speed > 0:
+            return self._selector.select(timeout / speed)
+        # --asap : si aucune I/O n'arrive pendant un court instant, on saute au prochain timer
+        start = time.monotonic()
+        events = self._selector.select(min(timeout, IDLE_GRACE_SECONDS))
+        if not events:
+            self._loop.skipped += max(0.0, timeout - (time.monotonic() - start))
+        return events
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class ReplayLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop à horloge accélérée : speed=1 temps réel, speed=N N fois plus vite,
+    speed=0 aussi vite que possible (le temps virtuel saute au prochain timer dès que
+    la boucle est inactive). time.time() n'est pas affecté, seule loop.time() l'est.
+    """
+
+    def __init__(self, speed: float = 1.0):
+        super().__init__()
+        self.speed = speed
+        self.skipped = 0.0
+        self._origin = time.monotonic()
+        self._selector = _ScaledSelector(self._selector, self)
+
+    def time(self):
+        return self._origin + (time.monotonic() - self._origin) * (self.speed or 1.0) + self.skipped
+
+
+# ================== STAND-INS ==================
+class FeedStandIn:
+    """WebSocket local : renvoie les messages enregistrés à leur offset (reprend là où il en était après une reconnexion)."""
+
+    def __init__(self, recording: Recording):
+        self.recording = recording
+        self.position = 0
+        self.started_at = None
+        self.done = asyncio.Event()
+        self.connections = 0
+
+    async def handler(self, ws, path=None):
+        self.connections += 1
+        await ws.recv()  # newPairSubscribe
+        loop = asyncio.get_running_loop()
+        if self.started_at is None:
+            self.started_at = loop.time()
+        messages = self.recording.ws
+        try:
+            while self.position < len(messages):
+                offset, msg = messages[self.position]
+                delay = self.started_at + offset - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await ws.send(msg)
+                self.position += 1
+        except websockets.ConnectionClosed:
+            return
+        self.done.set()
+        await ws.wait_closed()
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0):
+        return websockets.serve(self.handler, host, port)
+
+
+class JupiterStandIn:
+    """
+    API quote locale : GET /swap/v1/quote -> réponse enregistrée la plus proche dans le temps.
+    DexScreener (non enregistré) : GET /tokens/v1/solana/... -> [] (paires jamais indexées).
+    """
+
+    def __init__(self, recording: Recording, feed: FeedStandIn):
+        self.recording = recording
+        self.feed = feed
+        self.served = {"exact": 0, "scaled": 0, "missing": 0}
+
+    async def quote(self, request):
+        q = request.query
+        loop = asyncio.get_running_loop()
+        offset = loop.time() - self.feed.started_at if self.feed.started_at is not None else 0.0
+        status, body, kind = self.recording.quote(q.get("inputMint"), q.get("outputMint"), int(q.get("amount", 0)), offset)
+        self.served[kind] += 1
+        return web.Response(status=status, text=body, content_type="application/json")
+
+    async def dexscreener(self, request):
+        return web.json_response([])
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0):
+        app = web.Application()
+        app.router.add_get("/swap/v1/quote", self.quote)
+        app.router.add_get("/tokens/v1/solana/{mints}", self.dexscreener)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        return runner, runner.addresses[0][1]
+
+
+# ================== REPLAY ==================
+def load_sim(path: str = DEFAULT_SIM, config: dict = None):
+    """
+    Construit un Simulator de test/test.py (à faire une fois l'event loop du replay installé).
+    `config` : réglages remplacés ({"TRADE_HOLD_SECONDS": 30}), validés par settings() du
+    simulateur (ValueError sur une clé inconnue).
+    """
+    spec = importlib.util.spec_from_file_location("pybot_replay_sim", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Simulator(module.settings(config))
+
+
+async def replay(recording: Recording, sim, quiet: float = None) -> dict:
+    """
+    Rejoue `recording` dans `sim` (load_sim(), de préférence avec REPLAY_CONFIG) puis attend
+    que les trades se terminent : arrêt après `quiet` secondes (virtuelles) sans activité ni
+    trade en cours.
+    """
+    loop = asyncio.get_running_loop()
+    quiet = quiet if quiet is not None else sim.config["TRADE_HOLD_SECONDS"] + 10
+    feed = FeedStandIn(recording)
+    quotes = JupiterStandIn(recording, feed)
+    ws_server = await feed.serve()
+    ws_port = next(iter(ws_server.sockets)).getsockname()[1]
+    runner, http_port = await quotes.serve()
+
+    # un seul flux rejoué (l'enregistrement contient déjà les arrivées de tous les flux)
+    sim.pipeline.pair_feed.feeds = sim.pipeline.pair_feed.feeds[:1]
+    sim.pipeline.pair_feed.feeds[0].url = f"ws://127.0.0.1:{ws_port}"
+    sim.jupiter.JUPITER_QUOTE_URL = f"http://127.0.0.1:{http_port}/swap/v1/quote"
+    sim.dexscreener_api.dexscreener.url = f"http://127.0.0.1:{http_port}/tokens/v1/solana/"
+
+    start_real, start_virtual = time.monotonic(), loop.time()
+    task = asyncio.ensure_future(sim.run())
+    try:
+        await feed.done.wait()
+        last, last_change = None, loop.time()
+        while loop.time() - last_change < quiet or sim.pipeline.state.pending:
+            await asyncio.sleep(1)
+            activity = (sim.pipeline.journal._seq, sum(quotes.served.values()), sim.pipeline.state.pending)
+            if activity != last:
+                last, last_change = activity, loop.time()
+    finally:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        # trades encore en attente d'un slot
+        others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in others:
+            t.cancel()
+        await asyncio.gather(*others, return_exceptions=True)
+        ws_server.close()
+        await ws_server.wait_closed()
+        await runner.cleanup()
+
+    return {
+        "messages": feed.position,
+        "connections": feed.connections,
+        "quotes": dict(quotes.served),
+        "virtual_seconds": loop.time() - start_virtual,
+        "real_seconds": time.monotonic() - start_real,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejoue un enregistrement flux + quotes dans le simulateur")
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=1.0, help="facteur de vitesse (1 = temps réel)")
+    parser.add_argument("--asap", action="store_true", help="aussi vite que possible (temps virtuel)")
+    parser.add_argument("--workdir", default=None, help="dossier des fichiers produits (défaut : dossier temporaire)")
+    parser.add_argument("--sim", default=DEFAULT_SIM, help="script simulateur (défaut : test/test.py)")
+    args = parser.parse_args()
+
+    recording = Recording(args.recording)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="pybot-replay-")
+    os.makedirs(workdir, exist_ok=True)
+    print(f"▶️ {len(recording.ws)} messages, {sum(len(o) for o, _ in recording.quotes.values())} quotes, "
+          f"{recording.duration:.0f}s enregistrées -> {workdir}")
+
+    sim_path = os.path.abspath(args.sim)
+    loop = ReplayLoop(0.0 if args.asap else args.speed)
+    asyncio.set_event_loop(loop)  # avant le chargement : le simulateur crée ses primitives asyncio à la construction
+    os.chdir(workdir)
+    try:
+        sim = load_sim(sim_path, REPLAY_CONFIG)
+        result = loop.run_until_complete(replay(recording, sim))
+    finally:
+        loop.close()
+
+    print("\n" + sim.stats_header())
+    q = result["quotes"]
+    print(f"⏹️ Replay : {result['messages']} messages ({result['connections']} connexions) | quotes "
+          f"{q['exact']} exactes, {q['scaled']} à l'échelle, {q['missing']} absentes | "
+          f"{result['virtual_seconds']:.0f}s simulées en {result['real_seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import asyncio
+
+
+class PreparedSell:
+    __slots__ = ("key", "task", "payload", "ready_at", "builds")
+
+    def __init__(self, key):
+        self.key = key
+        self.task = None
+        self.payload = None      # dernière vente préparée (tx signée côté worker, ou quote en simulation)
+        self.ready_at = None     # loop.time() de sa réception
+        self.builds = 0
+
+
+class SellPreparer:
+    """
+    Vente préparée avant la fin de la détention : à `lead` s de l'échéance, `prepare(*key)`
+    (quote + build + signature, sans envoi) est lancé puis rafraîchi toutes les `refresh` s.
+    À la décision de sortie, take() rend la dernière préparation si elle a moins de `max_age` s :
+    il ne reste qu'à l'envoyer. Sinon (sortie anticipée sur le prix, préparation trop vieille
+    ou en échec), l'appelant repasse par le chemin complet.
+
+    `discard(payload)` (optionnel) : libère une préparation remplacée ou non utilisée.
+    lead = 0 désactive la préparation.
+    """
+
+    def __init__(self, prepare, lead: float = 3.0, refresh: float = 1.0, max_age: float = 2.0, discard=None):
+        self.prepare = prepare
+        self.lead = lead
+        self.refresh = refresh
+        self.max_age = max_age
+        self.discard = discard
+        self.armed = 0
+        self.builds = 0
+        self.errors = 0
+        self.hits = 0        # préparation fraîche utilisée
+        self.stale = 0       # trop vieille à la décision
+        self.missing = 0     # sortie avant la première préparation (ou préparation en échec)
+
+    def arm(self, deadline: float, *key) -> PreparedSell:
+        """Programme la préparation pour une sortie au plus tard à `deadline` (loop.time())."""
+        handle = PreparedSell(key)
+        if self.lead > 0:
+            handle.task = asyncio.ensure_future(self._run(handle, deadline))
+            self.armed += 1
+        return handle
+
+    async def _run(self, handle: PreparedSell, deadline: float):
+        loop = asyncio.get_event_loop()
+        await asyncio.sleep(max(0.0, deadline - self.lead - loop.time()))
+        while True:
+            started = loop.time()
+            try:
+                payload = await self.prepare(*handle.key)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.errors += 1
+                payload = None
+            if payload:
+                self._drop(handle.payload)
+                handle.payload = payload
+                handle.ready_at = loop.time()
+                handle.builds += 1
+                self.builds += 1
+            await asyncio.sleep(max(0.0, started + self.refresh - loop.time()))
+
+    def _drop(self, payload):
+        if payload is not None and self.discard is not None:
+            try:
+                self.discard(payload)
+            except Exception:
+                pass
+
+    def take(self, handle: PreparedSell):
+        """Arrête les rafraîchissements ; renvoie la préparation si elle est encore fraîche, sinon None."""
+        if handle is None:
+            return None
+        self._stop(handle)
+        payload, handle.payload = handle.payload, None
+        if payload is None:
+            self.missing += 1
+            return None
+        if asyncio.get_event_loop().time() - handle.ready_at > self.max_age:
+            self.stale += 1
+            self._drop(payload)
+            return None
+        self.hits += 1
+        return payload
+
+    def close(self, handle: PreparedSell):
+        """Abandon de la position sans take() (erreur, annulation) : plus de rafraîchissement."""
+        if handle is None:
+            return
+        self._stop(handle)
+        payload, handle.payload = handle.payload, None
+        self._drop(payload)
+
+    @staticmethod
+    def _stop(handle: PreparedSell):
+        if handle.task is not None and not handle.task.done():
+            handle.task.cancel()
+
+    def stats(self) -> dict:
+        taken = self.hits + self.stale + self.missing
+        return {
+            "armed": self.armed,
+            "builds": self.builds,
+            "errors": self.errors,
+            "hits": self.hits,
+            "stale": self.stale,
+            "missing": self.missing,
+            "hit_rate": round(self.hits / taken, 3) if taken else 0.0,
+        }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (
+            f"{s['armed']} ventes préparées ({s['builds']} builds, {s['errors']} erreurs) | "
+            f"envoyées telles quelles {s['hits']} ({s['hit_rate']:.0%}) | chemin complet : "
+            f"{s['stale']} trop vieilles, {s['missing']} absentes"
+        )
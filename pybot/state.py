@@ -0,0 +1,124 @@
+import collections
+import time
+
+DEXSCREENER_URL = "https://dexscreener.com/solana/"
+OUTCOMES = ("success", "fail", "rug")
+
+
+# ================== TRADES CLÔTURÉS ==================
+class TradeRecord:
+    """
+    Trade clôturé gardé en mémoire pour l'affichage : le strict nécessaire (le record complet,
+    trace et equity compris, part au journal). Le mint est stocké seul, l'URL DexScreener
+    n'est construite qu'à l'affichage.
+    """
+    __slots__ = ("ts", "mint", "outcome", "pnl", "buy_price", "sell_price", "amount_token", "exit", "held")
+
+    def __init__(self, ts, mint, outcome, pnl, buy_price, sell_price, amount_token, exit=None, held=None):
+        self.ts = ts                      # epoch de clôture
+        self.mint = mint
+        self.outcome = outcome            # "success", "fail" ou "rug"
+        self.pnl = pnl
+        self.buy_price = buy_price        # SOL par token
+        self.sell_price = sell_price
+        self.amount_token = amount_token
+        self.exit = exit
+        self.held = held
+
+    @property
+    def time(self) -> str:
+        return time.strftime("%H:%M:%S", time.localtime(self.ts))
+
+    @property
+    def url(self) -> str:
+        return DEXSCREENER_URL + self.mint
+
+    def as_dict(self) -> dict:
+        """Champs du record "close" du journal (mint en URL, comme les anciens *_trades_log)."""
+        return {
+            "time": self.time,
+            "mint": self.url,
+            "pnl": self.pnl,
+            "buy_price": self.buy_price,
+            "sell_price": self.sell_price,
+            "amount_token": self.amount_token,
+            "exit": self.exit,
+            "held": self.held,
+        }
+
+
+# ================== ÉTAT DU PORTEFEUILLE ==================
+class TradeState:
+    """
+    Compteurs du run et historique récent, à mémoire bornée : un ring buffer de `history`
+    trades par issue (les plus anciens en sortent), le reste sur disque dans le journal
+    (TradeJournal, pybot.history). Les agrégats sont tenus au fil des clôtures, jamais
+    recalculés sur l'historique.
+    """
+
+    def __init__(self, history: int = 100):
+        self.start_time = time.time()
+        self.pending = 0
+        self.trades = 0
+        self.revenue = 0.0                # PnL cumulé
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.best = None
+        self.worst = None
+        self.peak = 0.0                   # plus haut du PnL cumulé
+        self.max_drawdown = 0.0
+        self.counts = dict.fromkeys(OUTCOMES, 0)
+        self.recent = {outcome: collections.deque(maxlen=history) for outcome in OUTCOMES}
+
+    # ---------- positions ----------
+    def open(self):
+        self.pending += 1
+
+    def release(self):
+        """Position terminée : clôturée (après close()) ou abandonnée (achat annulé, erreur)."""
+        self.pending -= 1
+
+    def close(self, record: TradeRecord):
+        """Trade clôturé : compteurs mis à jour, record ajouté au ring buffer de son issue."""
+        self.trades += 1
+        self.counts[record.outcome] += 1
+        pnl = record.pnl
+        self.revenue += pnl
+        if pnl > 0:
+            self.gross_profit += pnl
+        else:
+            self.gross_loss -= pnl
+        self.best = pnl if self.best is None else max(self.best, pnl)
+        self.worst = pnl if self.worst is None else min(self.worst, pnl)
+        self.peak = max(self.peak, self.revenue)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.revenue)
+        self.recent[record.outcome].append(record)
+
+    # ---------- export ----------
+    @property
+    def elapsed(self) -> float:
+        return time.time() - self.start_time
+
+    def stats(self) -> dict:
+        """Compteurs au format de stats.json (clés historiques du dashboard)."""
+        return {
+            "revenue_total": self.revenue,
+            "trade_count": self.trades,
+            "successful_trades": self.counts["success"],
+            "nosuccessful_trades": self.counts["fail"],
+            "rugged_count": self.counts["rug"],
+            "pending_trades": self.pending,
+            "gross_profit": round(self.gross_profit, 6),
+            "gross_loss": round(self.gross_loss, 6),
+            "best_trade": self.best,
+            "worst_trade": self.worst,
+            "max_drawdown": round(self.max_drawdown, 6),
+        }
+
+    def detail(self, outcome: str) -> list:
+        """Lignes "Détail des trades" des derniers trades de l'issue `outcome` (ring buffer)."""
+        sign = "+" if outcome == "success" else "-"
+        return [
+            f"[{t.time}] {t.url} | {sign}{t.pnl:.4f} SOL | Buy: {t.buy_price:.8f} | Sell: {t.sell_price:.8f}"
+            for t in self.recent[outcome]
+        ]
@@ -0,0 +1,10 @@
+def percentile(values, pct: float, presorted: bool = False) -> float:
+    """
+    Percentile `pct` (0-100) de `values`, au rang le plus proche ; 0.0 si aucune valeur.
+    `presorted` évite le tri quand l'appelant lit plusieurs percentiles d'une même liste triée.
+    """
+    if not presorted:
+        values = sorted(values)
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values) - 1, int(round(pct / 100 * (len(values) - 1)))))]
@@ -0,0 +1,103 @@
+import time
+
+from pybot.stats import percentile
+
+# étapes d'un trade, dans l'ordre du pipeline (détection -> vente)
+STAGES = (
+    "ws_recv",              # message WS reçu
+    "dequeue",              # paire admise (slot réservé)
+    "buy_quote_sent",
+    "buy_quote_recv",
+    "buy_swap_sent",
+    "buy_swap_confirmed",
+    "hold_end",             # décision de sortie
+    "sell_quote_sent",
+    "sell_quote_recv",
+    "sell_swap_sent",
+    "sell_swap_confirmed",
+)
+
+
+class TradeTrace:
+    """
+    Horodatages monotones (time.monotonic, en s) des étapes d'un trade, enregistrés avec
+    le trade clôturé (clé "trace"). Seules les différences ont un sens (pas d'heure murale).
+    """
+
+    __slots__ = ("stamps",)
+
+    def __init__(self, ws_recv: float = None):
+        self.stamps = {}
+        if ws_recv is not None:
+            self.stamps["ws_recv"] = ws_recv
+
+    def mark(self, stage: str, at: float = None) -> float:
+        at = time.monotonic() if at is None else at
+        self.stamps[stage] = at
+        return at
+
+    def as_dict(self) -> dict:
+        return {stage: round(self.stamps[stage], 6) for stage in STAGES if stage in self.stamps}
+
+
+def segments(trace: dict) -> list:
+    """[(de, à, début_ms, durée_ms)] entre étapes consécutives présentes, depuis la première étape."""
+    present = [(stage, trace[stage]) for stage in STAGES if trace and trace.get(stage) is not None]
+    if len(present) < 2:
+        return []
+    origin = present[0][1]
+    return [
+        (prev, stage, (start - origin) * 1e3, (end - start) * 1e3)
+        for (prev, start), (stage, end) in zip(present, present[1:])
+    ]
+
+
+def waterfall(trace: dict, skip=()) -> list:
+    """
+    Lignes d'un diagramme en cascade pour un trade. Les segments qui mènent à une étape de
+    `skip` (ex. "hold_end" : la détention écrase le reste) sont retirés et la suite recalée.
+    """
+    rows = []
+    start = 0.0
+    for prev, stage, _, duration in segments(trace):
+        if stage in skip:
+            continue
+        rows.append({
+            "étape": f"{prev} → {stage}",
+            "début (ms)": round(start, 1),
+            "fin (ms)": round(start + duration, 1),
+            "durée (ms)": round(duration, 1),
+        })
+        start += duration
+    return rows
+
+
+def percentile_table(traces, pcts=(50, 90, 99)) -> list:
+    """
+    Une ligne par segment (étape -> étape suivante) puis le total : n, percentiles et max en ms,
+    sur une liste de traces (dicts "trace" des trades).
+    """
+    durations = {}
+    totals = []
+    for trace in traces:
+        segs = segments(trace)
+        for prev, stage, _, duration in segs:
+            durations.setdefault((prev, stage), []).append(duration)
+        if segs:
+            totals.append(segs[-1][2] + segs[-1][3])
+    order = {stage: i for i, stage in enumerate(STAGES)}
+    rows = []
+    for (prev, stage), values in sorted(durations.items(), key=lambda kv: (order[kv[0][1]], order[kv[0][0]])):
+        rows.append(_row(f"{prev} → {stage}", values, pcts))
+    if totals:
+        rows.append(_row("total", totals, pcts))
+    return rows
+
+
+def _row(name: str, values: list, pcts) -> dict:
+    values = sorted(values)
+    row = {"étape": name, "n": len(values)}
+    for pct in pcts:
+        row[f"p{pct} (ms)"] = round(percentile(values, pct, presorted=True), 1)
+    row["max (ms)"] = round(values[-1], 1)
+    return row
@@ -2,8 +2,16 @@ import streamlit as st
 import json
 import os
 import pandas as pd
+import sys
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pybot.control import request_control
+from pybot.dashboard import render_latency
+from pybot.history import TradeHistory
+
+CONTROL_URL = "http://127.0.0.1:8765"  # API de contrôle du bot (CONTROL_HOST / CONTROL_PORT de test.py)
+
 st.set_page_config(page_title="Bot Dashboard", page_icon="🚀", layout="wide")
 st.title("🚀 Dashboard du Bot")
 
@@ -13,13 +21,72 @@ with st.sidebar:
     auto_refresh = st.checkbox("Auto-refresh", value=True)
     refresh_sec = st.slider("Intervalle (sec)", 1, 10, 2)
 
+    # Contrôle du bot : API locale (réglages à chaud) ; control.json si le bot ne répond pas
+    control_file = "control.json"
+    live = request_control("/state", base_url=CONTROL_URL)
+    if live is not None:
+        control = live["control"]
+    elif os.path.exists(control_file):
+        with open(control_file, "r") as f:
+            control = json.load(f)
+    else:
+        control = {"running": True}
+
+    running = control.get("running", True)
+    if running:
+        if st.button("⏸️ Mettre en pause le bot"):
+            if request_control("/pause", base_url=CONTROL_URL) is None:
+                control["running"] = False
+                with open(control_file, "w") as f:
+                    json.dump(control, f)
+            st.success("Bot mis en pause ✅")
+    else:
+        if st.button("▶️ Relancer le bot"):
+            if request_control("/resume", base_url=CONTROL_URL) is None:
+                control["running"] = True
+                with open(control_file, "w") as f:
+                    json.dump(control, f)
+            st.success("Bot relancé ✅")
+
+    if live is None:
+        st.caption("API de contrôle injoignable : pause/reprise via control.json")
+    else:
+        with st.expander("🎛️ Réglages à chaud"):
+            size = st.number_input("Montant par trade (SOL)", min_value=0.001, value=float(control["trade_size_sol"]),
+                                   step=0.01, format="%.3f")
+            hold = st.number_input("Durée max de détention (s)", min_value=1.0, value=float(control["hold_seconds"]),
+                                   step=1.0)
+            slots = st.number_input("Trades simultanés", min_value=1, value=int(control["max_concurrent_trades"]),
+                                    step=1)
+            if st.button("Appliquer"):
+                applied = request_control("/config", {"trade_size_sol": size, "hold_seconds": hold,
+                                                      "max_concurrent_trades": int(slots)}, base_url=CONTROL_URL)
+                if applied is None:
+                    st.error("Réglages refusés ou bot injoignable")
+                else:
+                    st.success("Réglages appliqués ✅")
+
 # --- Fonction pour charger les stats ---
 def load_stats():
+    """Snapshot des compteurs (petit fichier, relu à chaque refresh)."""
     if not os.path.exists("stats.json"):
         return {}
     with open("stats.json", "r", encoding="utf-8") as f:
         return json.load(f)
 
+def load_history(stats):
+    """
+    Historique gardé en session : seules les lignes ajoutées au journal depuis le
+    dernier refresh sont lues et ajoutées aux DataFrames en cache.
+    """
+    journal_path = stats.get("journal", "trades.jsonl")
+    history = st.session_state.get("history")
+    if history is None or history.tail.path != journal_path:
+        history = TradeHistory(journal_path)
+        st.session_state["history"] = history
+    history.refresh(stats.get("run"))
+    return history
+
 # Timer de session (affichage)
 if "start_time" not in st.session_state:
     st.session_state["start_time"] = time.time()
@@ -91,20 +158,19 @@ else:
     # --- Historique des trades ---
     st.subheader("📜 Historique")
 
-    success_log = stats.get("successful_trades_log", [])
-    fail_log = stats.get("nosuccessful_trades_log", [])
-    rugpull_log = stats.get("rugpull_trades_log", [])
+    history = load_history(stats)
+    # rendu mis en cache par version de l'historique : rien n'est recalculé sans nouveau trade
+    render_cache = st.session_state.setdefault("render_cache", {})
 
     def format_dataframe(logs, title):
-        if not logs:
+        if logs.empty:
             return pd.DataFrame()
         st.markdown(f"### {title}")
-        df = pd.DataFrame(logs)
-
-        # Nettoyage types
-        for col in ("pnl", "buy_price", "sell_price", "equity_before", "equity_after"):
-            if col in df:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
+        key = (title, history.run, history.version)
+        if key in render_cache:
+            st.markdown(render_cache[key], unsafe_allow_html=True)
+            return logs
+        df = logs.copy()
 
         # Conversion en USD pour le PNL
         if "pnl" in df:
@@ -151,41 +217,39 @@ else:
             "pnl_percent": "📈 pnl (%)"
         })
 
-        st.markdown(df.to_markdown(index=False), unsafe_allow_html=True)
+        # on ne garde que la version courante de chaque tableau
+        for old_key in [k for k in render_cache if k[0] == title]:
+            del render_cache[old_key]
+        render_cache[key] = df.to_markdown(index=False)
+        st.markdown(render_cache[key], unsafe_allow_html=True)
         return df
 
-    df_success = format_dataframe(success_log, "✅ Trades réussis")
-    df_fail    = format_dataframe(fail_log,   "❌ Trades ratés")
-    df_rug     = format_dataframe(rugpull_log,"💀 Rug Pulls")
+    df_success = format_dataframe(history.outcome("success"), "✅ Trades réussis")
+    df_fail    = format_dataframe(history.outcome("fail"),    "❌ Trades ratés")
+    df_rug     = format_dataframe(history.outcome("rug"),     "💀 Rug Pulls")
+
+    df_all = history.all
+
+    st.markdown("---")
+
+    # --- Latence par étape ---
+    st.subheader("⏱️ Latence par étape")
+    render_latency(history)
 
     st.markdown("---")
 
     # --- Graphique d'évolution ---
     st.subheader("📈 Évolution du portefeuille")
 
-    df_all = pd.concat([pd.DataFrame(success_log),
-                        pd.DataFrame(fail_log),
-                        pd.DataFrame(rugpull_log)],
-                       ignore_index=True)
-
-    if not df_all.empty and "pnl" in df_all:
-        df_all["pnl"] = pd.to_numeric(df_all["pnl"], errors="coerce").fillna(0.0)
-        df_all["cum_pnl"] = df_all["pnl"].cumsum()
-        df_all["equity_sol"] = initial_balance + df_all["cum_pnl"]
-        df_all["cum_pnl_usd"] = df_all["cum_pnl"] * SOL_PRICE_USD
-        df_all["equity_usd"] = df_all["equity_sol"] * SOL_PRICE_USD
-
-        # convertir time
-        df_all["time_dt"] = pd.to_datetime(df_all["time"], format="%H:%M:%S", errors="coerce")
-        df_all = df_all.sort_values("time_dt")
-
-        chart = df_all.set_index("time_dt")[["cum_pnl","equity_sol","cum_pnl_usd","equity_usd"]]
-        chart = chart.rename(columns={
-            "cum_pnl":"PNL cumulé (SOL)",
-            "equity_sol":"Équity (SOL)",
-            "cum_pnl_usd":"PNL cumulé (USD)",
-            "equity_usd":"Équity (USD)"
+    if not df_all.empty and "cum_pnl" in df_all:
+        # PnL cumulé déjà calculé incrémentalement, dans l'ordre du journal
+        chart = pd.DataFrame({
+            "PNL cumulé (SOL)": df_all["cum_pnl"],
+            "Équity (SOL)": initial_balance + df_all["cum_pnl"],
+            "PNL cumulé (USD)": df_all["cum_pnl"] * SOL_PRICE_USD,
+            "Équity (USD)": (initial_balance + df_all["cum_pnl"]) * SOL_PRICE_USD,
         })
+        chart.index = pd.to_datetime(df_all["ts"], unit="s") if "ts" in df_all else df_all.index
         st.line_chart(chart, height=400)
     else:
         st.info("Aucun trade pour générer le graphique.")
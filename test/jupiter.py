@@ -1,44 +1,204 @@
 import aiohttp
 import asyncio
+import json
+from collections import OrderedDict
 
-async def get_jupiter_swap_price(input_mint, output_mint, amount_in_lamports):
+# ================== CONFIG ==================
+JUPITER_QUOTE_URL = "https://lite-api.jup.ag/swap/v1/quote"
+JUPITER_TIMEOUT_SECONDS = 10       # timeout total d'une requête
+JUPITER_MAX_CONNECTIONS = 100      # connexions max du pool
+JUPITER_MAX_PER_HOST = 10          # connexions keep-alive max vers lite-api.jup.ag
+JUPITER_DNS_TTL_SECONDS = 300      # cache DNS de l'aiohttp connector
+JUPITER_KEEPALIVE_SECONDS = 60     # durée de vie d'une connexion inactive
+QUOTE_CACHE_TTL_SECONDS = 0.5      # durée de validité d'une quote en cache
+QUOTE_CACHE_MAX_ENTRIES = 2048     # taille max du cache (éviction LRU)
+
+# ================== SESSION ==================
+# Une seule session pour tout le process : DNS + TCP + TLS payés une fois,
+# ensuite chaque quote réutilise une connexion keep-alive du pool.
+_session = None
+
+# pybot.recorder.Recorder : si défini, chaque requête/réponse brute est enregistrée (rejouable)
+recorder = None
+
+# pybot.metrics.Histogram : si défini, reçoit la durée de chaque requête de quote (hors cache)
+quote_latency = None
+
+
+def configure(max_connections=None, max_per_host=None, dns_ttl=None, keepalive=None, timeout=None):
+    """Change les réglages du pool (à appeler avant la première quote)."""
+    global JUPITER_MAX_CONNECTIONS, JUPITER_MAX_PER_HOST, JUPITER_DNS_TTL_SECONDS
+    global JUPITER_KEEPALIVE_SECONDS, JUPITER_TIMEOUT_SECONDS
+    if max_connections is not None:
+        JUPITER_MAX_CONNECTIONS = max_connections
+    if max_per_host is not None:
+        JUPITER_MAX_PER_HOST = max_per_host
+    if dns_ttl is not None:
+        JUPITER_DNS_TTL_SECONDS = dns_ttl
+    if keepalive is not None:
+        JUPITER_KEEPALIVE_SECONDS = keepalive
+    if timeout is not None:
+        JUPITER_TIMEOUT_SECONDS = timeout
+
+
+def new_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=JUPITER_MAX_CONNECTIONS,
+        limit_per_host=JUPITER_MAX_PER_HOST,
+        ttl_dns_cache=JUPITER_DNS_TTL_SECONDS,
+        keepalive_timeout=JUPITER_KEEPALIVE_SECONDS,
+    )
+    timeout = aiohttp.ClientTimeout(total=JUPITER_TIMEOUT_SECONDS)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Session partagée, créée à la première utilisation (dans l'event loop courant)."""
+    global _session
+    if _session is None or _session.closed:
+        _session = new_session()
+    return _session
+
+
+async def close_session():
+    """Hook d'arrêt : ferme la session partagée et ses connexions."""
+    global _session
+    session, _session = _session, None
+    if session is not None and not session.closed:
+        await session.close()
+        # laisse le temps aux transports SSL de se fermer proprement
+        await asyncio.sleep(0.25)
+
+
+# ================== QUOTES ==================
+async def get_jupiter_swap_price(input_mint, output_mint, amount_in_lamports, session=None):
+    if quote_latency is None:
+        return await _request_quote(input_mint, output_mint, amount_in_lamports, session)
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+    try:
+        return await _request_quote(input_mint, output_mint, amount_in_lamports, session)
+    finally:
+        quote_latency.observe(loop.time() - started)
+
+
+async def _request_quote(input_mint, output_mint, amount_in_lamports, session=None):
     url = (
-        f"https://lite-api.jup.ag/swap/v1/quote"
+        f"{JUPITER_QUOTE_URL}"
         f"?inputMint={input_mint}&outputMint={output_mint}"
         f"&amount={amount_in_lamports}&slippageBps=100"
     )
     try:
-        timeout = aiohttp.ClientTimeout(total=10)  # timeout 10 sec max
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url) as resp:
-                if resp.status != 200:
-                    text = await resp.text()
-                    print(f"❌ Erreur HTTP {resp.status} sur Jupiter API : {text[:200]}...")
-                    return None
-                try:
-                    data = await resp.json()
-                except Exception:
-                    text = await resp.text()
-                    print(f"⚠️ Réponse non-JSON : {text[:200]}...")
-                    return None
-
-                if not data or "routePlan" not in data or not data["routePlan"]:
-                    print("⚠️ Aucune route trouvée pour ce token.")
-                    return None
-
-                route = data["routePlan"][0]["swapInfo"]
-                in_amount = int(route["inAmount"])
-                out_amount = int(route["outAmount"])
-                fee_amount = int(route["feeAmount"])
-                price_per_token = out_amount / in_amount if in_amount else 0
-
-                return {
-                    "in_amount": in_amount,
-                    "out_amount": out_amount,
-                    "fee_amount": fee_amount,
-                    "price_per_token": price_per_token,
-                    "amm": route["label"],
-                }
+        session = session or get_session()
+        async with session.get(url) as resp:
+            text = await resp.text()
+            if recorder is not None:
+                recorder.quote(input_mint, output_mint, amount_in_lamports, resp.status, text)
+            if resp.status != 200:
+                print(f"❌ Erreur HTTP {resp.status} sur Jupiter API : {text[:200]}...")
+                return None
+            try:
+                data = json.loads(text)
+            except ValueError:
+                print(f"⚠️ Réponse non-JSON : {text[:200]}...")
+                return None
+
+            if not data or "routePlan" not in data or not data["routePlan"]:
+                print("⚠️ Aucune route trouvée pour ce token.")
+                return None
+
+            route = data["routePlan"][0]["swapInfo"]
+            in_amount = int(route["inAmount"])
+            out_amount = int(route["outAmount"])
+            fee_amount = int(route["feeAmount"])
+            price_per_token = out_amount / in_amount if in_amount else 0
+
+            return {
+                "in_amount": in_amount,
+                "out_amount": out_amount,
+                "fee_amount": fee_amount,
+                "price_per_token": price_per_token,
+                "amm": route["label"],
+                "price_impact": float(data.get("priceImpactPct") or 0),
+            }
     except Exception as e:
         print(f"⚠️ Exception lors de la requête Jupiter: {e}")
         return None
+
+
+# ================== CACHE ==================
+class QuoteCache:
+    """
+    Cache TTL + LRU devant get_jupiter_swap_price, clé (inputMint, outputMint, amount).
+    Les requêtes identiques simultanées partagent la même requête HTTP en vol.
+    Seules les quotes valides sont mises en cache (un None peut être un rug : on redemande).
+    Le TTL suit l'horloge de l'event loop (monotone ; accélérée en replay).
+    """
+
+    def __init__(self, fetch, ttl=QUOTE_CACHE_TTL_SECONDS, max_entries=QUOTE_CACHE_MAX_ENTRIES):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (expires_at, quote)
+        self._inflight = {}             # key -> Task
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, input_mint, output_mint, amount):
+        key = (input_mint, output_mint, int(amount))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > asyncio.get_event_loop().time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(*key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._store(k, t))
+        # shield : un appelant annulé n'annule pas la requête des autres
+        return await asyncio.shield(task)
+
+    def _store(self, key, task):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        quote = task.result()
+        if not quote or self.ttl <= 0:
+            return
+        self._entries[key] = (asyncio.get_event_loop().time() + self.ttl, quote)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "upstream_calls": self.misses,
+            "saved_calls": self.hits + self.coalesced,
+            "size": len(self._entries),
+        }
+
+
+quote_cache = QuoteCache(get_jupiter_swap_price)
+
+
+async def get_cached_swap_price(input_mint, output_mint, amount_in_lamports):
+    """get_jupiter_swap_price via le cache partagé du process."""
+    return await quote_cache.get(input_mint, output_mint, amount_in_lamports)
+
+
+def cache_stats() -> dict:
+    return quote_cache.stats()
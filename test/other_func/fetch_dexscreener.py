@@ -1,24 +1,99 @@
-# ================== PROCESSOR ==================
+import asyncio
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+
+def print_runtime(msg: str):
+    print(msg, flush=True)
+
+
+# ================== CONFIG ==================
 DEXSCREENER_URL = "https://api.dexscreener.com/token-pairs/v1/solana/"
+DEXSCREENER_TOKENS_URL = "https://api.dexscreener.com/tokens/v1/solana/"   # + "mint1,mint2,..." (30 max)
+DEXSCREENER_BATCH_SIZE = 30          # adresses par requête groupée (limite de l'API)
+DEXSCREENER_TICK_SECONDS = 1.0       # tick commun : toutes les mints en attente partent ensemble
+DEXSCREENER_MAX_BATCHES_PER_TICK = 4 # requêtes groupées max par tick (~240/min, sous la limite de 300/min)
+DEXSCREENER_CACHE_TTL_SECONDS = 30   # durée de validité d'une fiche en cache
+DEXSCREENER_CACHE_MAX_ENTRIES = 4096 # taille max du cache (éviction LRU)
+DEXSCREENER_TIMEOUT_SECONDS = 5      # timeout total d'une requête
+
+
+# ================== PROCESSOR ==================
 async def fetch_with_retry(mint, retries, delay):
     """
-    Essaie de récupérer les infos DexScreener avec plusieurs tentatives.
-    - retries : nombre de tentatives max
-    - delay   : délai de base entre chaque retry (progressif)
+    Infos DexScreener d'un mint, en attendant qu'il soit indexé au plus `retries` x `delay` s.
+    Passe par le service groupé (dexscreener) : plus de boucle de retry par mint, la mint
+    reste en attente et repart à chaque tick avec les autres.
     """
-    for i in range(retries):
-        data = await fetch_dexscreener(mint)
-        if data:
-            return data
-        wait_time = delay
-        #print_runtime(f"[DEBUG-Retry-{i}] {mint} pas encore indexé, retry dans {wait_time}s...")
-        await asyncio.sleep(wait_time)
-    return None
+    return await dexscreener.get(mint, timeout=retries * delay)
+
+
+def flatten_pair(pair: dict) -> dict:
+    """Fiche DexScreener d'une paire, aplatie (format historique de fetch_dexscreener)."""
+    base_token = pair.get("baseToken", {})
+    quote_token = pair.get("quoteToken", {})
+    volume = pair.get("volume", {})
+    txns = pair.get("txns", {})
+    liquidity = pair.get("liquidity", {})
+    price_change = pair.get("priceChange", {})
+
+    # --- Extraction socials & websites ---
+    socials = {}
+    websites = []
+    info_block = pair.get("info")
+    if isinstance(info_block, dict):
+        if "websites" in info_block and isinstance(info_block["websites"], list):
+            websites = [w.get("url") for w in info_block["websites"] if isinstance(w, dict) and "url" in w]
+        if "socials" in info_block and isinstance(info_block["socials"], list):
+            for s in info_block["socials"]:
+                if isinstance(s, dict):
+                    socials[s.get("type")] = s.get("url")
+
+    return {
+        "chainId": pair.get("chainId"),
+        "dexId": pair.get("dexId"),
+        "url": pair.get("url"),
+        "pairAddress": pair.get("pairAddress"),
+        "base_name": base_token.get("name"),
+        "base_symbol": base_token.get("symbol"),
+        "base_address": base_token.get("address"),
+        "quote_name": quote_token.get("name"),
+        "quote_symbol": quote_token.get("symbol"),
+        "quote_address": quote_token.get("address"),
+        "price_native": pair.get("priceNative"),
+        "price_usd": pair.get("priceUsd"),
+        "fdv": pair.get("fdv"),
+        "market_cap": pair.get("marketCap"),
+        "pair_created_at": pair.get("pairCreatedAt"),
+        "volume_m5": volume.get("m5"),
+        "volume_h1": volume.get("h1"),
+        "volume_h6": volume.get("h6"),
+        "volume_h24": volume.get("h24"),
+        "txns_m5_buys": (txns.get("m5") or {}).get("buys"),
+        "txns_m5_sells": (txns.get("m5") or {}).get("sells"),
+        "txns_h1_buys": (txns.get("h1") or {}).get("buys"),
+        "txns_h1_sells": (txns.get("h1") or {}).get("sells"),
+        "txns_h24_buys": (txns.get("h24") or {}).get("buys"),
+        "txns_h24_sells": (txns.get("h24") or {}).get("sells"),
+        "price_change_m5": price_change.get("m5"),
+        "price_change_h1": price_change.get("h1"),
+        "price_change_h6": price_change.get("h6"),
+        "price_change_h24": price_change.get("h24"),
+        "liquidity_usd": liquidity.get("usd"),
+        "liquidity_base": liquidity.get("base"),
+        "liquidity_quote": liquidity.get("quote"),
+        "websites": websites,
+        "socials": socials,
+    }
+
 
 async def fetch_dexscreener(token_address: str, session: aiohttp.ClientSession = None):
     """
     Récupère les infos DexScreener pour un token (endpoint search qui renvoie une liste).
     Compatible avec les paires renvoyées sous forme de liste.
+    Une requête par mint : préférer dexscreener.get() (requêtes groupées + cache).
     """
     url = DEXSCREENER_URL + token_address
     close_session = False
@@ -39,67 +114,181 @@ async def fetch_dexscreener(token_address: str, session: aiohttp.ClientSession =
             pair = data[0]  # on prend la première paire
             if not isinstance(pair, dict):
                 return None
-
-            # Extraction classique
-            base_token = pair.get("baseToken", {})
-            quote_token = pair.get("quoteToken", {})
-            volume = pair.get("volume", {})
-            txns = pair.get("txns", {})
-            liquidity = pair.get("liquidity", {})
-            price_change = pair.get("priceChange", {})
-
-            # --- Extraction socials & websites ---
-            socials = {}
-            websites = []
-            info_block = pair.get("info")
-            if isinstance(info_block, dict):
-                if "websites" in info_block and isinstance(info_block["websites"], list):
-                    websites = [w.get("url") for w in info_block["websites"] if isinstance(w, dict) and "url" in w]
-                if "socials" in info_block and isinstance(info_block["socials"], list):
-                    for s in info_block["socials"]:
-                        if isinstance(s, dict):
-                            socials[s.get("type")] = s.get("url")
-
-            return {
-                "chainId": pair.get("chainId"),
-                "dexId": pair.get("dexId"),
-                "url": pair.get("url"),
-                "pairAddress": pair.get("pairAddress"),
-                "base_name": base_token.get("name"),
-                "base_symbol": base_token.get("symbol"),
-                "base_address": base_token.get("address"),
-                "quote_name": quote_token.get("name"),
-                "quote_symbol": quote_token.get("symbol"),
-                "quote_address": quote_token.get("address"),
-                "price_native": pair.get("priceNative"),
-                "price_usd": pair.get("priceUsd"),
-                "fdv": pair.get("fdv"),
-                "market_cap": pair.get("marketCap"),
-                "pair_created_at": pair.get("pairCreatedAt"),
-                "volume_m5": volume.get("m5"),
-                "volume_h1": volume.get("h1"),
-                "volume_h6": volume.get("h6"),
-                "volume_h24": volume.get("h24"),
-                "txns_m5_buys": (txns.get("m5") or {}).get("buys"),
-                "txns_m5_sells": (txns.get("m5") or {}).get("sells"),
-                "txns_h1_buys": (txns.get("h1") or {}).get("buys"),
-                "txns_h1_sells": (txns.get("h1") or {}).get("sells"),
-                "txns_h24_buys": (txns.get("h24") or {}).get("buys"),
-                "txns_h24_sells": (txns.get("h24") or {}).get("sells"),
-                "price_change_m5": price_change.get("m5"),
-                "price_change_h1": price_change.get("h1"),
-                "price_change_h6": price_change.get("h6"),
-                "price_change_h24": price_change.get("h24"),
-                "liquidity_usd": liquidity.get("usd"),
-                "liquidity_base": liquidity.get("base"),
-                "liquidity_quote": liquidity.get("quote"),
-                "websites": websites,
-                "socials": socials,
-            }
+            return flatten_pair(pair)
     except Exception as e:
         elapsed = time.time() - start
         print_runtime(f"[DEBUG] fetch_dexscreener: Exception {e} pour {token_address} en {elapsed:.2f}s")
         return None
     finally:
         if close_session:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+# ================== SERVICE GROUPÉ ==================
+class DexScreenerEnricher:
+    """
+    Enrichissement DexScreener groupé : get(mint) met la mint en attente ; à chaque tick
+    commun, toutes les mints en attente partent en requêtes multi-adresses (`batch_size` par
+    requête, `max_batches` requêtes par tick au plus), sur une seule session keep-alive.
+
+    - les fiches trouvées sont mises en cache `ttl` s (TTL + LRU, horloge de l'event loop)
+    - une mint pas encore indexée reste en file et repart au tick suivant, jusqu'au timeout
+      de son appelant le plus patient (pas de boucle de retry par mint)
+    - plusieurs get() de la même mint partagent la même attente
+    La boucle de tick démarre au premier get() (dans l'event loop courant).
+    """
+
+    def __init__(self, url: str = DEXSCREENER_TOKENS_URL, tick: float = DEXSCREENER_TICK_SECONDS,
+                 batch_size: int = DEXSCREENER_BATCH_SIZE, max_batches: int = DEXSCREENER_MAX_BATCHES_PER_TICK,
+                 ttl: float = DEXSCREENER_CACHE_TTL_SECONDS, max_entries: int = DEXSCREENER_CACHE_MAX_ENTRIES):
+        self.url = url
+        self.tick = tick
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # mint -> (expires_at, fiche)
+        self._pending = OrderedDict()   # mint -> [Future, abandon_at] ; ordre = ancienneté
+        self._session = None
+        self._task = None
+        self.requests = 0               # appels HTTP vers DexScreener
+        self.mints_requested = 0        # adresses envoyées (une mint non indexée compte à chaque tick)
+        self.found = 0
+        self.hits = 0                   # servies par le cache
+        self.joined = 0                 # get() sur une mint déjà en attente
+        self.requeued = 0               # pas encore indexées, renvoyées au tick suivant
+        self.gave_up = 0                # toujours pas indexées au timeout
+        self.errors = 0
+
+    # ---------- session ----------
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.max_batches, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=DEXSCREENER_TIMEOUT_SECONDS),
+            )
+        return self._session
+
+    async def close(self):
+        """Hook d'arrêt : boucle de tick, attentes en cours et session fermées."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for fut, _ in self._pending.values():
+            if not fut.done():
+                fut.set_result(None)
+        self._pending.clear()
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
+
+    # ---------- API ----------
+    async def get(self, mint: str, timeout: float = 20.0):
+        """Fiche aplatie (même format que fetch_dexscreener), ou None si pas indexée sous `timeout` s."""
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        entry = self._entries.get(mint)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(mint)
+                self.hits += 1
+                return entry[1]
+            del self._entries[mint]
+
+        waiting = self._pending.get(mint)
+        if waiting is not None:
+            self.joined += 1
+            waiting[1] = max(waiting[1], now + timeout)
+        else:
+            waiting = self._pending[mint] = [loop.create_future(), now + timeout]
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        # shield : un appelant annulé ne retire pas la mint aux autres
+        return await asyncio.shield(waiting[0])
+
+    # ---------- tick ----------
+    async def run(self):
+        loop = asyncio.get_event_loop()
+        while self._pending:
+            start = loop.time()
+            mints = list(self._pending)[:self.batch_size * self.max_batches]
+            batches = [mints[i:i + self.batch_size] for i in range(0, len(mints), self.batch_size)]
+            results = await asyncio.gather(*(self._fetch_batch(batch) for batch in batches))
+            now = loop.time()
+            for batch, found in zip(batches, results):
+                for mint in batch:
+                    waiting = self._pending.get(mint)
+                    if waiting is None:
+                        continue
+                    data = found.get(mint)
+                    if data is not None:
+                        self._store(mint, data, now)
+                        del self._pending[mint]
+                        if not waiting[0].done():
+                            waiting[0].set_result(data)
+                    else:
+                        self.requeued += 1
+                        self._pending.move_to_end(mint)  # les autres mints passent d'abord au prochain tick
+            # attente plus longue que le timeout du plus patient : abandon (envoyée ou pas ce tick-ci)
+            for mint, waiting in list(self._pending.items()):
+                if now + self.tick > waiting[1]:
+                    self.gave_up += 1
+                    del self._pending[mint]
+                    if not waiting[0].done():
+                        waiting[0].set_result(None)
+            await asyncio.sleep(max(0.0, start + self.tick - loop.time()))
+
+    async def _fetch_batch(self, mints: list) -> dict:
+        """{mint: fiche} pour les mints indexées d'un paquet (première paire de chaque mint)."""
+        self.requests += 1
+        self.mints_requested += len(mints)
+        try:
+            async with self._get_session().get(self.url + ",".join(mints)) as resp:
+                if resp.status != 200:
+                    self.errors += 1
+                    print_runtime(f"[DEBUG] DexScreener: HTTP {resp.status} pour {len(mints)} mints")
+                    return {}
+                data = await resp.json()
+        except Exception as e:
+            self.errors += 1
+            print_runtime(f"[DEBUG] DexScreener: Exception {e} pour {len(mints)} mints")
+            return {}
+        wanted = set(mints)
+        found = {}
+        for pair in data if isinstance(data, list) else []:
+            if not isinstance(pair, dict):
+                continue
+            for side in ("baseToken", "quoteToken"):
+                address = (pair.get(side) or {}).get("address")
+                if address in wanted and address not in found:
+                    found[address] = flatten_pair(pair)
+                    break
+        self.found += len(found)
+        return found
+
+    def _store(self, mint: str, data: dict, now: float):
+        if self.ttl <= 0:
+            return
+        self._entries[mint] = (now + self.ttl, data)
+        self._entries.move_to_end(mint)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "mints_requested": self.mints_requested,
+            "found": self.found,
+            "hits": self.hits,
+            "joined": self.joined,
+            "requeued": self.requeued,
+            "gave_up": self.gave_up,
+            "errors": self.errors,
+            "pending": len(self._pending),
+            "size": len(self._entries),
+        }
+
+
+# service partagé du process (comme le quote_cache de jupiter.py)
+dexscreener = DexScreenerEnricher()
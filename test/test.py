@@ -1,14 +1,26 @@
 import asyncio
-import json
-import websockets
-from datetime import datetime
 import time
-import traceback
 from base58 import b58decode
-import winsound
+try:
+    import winsound
+except ImportError:  # hors Windows (replay, CI) : pas de bip
+    winsound = None
 import importlib.util
+import os
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pybot.executor import SimExecutor
+from pybot.exits import ExitRules, wait_exit
+from pybot.metrics import METRICS
+from pybot.pipeline import Pipeline
+from pybot.prefetch import QuotePrefetcher
+from pybot.price_watcher import PriceWatcher
+from pybot.recorder import Recorder
+from pybot.sell_prep import SellPreparer
+from pybot.state import TradeRecord
+from pybot.trace import TradeTrace
+
 # ================== CONFIG ==================
 FEE_RATE = 0.0025         # 0.25% par transaction (achat & vente)
 SLIPPAGE_RATE_BUY = 0.02    # 2% à l'achat
@@ -17,116 +29,187 @@ TAX_RATE = 0.0              # 0% achat & vente
 TRADE_HOLD_SECONDS = 12           # durée d'attente avant revente
 TRADE_SIZE_SOL = 0.15               # montant investi par trade (en SOL)
 MAX_CONCURRENT_TRADES = 2         # ✅ limite de trades simultanés
+ADMISSION_QUEUE_SIZE = 256        # paires en attente max (au-delà : la plus ancienne est abandonnée)
+ADMISSION_STALE_SECONDS = 10      # une paire en file depuis plus longtemps est abandonnée
+ADMISSION_MIN_SPACING = 5         # écart min entre deux achats (s), ex-RATE_LIMIT (0 = off)
+ADMISSION_PRIORITY = "age"        # "age" (plus récente d'abord) ou "score"
+BUY_PREFETCH_CONCURRENCY = 4      # quotes d'achat spéculatives simultanées, dès la détection (0 = off)
+BUY_PREFETCH_TTL_SECONDS = 1.5    # âge max d'une quote préchargée au début du trade
+FILTER_BUDGET_SECONDS = 0.5       # budget de l'étage de filtrage avant la file d'admission
+FILTER_ON_MISSING = "accept"      # donnée absente dans le budget (DexScreener indexe 2-15 s après création) : "accept" / "reject"
+FILTER_CONCURRENCY = 32           # évaluations simultanées max (au-delà : admise sans filtrage)
+FILTER_MIN_LIQUIDITY_USD = 5000   # liquidité DexScreener min (0 = off)
+FILTER_MIN_VOLUME_M5_USD = 500    # volume 5 min min (0 = off)
+FILTER_MIN_BUY_SELL_RATIO = 1.0   # achats / ventes sur 5 min min (0 = off)
+FILTER_MIN_SOCIALS = 1            # réseaux sociaux + sites min (0 = off)
+FILTER_MAX_PRICE_IMPACT = 0.05    # impact de prix max de la quote d'achat (0 = off)
+CONTROL_FILE = "control.json"     # pause/reprise + réglages à chaud, surveillé (inotify)
+CONTROL_HOST = "127.0.0.1"        # API de contrôle locale (GET /state, POST /pause, /resume, /config)
+CONTROL_PORT = 8765              # 0 = API désactivée
 API_KEY = "SolanaStreaming_API"
 SOLANA_STREAM_WS = "wss://api.solanastreaming.com/"  # remplace si nécessaire
+PAIR_FEEDS = [                    # flux de paires tenus en parallèle : (nom, url, clé API), première arrivée gagnante
+    ("solanastreaming", SOLANA_STREAM_WS, API_KEY),
+]
+FEED_DEDUP_WINDOW = 120           # s pendant lesquels un mint reçu est reconnu sur les autres flux
+WS_PING_INTERVAL = 20             # keepalive WebSocket (s)
+INGEST_REPORT_SECONDS = 60        # fréquence du log des métriques d'ingestion (0 = off)
+SEEN_MINTS_CAPACITY = 1_000_000   # mints mémorisés par génération (mémoire fixe, ~4 Mo)
+SEEN_MINTS_FP_RATE = 0.001        # probabilité d'ignorer à tort un nouveau mint
+SEEN_MINTS_MAX_AGE = 7 * 24 * 3600  # rotation au moins une fois par semaine
+SEEN_MINTS_FILE = "seen_mints.bin"  # persistance : un redémarrage ne rachète pas les mêmes tokens
+JOURNAL_FILE = "trades.jsonl"     # journal append-only des trades (historique)
+STATS_FILE = "stats.json"         # snapshot des compteurs (sans historique)
+TRADE_HISTORY_SIZE = 100          # derniers trades gardés en mémoire par issue (le reste : JOURNAL_FILE)
+PRICE_WATCH_TICK_SECONDS = 1.0    # fréquence des quotes de sortie des positions ouvertes
+PRICE_WATCH_CONCURRENCY = 8       # requêtes de prix simultanées max
+PRICE_WATCH_BATCH = 10            # positions par paquet (paquets étalés sur le tick)
+PRICE_WATCH_JITTER = 0.1          # ±10 % sur le tick
+EXIT_TAKE_PROFIT = 0.30           # vente dès +30 % (0 = off)
+EXIT_STOP_LOSS = 0.20             # vente dès -20 % (0 = off)
+EXIT_TRAILING_STOP = 0.20         # vente si -20 % sous le plus haut... (0 = off, cf. bench_exits --grid)
+EXIT_TRAILING_ARM = 0.10          # ...une fois +10 % atteint
+EXIT_LIQUIDITY_MISSES = 2         # quotes sans route consécutives = liquidité disparue
+SELL_PREPARE_LEAD_SECONDS = 3     # quote de vente rafraîchie dès 3 s avant l'échéance (0 = off)
+SELL_PREPARE_REFRESH_SECONDS = 1  # puis toutes les secondes jusqu'à la sortie
+SELL_PREPARED_MAX_AGE = 2.0       # âge max de la vente préparée à la sortie, sinon quote immédiate
+RECORD_FILE = None                # ex. "session.jsonl.gz" : enregistre flux + quotes (python -m pybot.replay)
+DEFAULTS = {name: value for name, value in globals().items() if name.isupper()}
+
+
+def settings(overrides: dict = None) -> dict:
+    """
+    Réglages d'un run : les constantes ci-dessus, remplacées par `overrides`
+    ({"TRADE_HOLD_SECONDS": 30}, un variant de pybot.fanout...). Une clé inconnue lève ValueError.
+    """
+    overrides = dict(overrides or {})
+    unknown = sorted(set(overrides) - set(DEFAULTS))
+    if unknown:
+        raise ValueError(f"réglages inconnus : {', '.join(unknown)}")
+    return dict(DEFAULTS, **overrides)
 
 
-# ================== STATE ==================
-seen_tokens = set()
-portfolio_balance = 1.38        # Solde fictif du portefeuille en SOL
-initial_balance = portfolio_balance
-revenue_total = 0.0            # PnL cumulé
-start_time = time.time()
-trade_count = 0
-rugged_count = 0
-successful_trades = 0
-nosuccessful_trades = 0
-pending_trades = 0
-successful_trades_log = []
-nosuccessful_trades_log = []
-rugpull_trades_log = []
-
-trade_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TRADES)
-
-def is_running():
-    try:
-        with open("control.json", "r") as f:
-            data = json.load(f)
-            return data.get("running", True)
-    except Exception:
-        return True
-
-def save_stats():
-    global initial_balance, portfolio_balance, revenue_total, trade_count, successful_trades, nosuccessful_trades, rugged_count, pending_trades, successful_trades_log, nosuccessful_trades_log, rugpull_trades_log
-    stats = {
-        "initial_balance": initial_balance,
-        "portfolio_balance": portfolio_balance,
-        "revenue_total": revenue_total,
-        "trade_count": trade_count,
-        "successful_trades": successful_trades,
-        "nosuccessful_trades": nosuccessful_trades,
-        "rugged_count": rugged_count,
-        "pending_trades": pending_trades,
-        "successful_trades_log": successful_trades_log,
-        "nosuccessful_trades_log": nosuccessful_trades_log,
-        "rugpull_trades_log": rugpull_trades_log
-    }
-    with open("stats.json", "w") as f:
-        json.dump(stats, f, indent=2)
-
 # ================== LOGGING ==================
-def stats_header() -> str:
-    global trade_count, rugged_count, portfolio_balance, revenue_total, start_time, successful_trades, pending_trades, successful_trades_log, nosuccessful_trades, nosuccessful_trades_log
-    elapsed = time.time() - start_time
-    minutes = elapsed / 60 if elapsed > 0 else 0.0
-    hours = elapsed / 3600 if elapsed > 0 else 0.0
-    avg_per_min = revenue_total / minutes if minutes > 0 else 0.0
-    avg_per_hour = revenue_total / hours if hours > 0 else 0.0
-    header = (
-        f"Trades pris : {trade_count}\n"
-        f"Rugged : {rugged_count}\n"
-        f"Trades réussis : {successful_trades}\n"
-        f"Trades non réussis : {nosuccessful_trades}\n"
-        f"Trades en cours : {pending_trades}\n"
-        f"Solde portefeuille : {portfolio_balance:.4f} SOL\n"
-        f"Revenu total : {revenue_total:.4f} SOL\n"
-        f"Temps écoulé : {int(elapsed//60)} min {int(elapsed%60)} sec\n"
-        f"Gain moyen/min : {avg_per_min:.4f} SOL | Gain moyen/heure : {avg_per_hour:.4f} SOL\n"
-    )
-    if successful_trades_log:
-        header += "\n--- Détail des trades réussis ---\n"
-        for t in successful_trades_log:
-            header += (
-                f"[{t['time']}] {t['mint']} | +{t['pnl']:.4f} SOL | Buy: {t['buy_price']:.8f} | Sell: {t['sell_price']:.8f}\n"
-            )
-    else:
-        header += "\n--- Détail des trades non réussis ---\n"
-        for t in nosuccessful_trades_log:
-            header += (
-                f"[{t['time']}] {t['mint']} | -{t['pnl']:.4f} SOL | Buy: {t['buy_price']:.8f} | Sell: {t['sell_price']:.8f}\n"
-            )
-
-    return header
-
-def print_and_write_end_of_trade(extra: str):
-    header = stats_header()
-    out = header + (extra or "")
-    try:
-        with open("result.txt", "w", encoding="utf-8") as f:
-            f.write(header)
-    except Exception:
-        pass
-
 def print_runtime(msg: str):
     print(msg, flush=True)
 
-# ================== TRADE SIMULATION ==================
+# ================== JUPITER / DEXSCREENER ==================
 # Jupiter swap util
-spec = importlib.util.spec_from_file_location("jupiter", "jupiter.py")
+spec = importlib.util.spec_from_file_location("jupiter", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jupiter.py"))
 jupiter = importlib.util.module_from_spec(spec)
 sys.modules["jupiter"] = jupiter
 spec.loader.exec_module(jupiter)
+# GET /metrics de l'API de contrôle ; métriques communes (file, filtrage, erreurs...) : pybot.pipeline
+quote_latency = METRICS.histogram("quote_seconds", "Requête de quote Jupiter (hors cache)")
+sell_latency = METRICS.histogram("sell_seconds", "Décision de sortie -> quote de vente obtenue")
+rugs = METRICS.counter("rugs_total", "Rug pulls détectés")
+jupiter.quote_latency = quote_latency
+
+# DexScreener groupé (fiches des nouvelles paires pour le filtrage)
+spec = importlib.util.spec_from_file_location(
+    "fetch_dexscreener", os.path.join(os.path.dirname(os.path.abspath(__file__)), "other_func", "fetch_dexscreener.py"))
+dexscreener_api = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(dexscreener_api)
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
 
-async def simulate_trade(mint, decimals, buy_amount_sol=TRADE_SIZE_SOL, hold_seconds=TRADE_HOLD_SECONDS):
-    global portfolio_balance, revenue_total, trade_count, rugged_count, successful_trades, pending_trades
-    global successful_trades_log, nosuccessful_trades, nosuccessful_trades_log, rugpull_trades_log
-    print_runtime(f"\n🚀 Simulation de trade sur {mint} (decimals={decimals}) avec {buy_amount_sol} SOL...")
-    # 🚦 Attendre qu'il y ait un slot dispo
-    while pending_trades >= MAX_CONCURRENT_TRADES:
-        print_runtime(f"⏸️ Trop de trades actifs ({pending_trades}/{MAX_CONCURRENT_TRADES}), attente...")
-        await asyncio.sleep(1)
+async def fetch_sell_quote(mint, amount_raw):
+    return await jupiter.get_cached_swap_price(mint, SOL_MINT, amount_raw)
+
+# ================== TRADE SIMULATION ==================
+class Simulator:
+    """
+    Un run du simulateur, construit depuis `config` (settings()) : fills fictifs sur les
+    quotes Jupiter, flux / filtrage / admission communs avec main/main.py (pybot.pipeline).
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.jupiter = jupiter
+        self.dexscreener_api = dexscreener_api
+        # solde fictif du portefeuille (1.38 SOL) et comptabilité des fills fictifs
+        self.executor = SimExecutor(1.38, config["FEE_RATE"], config["SLIPPAGE_RATE_BUY"],
+                                    config["SLIPPAGE_RATE_SELL"], config["TAX_RATE"])
+        self.initial_balance = self.executor.balance
+        METRICS.gauge("balance_sol", "Solde du portefeuille (SOL)").set_function(lambda: self.executor.balance)
+        # quote d'achat demandée dès la détection, pendant l'attente en file d'admission
+        self.quote_prefetcher = QuotePrefetcher(jupiter.get_cached_swap_price,
+                                                max_inflight=config["BUY_PREFETCH_CONCURRENCY"],
+                                                ttl=config["BUY_PREFETCH_TTL_SECONDS"])
+        # une seule tâche surveille le prix de toutes les positions ouvertes
+        self.price_watcher = PriceWatcher(fetch_sell_quote, tick=config["PRICE_WATCH_TICK_SECONDS"],
+                                          max_concurrency=config["PRICE_WATCH_CONCURRENCY"],
+                                          batch_size=config["PRICE_WATCH_BATCH"], jitter=config["PRICE_WATCH_JITTER"])
+        # quote de sortie rafraîchie juste avant l'échéance : la vente n'attend plus de requête
+        self.sell_preparer = SellPreparer(self.prepare_sell, lead=config["SELL_PREPARE_LEAD_SECONDS"],
+                                          refresh=config["SELL_PREPARE_REFRESH_SECONDS"],
+                                          max_age=config["SELL_PREPARED_MAX_AGE"])
+        # flux, filtrage, admission, contrôle et journal communs avec main/main.py ; trades : simulate_trade
+        self.pipeline = Pipeline(
+            config, self.simulate_trade, lambda mint, timeout: dexscreener_api.dexscreener.get(mint, timeout=timeout),
+            quote_prefetcher=self.quote_prefetcher, sell_preparer=self.sell_preparer, price_watcher=self.price_watcher,
+            extra_state=lambda: {"initial_balance": self.initial_balance, "portfolio_balance": self.executor.balance},
+            print_fn=print_runtime)
+
+    async def prepare_sell(self, mint, amount_raw):
+        """Vente préparée du simulateur : une quote de sortie à jour (partagée avec le price watcher)."""
+        return await self.price_watcher.poll_now((mint, amount_raw))
+
+    def record_trade(self, record: TradeRecord, **extra):
+        """Trade clôturé : compteurs et ring buffer de `state`, record complet (+ `extra`) au journal."""
+        self.pipeline.state.close(record)
+        self.pipeline.journal.append("close", dict(record.as_dict(), **extra, outcome=record.outcome))
+
+    def stats_header(self) -> str:
+        state = self.pipeline.state
+        elapsed = state.elapsed
+        minutes = elapsed / 60 if elapsed > 0 else 0.0
+        hours = elapsed / 3600 if elapsed > 0 else 0.0
+        avg_per_min = state.revenue / minutes if minutes > 0 else 0.0
+        avg_per_hour = state.revenue / hours if hours > 0 else 0.0
+        header = (
+            f"Trades pris : {state.trades}\n"
+            f"Rugged : {state.counts['rug']}\n"
+            f"Trades réussis : {state.counts['success']}\n"
+            f"Trades non réussis : {state.counts['fail']}\n"
+            f"Trades en cours : {state.pending}\n"
+            f"Solde portefeuille : {self.executor.balance:.4f} SOL\n"
+            f"Revenu total : {state.revenue:.4f} SOL\n"
+            f"Temps écoulé : {int(elapsed//60)} min {int(elapsed%60)} sec\n"
+            f"Gain moyen/min : {avg_per_min:.4f} SOL | Gain moyen/heure : {avg_per_hour:.4f} SOL\n"
+        )
+        cache = jupiter.cache_stats()
+        header += (
+            f"Cache quotes : {cache['hits']} hits | {cache['coalesced']} fusionnées | "
+            f"{cache['upstream_calls']} appels Jupiter ({cache['saved_calls']} évités)\n"
+            f"Suivi des prix : {self.price_watcher.summary()}\n"
+            f"Admission : {self.pipeline.admission.summary()}\n"
+            f"Filtrage : {self.pipeline.filter_pipeline.summary()}\n"
+            f"Quotes d'achat préchargées : {self.quote_prefetcher.summary()}\n"
+            f"Ventes préparées : {self.sell_preparer.summary()}\n"
+        )
+        # derniers trades seulement (ring buffer de TRADE_HISTORY_SIZE), l'historique complet est au journal
+        if state.recent["success"]:
+            header += "\n--- Détail des trades réussis ---\n"
+            header += "".join(line + "\n" for line in state.detail("success"))
+        else:
+            header += "\n--- Détail des trades non réussis ---\n"
+            header += "".join(line + "\n" for line in state.detail("fail"))
+
+        return header
+
+    def print_and_write_end_of_trade(self, extra: str):
+        header = self.stats_header()
+        out = header + (extra or "")
+        try:
+            with open("result.txt", "w", encoding="utf-8") as f:
+                f.write(header)
+        except Exception:
+            pass
 
-    async with trade_semaphore:
+    async def simulate_trade(self, mint, decimals, buy_amount_sol, hold_seconds, trace=None, prefetch=None):
+        print_runtime(f"\n🚀 Simulation de trade sur {mint} (decimals={decimals}) avec {buy_amount_sol} SOL...")
+        trace = trace or TradeTrace()
         log_lines = []
         log_lines.append(f"\n🤖 [SIMU] Achat fictif de {buy_amount_sol} SOL sur {mint} (decimals={decimals})...")
         try:
@@ -134,252 +217,187 @@ async def simulate_trade(mint, decimals, buy_amount_sol=TRADE_SIZE_SOL, hold_sec
         except Exception:
             pass
 
-        SOL_MINT = "So11111111111111111111111111111111111111112"
+        # slot pris / achat fictif débité : rendus si une erreur survient avant la détention
+        held, opened = False, None
         try:
             amount_in = int(buy_amount_sol * 1e9)  # SOL = 9 décimales
-            swap_info = await jupiter.get_jupiter_swap_price(SOL_MINT, mint, amount_in)
+            trace.mark("buy_quote_sent")
+            swap_info = await self.quote_prefetcher.take(prefetch, SOL_MINT, mint, amount_in)
+            trace.mark("buy_quote_recv")
             if not swap_info or swap_info["out_amount"] <= 0:
                 log_lines.append("   ⚠️ Impossible d'obtenir un prix valide via Jupiter. Achat annulé.")
-                print_and_write_end_of_trade("\n".join(log_lines))
+                self.print_and_write_end_of_trade("\n".join(log_lines))
                 return
-            pending_trades += 1
-            save_stats()
+            self.pipeline.state.open()
+            held = True
+            self.pipeline.save_stats()
 
-            # Prix instantané (hors slippage)
-            buy_price = swap_info["price_per_token"]  # token par SOL
-            amount_token_raw = swap_info["out_amount"] / (10 ** decimals)
-
-            # ✅ Application du slippage BUY
-            amount_token = amount_token_raw * (1 - SLIPPAGE_RATE_BUY)
-
-            if buy_price <= 0 or amount_token <= 0:
+            # ✅ fill fictif : slippage BUY sur la quote, frais / taxes côté SOL
+            buy = self.executor.buy_fill(swap_info, buy_amount_sol, decimals)
+            if buy is None:
                 log_lines.append("   ⚠️ Prix/quantité invalides. Achat annulé.")
-                pending_trades -= 1
-                save_stats()
-                print_and_write_end_of_trade("\n".join(log_lines))
+                self.pipeline.state.release()
+                self.pipeline.save_stats()
+                self.print_and_write_end_of_trade("\n".join(log_lines))
                 return
 
-            # Frais / taxes appliqués côté SOL
-            buy_fee = buy_amount_sol * FEE_RATE
-            buy_tax = buy_amount_sol * TAX_RATE
-            total_buy_cost = buy_amount_sol + buy_fee + buy_tax
-
-            if portfolio_balance < total_buy_cost:
-                log_lines.append(f"   ❌ Solde insuffisant ({portfolio_balance:.4f} SOL restants). Achat annulé.")
-                pending_trades -= 1
-                save_stats()
-                print_and_write_end_of_trade("\n".join(log_lines))
+            if not self.executor.open(buy):
+                log_lines.append(f"   ❌ Solde insuffisant ({self.executor.balance:.4f} SOL restants). Achat annulé.")
+                self.pipeline.state.release()
+                self.pipeline.save_stats()
+                self.print_and_write_end_of_trade("\n".join(log_lines))
                 return
+            opened = buy
 
-            portfolio_balance -= total_buy_cost
-            save_stats()
+            self.pipeline.save_stats()
 
         except Exception as e:
+            if opened is not None:
+                self.executor.cancel(opened)
+            self.pipeline.errors.labels("buy").inc()
             log_lines.append(f"   ⚠️ Erreur Jupiter buy: {e}")
-            pending_trades -= 1
-            save_stats()
-            print_and_write_end_of_trade("\n".join(log_lines))
+            if held:
+                self.pipeline.state.release()
+            self.pipeline.save_stats()
+            self.print_and_write_end_of_trade("\n".join(log_lines))
             return
 
         # -------- ACHAT --------
-        equity_before = portfolio_balance
-        buy_price_token_in_sol = buy_amount_sol / amount_token  # SOL par token
-        amount_token_bought = amount_token  # quantité de tokens réellement obtenue
+        equity_before = self.executor.balance
+        total_buy_cost = buy.cost
+        buy_price_token_in_sol = buy.price  # SOL par token
+        amount_token_bought = buy.amount_token  # quantité de tokens réellement obtenue
 
         log_lines.append(f"   ➤ Prix du token à l'achat : {buy_price_token_in_sol:.8f} SOL/token")
         log_lines.append(f"   ➤ Quantité achetée : {amount_token_bought:.6f} tokens")
-        log_lines.append(f"   ➤ Frais+taxes : {(buy_fee+buy_tax):.4f} SOL")
-        log_lines.append(f"   ➤ Solde portefeuille : {portfolio_balance:.4f} SOL")
+        log_lines.append(f"   ➤ Frais+taxes : {(buy.fee+buy.tax):.4f} SOL")
+        log_lines.append(f"   ➤ Solde portefeuille : {self.executor.balance:.4f} SOL")
         log_lines.append(f"   ➤ Attente {hold_seconds}s...\n")
         print_runtime("\n".join(log_lines))
 
-        await asyncio.sleep(hold_seconds)
-
-        # -------- VENTE --------
-        end_log = []
+        # -------- HOLD : sortie sur TP / SL / trailing / liquidité, au plus tard après hold_seconds --------
+        config = self.config
+        position = prepared = None
         try:
-            amount_out = int(amount_token * (10 ** decimals))
-            swap_info_sell = await jupiter.get_jupiter_swap_price(mint, SOL_MINT, amount_out)
-
-            if (not swap_info_sell 
-                or "error" in swap_info_sell 
-                or swap_info_sell.get("out_amount", 0) <= 0):
-                # 🚨 Rug pull détecté → perte totale du trade
-                end_log.append("   💀 Rug pull détecté : plus aucune liquidité pour revendre.")
-                rugged_count += 1
-
-                # ❌ On considère que tout le total_buy_cost est perdu
-                revenue_total -= total_buy_cost
-                pnl = -total_buy_cost
-                trade_count += 1
-                now = datetime.now().strftime("%H:%M:%S")
-                rugpull_trades_log.append({   # <--- on log dans un tableau dédié
-                    "time": now,
-                    "mint": "https://dexscreener.com/solana/" + mint,
-                    "pnl": pnl,
+            try:
+                self.pipeline.journal.append("buy", {
+                    "mint": mint,
                     "buy_price": buy_price_token_in_sol,
-                    "sell_price": 0,
-                    "amount_token": amount_token_bought
+                    "amount_token": amount_token_bought,
+                    "cost": total_buy_cost,
                 })
-
-                pending_trades -= 1
-                save_stats()
-                print_and_write_end_of_trade("\n".join(end_log))
+                amount_out = buy.amount_raw
+                position = self.price_watcher.subscribe(mint, amount_out)
+                rules = ExitRules(hold_seconds, config["EXIT_TAKE_PROFIT"], config["EXIT_STOP_LOSS"],
+                                  config["EXIT_TRAILING_STOP"], config["EXIT_TRAILING_ARM"],
+                                  config["EXIT_LIQUIDITY_MISSES"])
+                prepared = self.sell_preparer.arm(asyncio.get_running_loop().time() + hold_seconds, mint, amount_out)
+                exit_decision = await wait_exit(position, amount_in, rules)
+            except BaseException:
+                # trade interrompu avant ou pendant la détention (annulation, erreur) : achat fictif remboursé
+                self.executor.cancel(buy)
+                self.pipeline.state.release()
+                self.pipeline.save_stats()
+                raise
+
+            # -------- VENTE --------
+            trace.mark("hold_end")
+            end_log = [f"   ➤ Sortie : {exit_decision.describe()}"]
+            sell_started = asyncio.get_running_loop().time()
+            sell = None
+            try:
+                trace.mark("sell_quote_sent")
+                # vente préparée encore fraîche : pas de requête (la dernière quote du watcher si plus récente)
+                ready = self.sell_preparer.take(prepared)
+                latest = position.latest
+                if ready is not None:
+                    swap_info_sell = latest.quote if latest is not None and latest.at > ready.at else ready.quote
+                else:
+                    swap_info_sell = await position.fresh(max_age=config["PRICE_WATCH_TICK_SECONDS"])
+                trace.mark("sell_quote_recv")
+                sell_latency.observe(asyncio.get_running_loop().time() - sell_started)
+
+                sell = self.executor.close(buy, swap_info_sell)
+                if sell.rug:
+                    # 🚨 Rug pull détecté → perte totale du trade
+                    end_log.append("   💀 Rug pull détecté : plus aucune liquidité pour revendre.")
+                    rugs.inc()
+
+                    # ❌ On considère que tout le total_buy_cost est perdu
+                    self.record_trade(TradeRecord(time.time(), mint, "rug", sell.pnl, buy_price_token_in_sol, 0,
+                                                  amount_token_bought, exit_decision.reason,
+                                                  round(exit_decision.held, 2)),
+                                      trace=trace.as_dict())
+                    self.pipeline.state.release()
+                    self.pipeline.save_stats()
+                    self.print_and_write_end_of_trade("\n".join(end_log))
+                    return
+
+            except BaseException as e:
+                if sell is None:
+                    self.executor.cancel(buy)  # vente jamais simulée : coût de l'achat recrédité
+                self.pipeline.state.release()
+                self.pipeline.save_stats()
+                if not isinstance(e, Exception):
+                    raise
+                self.pipeline.errors.labels("sell").inc()
+                end_log.append(f"   ⚠️ Erreur Jupiter sell: {e}")
+                self.print_and_write_end_of_trade("\n".join(end_log))
                 return
-            
-            trade_count += 1
-            save_stats()
-            sell_price = swap_info_sell["price_per_token"]
-            sol_received = swap_info_sell["out_amount"] / 1e9
 
-        except Exception as e:
-            end_log.append(f"   ⚠️ Erreur Jupiter sell: {e}")
-            pending_trades -= 1
-            save_stats()
-            print_and_write_end_of_trade("\n".join(end_log))
-            return
+        finally:
+            # plus de quotes de sortie ni de vente préparée pour cette position, quelle que soit l'issue
+            if position is not None:
+                position.close()
+            if prepared is not None:
+                self.sell_preparer.close(prepared)
 
-        # Si la vente est possible
-        sell_value = sol_received * (1 - SLIPPAGE_RATE_SELL)
-        sell_fee = sell_value * FEE_RATE
-        sell_tax = sell_value * TAX_RATE
+        # Si la vente est possible (slippage SELL, frais / taxes : self.executor)
+        pnl = sell.pnl
 
-        pnl = sell_value - total_buy_cost - sell_fee - sell_tax
-        portfolio_balance += sell_value - sell_fee - sell_tax
-        revenue_total += pnl
+        sell_price_token_in_sol = sell.price  # SOL par token
 
-        sell_price_token_in_sol = sol_received / amount_token  # SOL par token
-
-        equity_after = portfolio_balance                                     
+        equity_after = self.executor.balance                                     
         pnl_pct_equity_before = (pnl / equity_before * 100) if equity_before > 0 else 0.0  
 
-        if pnl > 0:
-            successful_trades += 1
-            save_stats()
-            now = datetime.now().strftime("%H:%M:%S")
-            successful_trades_log.append({
-                "time": now,
-                "mint": "https://dexscreener.com/solana/" + mint,
-                "pnl": pnl,
-                "buy_price": buy_price_token_in_sol,
-                "sell_price": sell_price_token_in_sol,
-                "amount_token": amount_token_bought,
-                "pnl_pct_equity_before": pnl_pct_equity_before,   
-                "equity_before": equity_before,                   
-                "equity_after": equity_after                     
-            })
-        else:
-            nosuccessful_trades += 1
-            save_stats()
-            now = datetime.now().strftime("%H:%M:%S")
-            nosuccessful_trades_log.append({
-                "time": now,
-                "mint": "https://dexscreener.com/solana/" + mint,
-                "pnl": pnl,
-                "buy_price": buy_price_token_in_sol,
-                "sell_price": sell_price_token_in_sol,
-                "amount_token": amount_token_bought,
-                "pnl_pct_equity_before": pnl_pct_equity_before,   
-                "equity_before": equity_before,                   
-                "equity_after": equity_after,                     
-            })
-        pending_trades -= 1
-        save_stats()
+        self.record_trade(TradeRecord(time.time(), mint, "success" if pnl > 0 else "fail", pnl,
+                                      buy_price_token_in_sol, sell_price_token_in_sol, amount_token_bought,
+                                      exit_decision.reason, round(exit_decision.held, 2)),
+                          trace=trace.as_dict(),
+                          pnl_pct_equity_before=pnl_pct_equity_before,
+                          equity_before=equity_before,
+                          equity_after=equity_after)
+        self.pipeline.state.release()
+        self.pipeline.save_stats()
 
         # -------- VENTE --------
         end_log.append(f"   ➤ Prix du token à la vente : {sell_price_token_in_sol:.8f} SOL/token")
-        end_log.append(f"   ➤ Quantité vendue : {amount_token:.6f} tokens")
-        end_log.append(f"   ➤ SOL reçu : {sell_value:.6f} SOL")
+        end_log.append(f"   ➤ Quantité vendue : {buy.amount_token:.6f} tokens")
+        end_log.append(f"   ➤ SOL reçu : {sell.value:.6f} SOL")
         end_log.append(f"   ➤ PnL : {pnl:.4f} SOL ✅")
-        end_log.append(f"   ➤ Solde portefeuille : {portfolio_balance:.4f} SOL")
-        print_and_write_end_of_trade("\n".join(end_log))
-
-async def listen_pools(token_queue: asyncio.Queue):
-    try:
-        async with websockets.connect(
-            SOLANA_STREAM_WS,
-            ping_interval=None,
-            close_timeout=10,
-            extra_headers={"X-API-KEY": API_KEY}
-        ) as ws:
-            await ws.send(json.dumps({
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "newPairSubscribe",
-                "params": {
-                    "include_pumpfun": False
-                }
-            }))
-            print_runtime("📡 Listening SolanaStreaming new pairs...")
-
-            while True:
-                try:
-                    msg = await ws.recv()
-                    data = json.loads(msg)
-                    #print_runtime(f"[DEBUG] WS message: {data}")
-
-                    pair = data.get("params", {}).get("pair", {})
-                    if not pair:
-                        continue
-
-                    base = pair.get("baseToken", {})
-                    mint = base.get("account")
-                    decimals = base.get("info", {}).get("decimals", 9)  # fallback 9
-
-                    if mint and mint not in seen_tokens:
-                        seen_tokens.add(mint)
-                        await token_queue.put((mint, decimals))
-                    await asyncio.sleep(0.1)  # 🧘 petit délai pour éviter de spammer la boucle
-                except Exception as e:
-                    print_runtime(f"⚠️ Inner WS error: {e}")
-                    continue  # 🔑 rester dans la boucle
-
-    except Exception as e:
-        print_runtime(f"⚠️ Outer WS error: {e} — retrying in 5s")
-        await asyncio.sleep(5)
-
-
-async def process_tokens(token_queue: asyncio.Queue):
-    last_trade_time = 0
-    RATE_LIMIT = 5  # secondes entre chaque trade
-    while True:
-        if not is_running():
-            print_runtime("⏸️ Bot en pause (pas de nouveaux tokens)")
-            await asyncio.sleep(2)
-            continue
+        end_log.append(f"   ➤ Solde portefeuille : {self.executor.balance:.4f} SOL")
+        self.print_and_write_end_of_trade("\n".join(end_log))
+
+    async def run(self):
+        self.pipeline.start()
+        record_file = self.config["RECORD_FILE"]
+        recorder = Recorder(record_file) if record_file else None
+        if recorder is not None:
+            self.pipeline.pair_feed.recorder = recorder
+            jupiter.recorder = recorder
+            print_runtime(f"⏺️ Enregistrement du flux et des quotes dans {record_file}")
         try:
-            try:
-                now = time.time()
-                if now - last_trade_time < RATE_LIMIT:
-                    # trop tôt → on remet le token en file et attend un peu
-                    await asyncio.sleep(1)
-                    continue
-                mint, decimals = await asyncio.wait_for(token_queue.get(), timeout=5.0)
-            except asyncio.TimeoutError:
-                await asyncio.sleep(0)
-                continue
-
-            print_runtime(f"\n🔍 Nouveau token détecté : {mint}")
-            await asyncio.sleep(0.3)
-
-            print_runtime(f"✅ Nouveau token retenu: https://dexscreener.com/solana/{mint}")
-            asyncio.create_task(simulate_trade(mint, decimals))
-
-            last_trade_time = time.time()  # mise à jour du timestamp
-
-        except asyncio.CancelledError:
-            raise
-        except Exception as e:
-            print_runtime(f"⚠️ Erreur process_tokens: {e}\n{traceback.format_exc()}")
-            await asyncio.sleep(1)
+            await self.pipeline.run(recorder.run() if recorder is not None else asyncio.sleep(0))
+        finally:
+            if recorder is not None:
+                await recorder.close()
+            await jupiter.close_session()
+            await dexscreener_api.dexscreener.close()
 
 # ================== MAIN ==================
-async def main():
-    token_queue = asyncio.LifoQueue()
-    await asyncio.gather(
-        listen_pools(token_queue),
-        process_tokens(token_queue),
-    )
+async def main(config: dict = None):
+    """`config` : réglages remplacés pour ce run ({"TRADE_HOLD_SECONDS": 30}), validés par settings()."""
+    await Simulator(settings(config)).run()
 
 if __name__ == "__main__":
     try: